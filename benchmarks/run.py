@@ -0,0 +1,306 @@
+"""
+Benchmark runner for manifest parsing, filtering, transformation and delivery.
+
+Usage:
+    python -m benchmarks.run --sizes 100,10000 --output bench.json
+    python -m benchmarks.run --sizes 100 --e2e-projects 20 --orchestrator
+"""
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+from benchmarks.synthetic import create_local_repos, write_manifest
+from lib.manifest.parser import ManifestParser
+from lib.manifest.project_table import ProjectTable
+from lib.manifest.stream_parser import StreamingManifestParser
+from lib.transformer.branch_transformer import BranchTransformer
+from lib.transformer.repo_transformer import RepoTransformer
+from lib.transformer.rules import NameTransforms
+from util.manifest_filter import classify_projects, filter_projects_by_revision
+
+
+def _measure(func: Callable[[], Any], repeat: int) -> List[float]:
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _result(name: str, size: int, timings: List[float], **extra: Any) -> Dict[str, Any]:
+    best = min(timings)
+    return {
+        "benchmark": name,
+        "size": size,
+        "repeat": len(timings),
+        "seconds_min": round(best, 6),
+        "seconds_median": round(statistics.median(timings), 6),
+        "per_item_us": round(best / size * 1e6, 3) if size else 0.0,
+        **extra,
+    }
+
+
+def run_manifest_benchmarks(
+    size: int, hash_ratio: float, repeat: int, work_dir: Path
+) -> List[Dict[str, Any]]:
+    """
+    Benchmark parsing, filtering and transformation on a synthetic manifest.
+
+    Args:
+        size: Number of projects in the manifest
+        hash_ratio: Fraction of hash-pinned projects
+        repeat: Repetitions per benchmark (best and median are reported)
+        work_dir: Directory for the generated manifest
+
+    Returns:
+        Benchmark results
+    """
+    manifest = write_manifest(work_dir / f"manifest-{size}.xml", size, hash_ratio)
+    extra = {"hash_ratio": hash_ratio}
+    results = []
+
+    results.append(
+        _result(
+            "parse",
+            size,
+            _measure(lambda: ManifestParser(manifest).parse(), repeat),
+            **extra,
+        )
+    )
+    results.append(
+        _result(
+            "stream_parse",
+            size,
+            _measure(lambda: list(StreamingManifestParser(manifest).iter_projects()), repeat),
+            **extra,
+        )
+    )
+
+    projects = ManifestParser(manifest).parse()
+    results.append(
+        _result(
+            "filter", size, _measure(lambda: filter_projects_by_revision(projects), repeat), **extra
+        )
+    )
+
+    results.append(
+        _result("classify", size, _measure(lambda: classify_projects(projects), repeat), **extra)
+    )
+
+    table = ProjectTable.from_projects(projects)
+    results.append(
+        _result("table_filter", size, _measure(table.filter_by_revision, repeat), **extra)
+    )
+
+    kept = filter_projects_by_revision(projects)
+    branch_transformer = BranchTransformer(add_date_suffix=True)
+    repo_transformer = RepoTransformer(alias="alias")
+    results.append(
+        _result(
+            "branch_transform",
+            len(kept),
+            _measure(
+                lambda: [branch_transformer.transform_revision(p.revision) for p in kept], repeat
+            ),
+            **extra,
+        )
+    )
+    results.append(
+        _result(
+            "repo_transform",
+            len(kept),
+            _measure(lambda: [repo_transformer.transform(p.name) for p in kept], repeat),
+            **extra,
+        )
+    )
+
+    # Rule engine with the same presets; compiled per repeat so the memo starts cold
+    def rule_transforms() -> NameTransforms:
+        return NameTransforms.from_config(branch_transform=True, repo_alias="alias")
+
+    revisions = [p.revision or "" for p in kept]
+    names = [p.name for p in kept]
+    results.append(
+        _result(
+            "rules_branch_transform",
+            len(kept),
+            _measure(lambda: rule_transforms().branch.transform_many(revisions), repeat),
+            **extra,
+        )
+    )
+    results.append(
+        _result(
+            "rules_repo_transform",
+            len(kept),
+            _measure(lambda: rule_transforms().repo.transform_many(names), repeat),
+            **extra,
+        )
+    )
+    return results
+
+
+def run_bare_delivery_benchmark(count: int, workers: int, work_dir: Path) -> Dict[str, Any]:
+    """
+    Benchmark a mirror + bare-push delivery against local repositories.
+
+    Args:
+        count: Number of projects
+        workers: Worker pool size
+        work_dir: Directory for generated repositories and caches
+
+    Returns:
+        Benchmark result
+    """
+    from lib.delivery.bare_push import BarePusher
+    from lib.delivery.mirror_cache import MirrorCache
+    from lib.delivery.worker_pool import WorkerPool
+
+    root = work_dir / "bare-e2e"
+    create_local_repos(root, count)
+    projects = StreamingManifestParser(_checkout_manifest(root)).iter_projects()
+    projects = filter_projects_by_revision(projects)
+
+    cache = MirrorCache(root / "mirrors")
+    pusher = BarePusher(str(root / "gerrit"), BranchTransformer(), RepoTransformer())
+    upstream = str(root / "upstream")
+
+    def deliver(project: Any) -> None:
+        with cache.open_mirror(upstream, project.name) as mirror:
+            pusher.push(mirror, project)
+
+    started = time.perf_counter()
+    outcomes = WorkerPool(max_workers=workers).map(deliver, projects)
+    elapsed = time.perf_counter() - started
+
+    return _result(
+        "bare_delivery",
+        count,
+        [elapsed],
+        workers=workers,
+        failed=sum(1 for o in outcomes if not o.ok),
+    )
+
+
+def run_orchestrator_benchmark(count: int, work_dir: Path) -> Dict[str, Any]:
+    """
+    Benchmark DeliveryOrchestrator.execute against local repositories.
+
+    Args:
+        count: Number of projects
+        work_dir: Directory for generated repositories
+
+    Returns:
+        Benchmark result (with an "error" field if the run could not complete)
+    """
+    from lib.delivery.orchestrator import DeliveryOrchestrator
+    from lib.manifest.models import DeliveryConfig, ManifestConfig
+
+    root = work_dir / "orchestrator-e2e"
+    create_local_repos(root, count)
+
+    orchestrator = DeliveryOrchestrator(
+        manifest_config=ManifestConfig(repo_url=f"file://{root / 'manifest.git'}", branch="main"),
+        delivery_config=DeliveryConfig(
+            gerrit_url=f"file://{root / 'gerrit'}", auth_method="http", username="bench"
+        ),
+        work_dir=root / "work",
+    )
+
+    started = time.perf_counter()
+    try:
+        result = orchestrator.execute(dry_run=False)
+    except Exception as e:
+        return {"benchmark": "orchestrator_execute", "size": count, "error": str(e)}
+    elapsed = time.perf_counter() - started
+
+    return _result(
+        "orchestrator_execute",
+        count,
+        [elapsed],
+        successful=result.successful,
+        failed=result.failed,
+    )
+
+
+def _checkout_manifest(root: Path) -> Path:
+    checkout = root / "manifest-checkout"
+    subprocess.run(
+        ["git", "clone", "-q", str(root / "manifest.git"), str(checkout)],
+        check=True,
+        capture_output=True,
+    )
+    return checkout / "default.xml"
+
+
+def _git_commit() -> Optional[str]:
+    completed = subprocess.run(
+        ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=False
+    )
+    return completed.stdout.strip() or None
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for the benchmark runner."""
+    parser = argparse.ArgumentParser(description="Run cicd-delivery benchmarks")
+    parser.add_argument(
+        "--sizes",
+        default="100,10000",
+        help="Comma-separated manifest sizes (default: 100,10000; 100000 for large runs)",
+    )
+    parser.add_argument(
+        "--hash-ratio",
+        type=float,
+        default=0.5,
+        help="Fraction of hash-pinned projects (default: 0.5)",
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per benchmark")
+    parser.add_argument(
+        "--e2e-projects",
+        type=int,
+        default=0,
+        help="Also run end-to-end deliveries against N local repositories",
+    )
+    parser.add_argument(
+        "--orchestrator",
+        action="store_true",
+        help="With --e2e-projects, also run DeliveryOrchestrator.execute",
+    )
+    parser.add_argument("--jobs", type=int, default=4, help="Workers for end-to-end delivery")
+    parser.add_argument("-o", "--output", type=Path, help="Write JSON results to file")
+    args = parser.parse_args(argv)
+
+    results: List[Dict[str, Any]] = []
+    with tempfile.TemporaryDirectory(prefix="cicd-bench-") as tmp:
+        work_dir = Path(tmp)
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            results.extend(run_manifest_benchmarks(size, args.hash_ratio, args.repeat, work_dir))
+
+        if args.e2e_projects:
+            results.append(run_bare_delivery_benchmark(args.e2e_projects, args.jobs, work_dir))
+            if args.orchestrator:
+                results.append(run_orchestrator_benchmark(args.e2e_projects, work_dir))
+
+    report = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": results,
+    }
+    output = json.dumps(report, indent=2)
+    if args.output:
+        args.output.write_text(output + "\n", encoding="utf-8")
+    else:
+        print(output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,135 @@
+"""
+Synthetic manifest and repository generators for benchmarks.
+"""
+import random
+import subprocess
+from pathlib import Path
+from typing import Iterator, List, Tuple
+from xml.sax.saxutils import quoteattr
+
+BRANCH_REVISIONS = ["main", "master", "android-14.0.0", "refs/heads/release", "develop"]
+TAG_REVISIONS = ["v1.0.0", "android-14.0.0_r1", "refs/tags/v2.1"]
+
+
+def synthetic_projects(
+    count: int, hash_ratio: float = 0.5, seed: int = 0
+) -> Iterator[Tuple[str, str, str]]:
+    """
+    Generate synthetic project entries.
+
+    Args:
+        count: Number of projects
+        hash_ratio: Fraction of projects pinned to a commit hash
+        seed: Random seed (same seed gives the same manifest)
+
+    Yields:
+        (name, path, revision) tuples
+    """
+    if not 0.0 <= hash_ratio <= 1.0:
+        raise ValueError("hash_ratio must be between 0 and 1")
+
+    rng = random.Random(seed)
+    for i in range(count):
+        group = f"group{i % 97:02d}"
+        name = f"platform/{group}/project{i:06d}"
+        path = f"{group}/project{i:06d}"
+        roll = rng.random()
+        if roll < hash_ratio:
+            revision = f"{rng.getrandbits(160):040x}"
+        elif roll < hash_ratio + (1.0 - hash_ratio) * 0.8:
+            revision = rng.choice(BRANCH_REVISIONS)
+        else:
+            revision = rng.choice(TAG_REVISIONS)
+        yield name, path, revision
+
+
+def write_manifest(
+    path: Path,
+    count: int,
+    hash_ratio: float = 0.5,
+    seed: int = 0,
+    fetch_url: str = "https://example.com/",
+) -> Path:
+    """
+    Write a synthetic manifest XML file.
+
+    Args:
+        path: Output file path
+        count: Number of projects
+        hash_ratio: Fraction of projects pinned to a commit hash
+        seed: Random seed
+        fetch_url: Fetch URL of the default remote
+
+    Returns:
+        Path of the written manifest
+    """
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<manifest>\n')
+        f.write(f'  <remote name="origin" fetch={quoteattr(fetch_url)} />\n')
+        f.write('  <default revision="main" remote="origin" />\n')
+        for name, project_path, revision in synthetic_projects(count, hash_ratio, seed):
+            f.write(
+                f"  <project name={quoteattr(name)} path={quoteattr(project_path)} "
+                f"revision={quoteattr(revision)} />\n"
+            )
+        f.write("</manifest>\n")
+    return path
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=bench", "-c", "user.email=bench@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def create_local_repos(root: Path, count: int, files_per_repo: int = 20) -> List[str]:
+    """
+    Create upstream repositories, a manifest repository and empty target repositories.
+
+    Layout under root:
+        upstream/<name>     - non-bare upstream projects on branch "main"
+        manifest.git        - bare manifest repository with default.xml on "main"
+        gerrit/<name>       - bare target repositories standing in for Gerrit
+
+    Args:
+        root: Base directory
+        count: Number of projects
+        files_per_repo: Files committed in each project
+
+    Returns:
+        Project names
+    """
+    names = [f"platform/project{i:04d}" for i in range(count)]
+
+    for name in names:
+        upstream = root / "upstream" / name
+        upstream.mkdir(parents=True)
+        _git(upstream, "init", "-q", "-b", "main")
+        for n in range(files_per_repo):
+            (upstream / f"file{n}.txt").write_text(f"{name} {n}\n" * 64)
+        _git(upstream, "add", "-A")
+        _git(upstream, "commit", "-q", "-m", "initial")
+
+        target = root / "gerrit" / name
+        target.mkdir(parents=True)
+        _git(target, "init", "-q", "--bare")
+
+    manifest_work = root / "manifest-work"
+    manifest_work.mkdir()
+    _git(manifest_work, "init", "-q", "-b", "main")
+    with open(manifest_work / "default.xml", "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<manifest>\n')
+        f.write(f'  <remote name="origin" fetch={quoteattr(str(root / "upstream"))} />\n')
+        f.write('  <default revision="main" remote="origin" />\n')
+        for name in names:
+            f.write(f"  <project name={quoteattr(name)} path={quoteattr(name)} />\n")
+        f.write("</manifest>\n")
+    _git(manifest_work, "add", "default.xml")
+    _git(manifest_work, "commit", "-q", "-m", "manifest")
+    _git(root, "clone", "-q", "--bare", str(manifest_work), str(root / "manifest.git"))
+
+    return names
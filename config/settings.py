@@ -3,11 +3,79 @@ Configuration management.
 """
 import os
 from pathlib import Path
-from typing import Optional
+from typing import Any, Dict, Iterable, List, Optional
 
 import yaml
 
+from lib.delivery.workspace import parse_size
 from lib.manifest.models import DeliveryConfig, ManifestConfig
+from lib.transformer.rules import NameTransforms
+
+CONFIG_SUFFIXES = (".yaml", ".yml")
+
+
+def discover_config_files(paths: Iterable[Path]) -> List[Path]:
+    """
+    Expand config paths, replacing directories with the YAML files they contain.
+
+    Files inside a directory are taken in name order; duplicates are
+    dropped.
+
+    Args:
+        paths: Config files or directories
+
+    Returns:
+        Config file paths
+
+    Raises:
+        FileNotFoundError: If a path doesn't exist
+        ValueError: If a directory contains no config files
+    """
+    found: List[Path] = []
+    for path in paths:
+        if path.is_dir():
+            files = sorted(
+                p for p in path.iterdir() if p.is_file() and p.suffix in CONFIG_SUFFIXES
+            )
+            if not files:
+                raise ValueError(f"No configuration files found in directory: {path}")
+            found.extend(files)
+        elif path.exists():
+            found.append(path)
+        else:
+            raise FileNotFoundError(f"Configuration file not found: {path}")
+
+    unique: List[Path] = []
+    seen = set()
+    for path in found:
+        key = path.resolve()
+        if key not in seen:
+            seen.add(key)
+            unique.append(path)
+    return unique
+
+
+def _positive_int(data: Dict[str, Any], key: str) -> Optional[int]:
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise ValueError(f"delivery.{key} must be a positive integer, got {value!r}")
+    return value
+
+
+def _size(data: Dict[str, Any], key: str) -> Optional[int]:
+    value = data.get(key)
+    if value is None:
+        return None
+    if isinstance(value, int) and not isinstance(value, bool) and value >= 0:
+        return value
+    if isinstance(value, str):
+        try:
+            return parse_size(value)
+        except ValueError:
+            pass
+    raise ValueError(f"delivery.{key} must be a size such as 50G, got {value!r}")
 
 
 class ConfigLoader:
@@ -21,6 +89,13 @@ class ConfigLoader:
             config_path: Path to configuration file (YAML)
         """
         self.config_path = config_path
+        # Compiled name transformation rules, set by load()
+        self.transforms: Optional[NameTransforms] = None
+        # delivery.max_parallel / delivery.max_per_host, set by load()
+        self.max_parallel: Optional[int] = None
+        self.max_per_host: Optional[int] = None
+        # delivery.mirror_cache_max_bytes, set by load()
+        self.mirror_cache_max_bytes: Optional[int] = None
         if not config_path.exists():
             raise FileNotFoundError(f"Configuration file not found: {config_path}")
 
@@ -28,12 +103,20 @@ class ConfigLoader:
         """
         Load configuration from file.
 
+        The name transformation rules (`delivery.transform`, or the
+        `branch_transform`/`repo_alias` presets) are compiled into
+        self.transforms; the concurrency settings `delivery.max_parallel`
+        and `delivery.max_per_host` go to self.max_parallel and
+        self.max_per_host, the mirror cache budget
+        `delivery.mirror_cache_max_bytes` to self.mirror_cache_max_bytes.
+
         Returns:
             Tuple of (ManifestConfig, DeliveryConfig)
 
         Raises:
             yaml.YAMLError: If YAML parsing fails
-            ValueError: If required fields are missing
+            ValueError: If required fields are missing or a setting or transform rule
+                is invalid
         """
         with open(self.config_path, "r", encoding="utf-8") as f:
             config_data = yaml.safe_load(f)
@@ -72,5 +155,13 @@ class ConfigLoader:
             branch_transform=delivery_data.get("branch_transform", False),
             repo_alias=delivery_data.get("repo_alias"),
         )
+        self.transforms = NameTransforms.from_config(
+            delivery_data.get("transform"),
+            branch_transform=delivery_config.branch_transform,
+            repo_alias=delivery_config.repo_alias,
+        )
+        self.max_parallel = _positive_int(delivery_data, "max_parallel")
+        self.max_per_host = _positive_int(delivery_data, "max_per_host")
+        self.mirror_cache_max_bytes = _size(delivery_data, "mirror_cache_max_bytes")
 
         return manifest_config, delivery_config
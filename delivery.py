@@ -2,33 +2,423 @@
 Command-line interface for delivery tool.
 """
 import argparse
+import atexit
+import contextlib
 import logging
+import logging.handlers
+import queue
+import shutil
 import sys
+import tempfile
 from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
 
-from config.settings import ConfigLoader
-from lib.delivery.orchestrator import DeliveryOrchestrator
+from util.profiling import Profiler
+from util.sharding import PartialResult, merge_partial_results, parse_shard
+
+# config.settings (YAML), lib.* and GitPython are imported inside the code
+# paths that need them so --help, validate and merge start quickly.
+
+# Target manifest of the last successful diff delivery, kept in the work dir
+PREVIOUS_MANIFEST_NAME = "manifest.previous.xml"
 
 
 def setup_logging(verbose: bool = False) -> None:
     """
     Setup logging configuration.
 
+    Records are handed to a background listener thread, so delivery workers
+    don't wait on the terminal while logging.
+
     Args:
         verbose: If True, enable debug logging
     """
     level = logging.DEBUG if verbose else logging.INFO
-    logging.basicConfig(
-        level=level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        datefmt="%Y-%m-%d %H:%M:%S",
+    root = logging.getLogger()
+    if root.handlers:
+        root.setLevel(level)
+        return
+
+    handler = logging.StreamHandler()
+    handler.setFormatter(
+        logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+            datefmt="%Y-%m-%d %H:%M:%S",
+        )
     )
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+    # The listener's handler formats the record; the queue side only merges
+    # the arguments into the message (basicConfig would format it twice)
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    root.addHandler(queue_handler)
+    root.setLevel(level)
 
 
-def main() -> int:
-    """Main entry point for CLI."""
+def write_profile(
+    profiler: Profiler, profile_path: Optional[Path], prometheus_path: Optional[Path]
+) -> None:
+    """
+    Write timing reports requested on the command line.
+
+    Args:
+        profiler: Profiler holding the recorded spans
+        profile_path: Path for the JSON report (None to skip)
+        prometheus_path: Path for the Prometheus textfile (None to skip)
+    """
+    logger = logging.getLogger(__name__)
+    try:
+        if profile_path:
+            profiler.write_json(profile_path)
+            logger.info(f"Profile report written to {profile_path}")
+        if prometheus_path:
+            profiler.write_prometheus(prometheus_path)
+    except OSError as e:
+        logger.error(f"Failed to write profile report: {e}")
+
+
+def print_summary(result: Any) -> None:
+    """
+    Print the delivery summary.
+
+    Args:
+        result: DeliveryResult (or a merged PartialResult)
+    """
+    print("\n" + "=" * 60)
+    print("Delivery Summary")
+    print("=" * 60)
+    print(f"Total projects in manifest: {result.total_projects}")
+    print(f"Projects after filtering: {result.filtered_projects}")
+    revision_counts = getattr(result, "revision_counts", None)
+    if revision_counts:
+        from util.manifest_filter import KEPT_CATEGORIES, REVISION_CATEGORIES
+
+        excluded = {
+            c: revision_counts.get(c, 0) for c in REVISION_CATEGORIES if c not in KEPT_CATEGORIES
+        }
+        details = ", ".join(f"{c}: {n}" for c, n in excluded.items())
+        print(f"Excluded by revision: {sum(excluded.values())} ({details})")
+    print(f"Successfully pushed: {result.successful}")
+    print(f"Failed: {result.failed}")
+    print(f"Skipped: {result.skipped}")
+    unchanged = getattr(result, "unchanged", None)
+    if unchanged is not None:
+        print(f"Unchanged since last delivery: {unchanged}")
+
+    if result.failed_projects:
+        print(f"\nFailed projects:")
+        for project in result.failed_projects:
+            print(f"  - {project}")
+
+    if result.skipped_projects:
+        print(f"\nSkipped projects:")
+        for project in result.skipped_projects:
+            print(f"  - {project}")
+
+    peak_workspace_bytes = getattr(result, "peak_workspace_bytes", None)
+    if peak_workspace_bytes is not None:
+        from lib.delivery.workspace import format_size
+
+        print(f"\nPeak workspace usage: {format_size(peak_workspace_bytes)}")
+
+    makespan = getattr(result, "makespan_seconds", None)
+    if makespan is not None:
+        predicted = getattr(result, "predicted_makespan_seconds", None)
+        if predicted is None:
+            print(f"\nMakespan: {makespan:.1f}s")
+        else:
+            print(f"\nMakespan: {makespan:.1f}s (predicted from history: {predicted:.1f}s)")
+
+    print("=" * 60 + "\n")
+
+
+def shard_argument(value: str) -> Tuple[int, int]:
+    """
+    Argparse type for "K/N" shard specs.
+
+    Args:
+        value: Command-line value
+
+    Returns:
+        Tuple of (K, N)
+    """
+    try:
+        return parse_shard(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+def positive_int_argument(value: str) -> int:
+    """
+    Argparse type for counts that must be at least 1 (e.g. --jobs).
+
+    Args:
+        value: Command-line value
+
+    Returns:
+        Parsed count
+    """
+    try:
+        count = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid int value: '{value}'") from None
+    if count < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {count}")
+    return count
+
+
+def size_argument(value: str) -> int:
+    """
+    Argparse type for byte sizes such as "20G".
+
+    Args:
+        value: Command-line value
+
+    Returns:
+        Size in bytes
+    """
+    from lib.delivery.workspace import parse_size
+
+    try:
+        return parse_size(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e)) from None
+
+
+@contextlib.contextmanager
+def work_directory(work_dir: Optional[Path]) -> Iterator[Path]:
+    """
+    Provide the working directory of a run.
+
+    Without -w a temporary directory is created and removed on exit, so
+    upstream mirrors don't pile up in /tmp; pass -w to keep and reuse them.
+
+    Args:
+        work_dir: Working directory from the command line (None for temporary)
+
+    Yields:
+        Working directory
+    """
+    if work_dir is not None:
+        yield work_dir
+        return
+    temp_dir = Path(tempfile.mkdtemp(prefix="cicd-delivery-"))
+    try:
+        yield temp_dir
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+
+
+def bare_only_options(args: argparse.Namespace, loader: Any = None) -> List[str]:
+    """
+    List the requested options only the bare mirror + push engine implements.
+
+    A single configuration is delivered by DeliveryOrchestrator only when
+    --orchestrator is given; these options are rejected there, not ignored.
+
+    Args:
+        args: Parsed command-line arguments
+        loader: ConfigLoader of the loaded single configuration
+
+    Returns:
+        Option names (empty if the orchestrator can run the request)
+    """
+    options = []
+    if args.events:
+        options.append("--events")
+    if args.workspace_max_bytes is not None:
+        options.append("--workspace-max-bytes")
+    if args.mirror_cache_max_bytes is not None:
+        options.append("--mirror-cache-max-bytes")
+    if args.jobs is not None:
+        options.append("--jobs")
+    if args.max_per_host is not None:
+        options.append("--max-per-host")
+    if args.resume:
+        options.append("--resume")
+    if args.shard is not None:
+        options.append("--shard")
+    if args.push_unchanged:
+        options.append("--push-unchanged")
+    if args.no_manifest_cache:
+        options.append("--no-manifest-cache")
+    if args.plan_file is not None:
+        options.append("--plan-file")
+    if args.apply is not None:
+        options.append("--apply")
+    if loader is not None:
+        if loader.transforms is not None and loader.transforms.custom:
+            options.append("delivery.transform rules")
+        if loader.max_parallel is not None:
+            options.append("delivery.max_parallel")
+        if loader.max_per_host is not None:
+            options.append("delivery.max_per_host")
+        if loader.mirror_cache_max_bytes is not None:
+            options.append("delivery.mirror_cache_max_bytes")
+    return options
+
+
+def load_batch_configs(config_files: List[Path]) -> List[Any]:
+    """
+    Load configuration files for the mirror + push engine.
+
+    Args:
+        config_files: Configuration files
+
+    Returns:
+        BatchConfig of each file, named after its path
+    """
+    from config.settings import ConfigLoader
+    from lib.delivery.batch import BatchConfig
+
+    configs = []
+    for path in config_files:
+        loader = ConfigLoader(path)
+        manifest_config, delivery_config = loader.load()
+        configs.append(
+            BatchConfig(
+                str(path),
+                manifest_config,
+                delivery_config,
+                loader.transforms,
+                loader.max_parallel,
+                loader.max_per_host,
+                loader.mirror_cache_max_bytes,
+            )
+        )
+    return configs
+
+
+def run_batch(
+    configs: List[Any],
+    work_dir: Optional[Path],
+    dry_run: bool,
+    options: Any,
+    plan_path: Optional[Path] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Deliver several configurations in one run.
+
+    Every upstream project is fetched once into a shared mirror cache and
+    pushed from there to each configuration's Gerrit target.
+
+    Args:
+        configs: BatchConfig of each configuration
+        work_dir: Working directory (default: temp directory)
+        dry_run: If True, resolve targets without pushing
+        options: BatchOptions (concurrency, retries, disk budget, events, profiler)
+        plan_path: Write the resolved pushes as a delivery plan to this path
+        shard: Deliver only shard K of N of each configuration's projects
+
+    Returns:
+        Result of each configuration, by config file name
+    """
+    from lib.delivery.batch import build_fetch_plan, run_plan
+    from lib.manifest.manifest_cache import MANIFEST_CACHE_DIR_NAME, ManifestCache
+
+    with work_directory(work_dir) as work_dir:
+        manifest_cache = None
+        if options.manifest_cache:
+            manifest_cache = ManifestCache(work_dir / MANIFEST_CACHE_DIR_NAME)
+        plan = build_fetch_plan(configs, work_dir, shard, options.profiler, manifest_cache)
+        return run_plan(configs, plan, work_dir, dry_run, plan_path, options)
+
+
+def run_apply(
+    plan_path: Path,
+    configs: List[Any],
+    work_dir: Optional[Path],
+    dry_run: bool,
+    options: Any,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Dict[str, Any]:
+    """
+    Apply a delivery plan without fetching or parsing any manifest.
+
+    Args:
+        plan_path: Delivery plan written with --plan-file
+        configs: BatchConfig of each configuration, providing credentials per Gerrit URL
+        work_dir: Working directory (default: temp directory)
+        dry_run: If True, only log the pushes
+        options: BatchOptions (concurrency, retries, disk budget, events)
+        shard: Apply only shard K of N of the plan's projects
+
+    Returns:
+        Result per Gerrit URL
+    """
+    from lib.delivery.batch import apply_plan
+    from util.delivery_plan import read_plan
+
+    entries = read_plan(plan_path)
+    delivery_configs = [config.delivery_config for config in configs]
+    with work_directory(work_dir) as work_dir:
+        return apply_plan(entries, delivery_configs, work_dir, dry_run, options, shard)
+
+
+def load_baseline(
+    baseline: str, manifest_config: Any, work_dir: Path, manifest_cache: Any = None
+) -> List[Any]:
+    """
+    Load the baseline projects of a diff delivery.
+
+    Args:
+        baseline: Manifest file, "previous" (last diff delivery from the
+            work dir), or a tag/branch of the manifest repository
+        manifest_config: Manifest configuration of the target
+        work_dir: Working directory
+        manifest_cache: ManifestCache consulted for a tag/branch baseline
+
+    Returns:
+        Baseline projects, with the target's default revision applied
+
+    Raises:
+        FileNotFoundError: If no previous manifest is recorded
+    """
+    from lib.delivery.batch import load_manifest, parse_manifest_projects
+    from lib.manifest.fetcher import ManifestFetchError
+    from lib.manifest.models import ManifestConfig
+
+    if baseline == "previous":
+        previous = work_dir / PREVIOUS_MANIFEST_NAME
+        if not previous.exists():
+            raise FileNotFoundError(f"No previous manifest recorded in {work_dir}")
+        return parse_manifest_projects(previous, manifest_config)
+
+    if Path(baseline).is_file():
+        return parse_manifest_projects(Path(baseline), manifest_config)
+
+    settings = {
+        "repo_url": manifest_config.repo_url,
+        "default_revision": manifest_config.default_revision,
+    }
+    try:
+        loaded = load_manifest(ManifestConfig(tag=baseline, **settings), work_dir, manifest_cache)
+    except ManifestFetchError:
+        loaded = load_manifest(
+            ManifestConfig(branch=baseline, **settings), work_dir, manifest_cache
+        )
+    return list(loaded.projects)
+
+
+def diff_main(argv: List[str]) -> int:
+    """
+    Entry point of the `diff` subcommand.
+
+    Delivers only the projects added or changed since a baseline manifest.
+
+    Args:
+        argv: Subcommand arguments
+
+    Returns:
+        Exit code
+    """
     parser = argparse.ArgumentParser(
-        description="Deliver code from manifest to Gerrit"
+        prog="cicd-delivery diff",
+        description="Deliver only projects added or changed since a baseline manifest",
     )
     parser.add_argument(
         "-c",
@@ -37,17 +427,325 @@ def main() -> int:
         required=True,
         help="Path to configuration file (YAML)",
     )
+    parser.add_argument(
+        "--baseline",
+        required=True,
+        help="Baseline manifest: a file, a tag/branch of the manifest repository, or "
+        "'previous' for the last diff delivery in the work dir",
+    )
+    parser.add_argument(
+        "--target",
+        type=Path,
+        metavar="PATH",
+        help="Target manifest file (default: fetch the configured branch/tag)",
+    )
+    parser.add_argument(
+        "--plan-only",
+        action="store_true",
+        help="Print the diff without delivering",
+    )
+    parser.add_argument(
+        "-w",
+        "--work-dir",
+        type=Path,
+        help="Working directory for operations (default: temp directory, removed afterwards)",
+    )
+    parser.add_argument(
+        "-d",
+        "--dry-run",
+        action="store_true",
+        help="Simulate without actually pushing to Gerrit (source SHAs are resolved with "
+        "git ls-remote; no upstream mirror is cloned)",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int_argument,
+        help="Number of projects fetched in parallel (default: delivery.max_parallel, else 4)",
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=positive_int_argument,
+        metavar="N",
+        help="Maximum concurrent pushes per Gerrit host (default: delivery.max_per_host)",
+    )
+    parser.add_argument(
+        "--push-retries",
+        type=int,
+        default=3,
+        metavar="N",
+        help="Retry pushes failing with transient Gerrit errors up to N times, "
+        "adapting concurrency to back-pressure (default: 3)",
+    )
+    parser.add_argument(
+        "--workspace-max-bytes",
+        type=size_argument,
+        metavar="SIZE",
+        help="Cap the disk used by fetched projects (e.g. 20G); new fetches wait for space "
+        "and pushed mirrors are evicted least recently used first to stay within SIZE "
+        "(also caps --mirror-cache-max-bytes)",
+    )
+    parser.add_argument(
+        "--mirror-cache-max-bytes",
+        type=size_argument,
+        metavar="SIZE",
+        help="Cap the mirror cache kept in the work dir (e.g. 50G), evicting least "
+        "recently used mirrors (default: delivery.mirror_cache_max_bytes, else unlimited)",
+    )
+    parser.add_argument(
+        "--events",
+        type=Path,
+        metavar="PATH",
+        help="Write one JSON event per project state change (queued, fetching, pushing, "
+        "done/failed) to PATH as JSON Lines",
+    )
+    parser.add_argument(
+        "--no-manifest-cache",
+        action="store_true",
+        help="Fetch and parse the manifests even if the work dir's cache holds their commit",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Enable verbose logging",
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging(verbose=args.verbose)
+    logger = logging.getLogger(__name__)
+
+    stack = contextlib.ExitStack()
+    try:
+        from config.settings import ConfigLoader
+        from lib.delivery.batch import (
+            BatchConfig,
+            BatchOptions,
+            FetchPlan,
+            load_manifest,
+            parse_manifest_projects,
+            resolve_concurrency,
+            resolve_mirror_cache_max_bytes,
+            resolve_remote_urls,
+            run_plan,
+        )
+        from lib.manifest.manifest_cache import MANIFEST_CACHE_DIR_NAME, ManifestCache
+        from util.events import open_event_stream
+        from util.manifest_diff import diff_projects
+        from util.manifest_filter import classify_projects
+
+        loader = ConfigLoader(args.config)
+        manifest_config, delivery_config = loader.load()
+        work_dir = stack.enter_context(work_directory(args.work_dir))
+
+        manifest_cache = None
+        if not args.no_manifest_cache:
+            manifest_cache = ManifestCache(work_dir / MANIFEST_CACHE_DIR_NAME)
+        if args.target:
+            target_path = args.target
+            target = parse_manifest_projects(target_path, manifest_config)
+            remote_url_of = resolve_remote_urls(target_path, manifest_config.repo_url)
+        else:
+            loaded = load_manifest(manifest_config, work_dir, manifest_cache)
+            target = list(loaded.projects)
+            remote_url_of, target_path = loaded.remote_url_of, loaded.path
+        baseline = load_baseline(args.baseline, manifest_config, work_dir, manifest_cache)
+        diff = diff_projects(baseline, target)
+
+        if args.plan_only:
+            print(diff.format())
+            return 0
+
+        name = str(args.config)
+        plan = FetchPlan()
+        classified = classify_projects(diff.to_deliver)
+        plan.add(
+            name,
+            classified.kept,
+            remote_url_of,
+            total_projects=len(target),
+            revision_counts=classified.counts,
+        )
+        logger.info(f"Delivering {plan.push_count} of {len(target)} projects")
+        config = BatchConfig(
+            name,
+            manifest_config,
+            delivery_config,
+            loader.transforms,
+            loader.max_parallel,
+            loader.max_per_host,
+            loader.mirror_cache_max_bytes,
+        )
+        jobs, per_host_limit = resolve_concurrency([config], args.jobs, args.max_per_host)
+        with open_event_stream(args.events) as events:
+            options = BatchOptions(
+                jobs,
+                per_host_limit,
+                args.push_retries,
+                args.workspace_max_bytes,
+                events,
+                mirror_cache_max_bytes=resolve_mirror_cache_max_bytes(
+                    [config], args.mirror_cache_max_bytes
+                ),
+            )
+            result = run_plan([config], plan, work_dir, args.dry_run, options=options)[name]
+
+        print_summary(result)
+        if result.failed:
+            return 1
+
+        # Only a kept work dir (-w) can serve as the next 'previous' baseline
+        if not args.dry_run and args.work_dir is not None:
+            shutil.copyfile(target_path, work_dir / PREVIOUS_MANIFEST_NAME)
+        return 0
+
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+        return 1
+    except Exception as e:
+        logger.error(f"Unexpected error: {e}", exc_info=True)
+        return 1
+    finally:
+        stack.close()
+
+
+def validate_main(argv: List[str]) -> int:
+    """
+    Entry point of the `validate` subcommand.
+
+    Loads each configuration through ConfigLoader and reports problems
+    without touching git or the network.
+
+    Args:
+        argv: Subcommand arguments
+
+    Returns:
+        Exit code (1 if any configuration is invalid)
+    """
+    parser = argparse.ArgumentParser(
+        prog="cicd-delivery validate",
+        description="Check configuration files without delivering",
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        nargs="+",
+        required=True,
+        help="Configuration files or directories of them",
+    )
+    args = parser.parse_args(argv)
+
+    from config.settings import ConfigLoader, discover_config_files
+
+    try:
+        config_files = discover_config_files(args.config)
+    except (FileNotFoundError, ValueError) as e:
+        print(f"ERROR: {e}")
+        return 1
+
+    failed = 0
+    for path in config_files:
+        try:
+            ConfigLoader(path).load()
+        except Exception as e:
+            failed += 1
+            print(f"INVALID: {path}: {e}")
+        else:
+            print(f"OK: {path}")
+    return 1 if failed else 0
+
+
+def merge_main(argv: List[str]) -> int:
+    """
+    Entry point of the `merge` subcommand.
+
+    Combines result files written with --result-file (e.g. one per shard)
+    into the usual summary and exit code.
+
+    Args:
+        argv: Subcommand arguments
+
+    Returns:
+        Exit code
+    """
+    parser = argparse.ArgumentParser(
+        prog="cicd-delivery merge",
+        description="Merge partial delivery results into one summary",
+    )
+    parser.add_argument(
+        "result_files",
+        type=Path,
+        nargs="+",
+        metavar="RESULT_FILE",
+        help="Result files written with --result-file",
+    )
+    parser.add_argument(
+        "-v",
+        "--verbose",
+        action="store_true",
+        help="Enable verbose logging",
+    )
+    args = parser.parse_args(argv)
+
+    setup_logging(verbose=args.verbose)
+    logger = logging.getLogger(__name__)
+
+    try:
+        result = merge_partial_results([PartialResult.read(path) for path in args.result_files])
+    except FileNotFoundError as e:
+        logger.error(f"File not found: {e}")
+        return 1
+    except (ValueError, TypeError) as e:
+        logger.error(f"Cannot merge results: {e}")
+        return 1
+
+    print_summary(result)
+    return 0 if result.failed == 0 else 1
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Main entry point for CLI."""
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv and argv[0] == "merge":
+        return merge_main(argv[1:])
+    if argv and argv[0] == "diff":
+        return diff_main(argv[1:])
+    if argv and argv[0] == "validate":
+        return validate_main(argv[1:])
+
+    parser = argparse.ArgumentParser(
+        description="Deliver code from manifest to Gerrit",
+        epilog=(
+            "Subcommands: 'diff --baseline BASE -c CONFIG' delivers only changed projects; "
+            "'validate -c CONFIG...' checks configuration files; "
+            "'merge RESULT_FILE...' combines result files into one summary."
+        ),
+    )
+    parser.add_argument(
+        "-c",
+        "--config",
+        type=Path,
+        nargs="+",
+        required=True,
+        help=(
+            "Path to configuration file (YAML); several files or a directory of "
+            "them run as one batch sharing upstream fetches"
+        ),
+    )
     parser.add_argument(
         "-w",
         "--work-dir",
         type=Path,
-        help="Working directory for operations (default: temp directory)",
+        help="Working directory for operations (default: temp directory, removed afterwards)",
     )
     parser.add_argument(
         "-d",
         "--dry-run",
         action="store_true",
-        help="Simulate without actually pushing to Gerrit",
+        help="Simulate without actually pushing to Gerrit (source SHAs are resolved with "
+        "git ls-remote; no upstream mirror is cloned)",
     )
     parser.add_argument(
         "-v",
@@ -55,21 +753,211 @@ def main() -> int:
         action="store_true",
         help="Enable verbose logging",
     )
+    parser.add_argument(
+        "--profile",
+        type=Path,
+        metavar="PATH",
+        help="Write per-phase timing report (JSON) to PATH",
+    )
+    parser.add_argument(
+        "--prometheus-textfile",
+        type=Path,
+        metavar="PATH",
+        help="Write phase timing metrics in node_exporter textfile format to PATH",
+    )
+    parser.add_argument(
+        "--result-file",
+        type=Path,
+        metavar="PATH",
+        help="Write the delivery result as JSON to PATH (see 'merge')",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=positive_int_argument,
+        help="Number of projects fetched in parallel by the mirror + push engine "
+        "(default: delivery.max_parallel, else 4)",
+    )
+    parser.add_argument(
+        "--max-per-host",
+        type=positive_int_argument,
+        metavar="N",
+        help="Maximum concurrent pushes per Gerrit host (default: delivery.max_per_host)",
+    )
+    parser.add_argument(
+        "--push-retries",
+        type=int,
+        default=3,
+        metavar="N",
+        help="Retry pushes failing with transient Gerrit errors up to N times, "
+        "adapting concurrency to back-pressure (default: 3)",
+    )
+    parser.add_argument(
+        "--workspace-max-bytes",
+        type=size_argument,
+        metavar="SIZE",
+        help="Cap the disk used by fetched projects (e.g. 20G); new fetches wait for space "
+        "and pushed mirrors are evicted least recently used first to stay within SIZE "
+        "(also caps --mirror-cache-max-bytes)",
+    )
+    parser.add_argument(
+        "--mirror-cache-max-bytes",
+        type=size_argument,
+        metavar="SIZE",
+        help="Cap the mirror cache kept in the work dir (e.g. 50G), evicting least "
+        "recently used mirrors (default: delivery.mirror_cache_max_bytes, else unlimited)",
+    )
+    parser.add_argument(
+        "--events",
+        type=Path,
+        metavar="PATH",
+        help="Write one JSON event per project state change (queued, fetching, pushing, "
+        "done/failed) to PATH as JSON Lines",
+    )
+    parser.add_argument(
+        "--orchestrator",
+        action="store_true",
+        help="Deliver a single config with the checkout-based DeliveryOrchestrator instead "
+        "of the default mirror + push engine (does not support --events, "
+        "--workspace-max-bytes, --jobs, --max-per-host, --shard, --resume, --push-unchanged, "
+        "--no-manifest-cache, --mirror-cache-max-bytes, --plan-file, --apply, "
+        "delivery.max_parallel/max_per_host/mirror_cache_max_bytes or transform rules)",
+    )
+    parser.add_argument(
+        "--bare-push",
+        action="store_true",
+        help="Deliver with the checkout-free mirror + push engine (the default; kept for "
+        "compatibility)",
+    )
+    parser.add_argument(
+        "--shard",
+        type=shard_argument,
+        metavar="K/N",
+        help="Deliver only shard K of N of the filtered projects, balanced by the durations "
+        "recorded in the work dir's delivery history (stable hash of the project name "
+        "without one; all runners must see the same history); merge the runners' "
+        "--result-file outputs with 'merge'",
+    )
+    parser.add_argument(
+        "--no-manifest-cache",
+        action="store_true",
+        help="Fetch and parse the manifests even if the work dir's cache holds their commit",
+    )
+    parser.add_argument(
+        "--push-unchanged",
+        action="store_true",
+        help="Push every project, even those whose upstream SHA matches the last delivery "
+        "recorded in the work dir (reported as unchanged otherwise)",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue an interrupted run from the journal in the work dir (requires -w), "
+        "pushing only projects that failed or were not reached",
+    )
+    parser.add_argument(
+        "--plan-file",
+        type=Path,
+        metavar="PATH",
+        help="Write the resolved pushes as a delivery plan (JSON Lines) to PATH; "
+        "combine with --dry-run to plan without pushing",
+    )
+    parser.add_argument(
+        "--apply",
+        type=Path,
+        metavar="PLAN",
+        help="Push exactly the delivery plan PLAN, skipping manifest download and parsing "
+        "(configs only provide credentials)",
+    )
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Setup logging
     setup_logging(verbose=args.verbose)
 
     logger = logging.getLogger(__name__)
+    profiler = Profiler()
 
     try:
-        # Load configuration
-        logger.info(f"Loading configuration from {args.config}")
-        config_loader = ConfigLoader(args.config)
-        manifest_config, delivery_config = config_loader.load()
+        with profiler.span("config"):
+            from config.settings import ConfigLoader, discover_config_files
+
+            config_files = discover_config_files(args.config)
+            single = len(config_files) == 1 and not args.config[0].is_dir()
+            if args.orchestrator and args.bare_push:
+                parser.error("--orchestrator and --bare-push select different engines")
+            if args.orchestrator and not single:
+                parser.error("--orchestrator delivers a single config file, not a batch")
+            # The mirror + push engine is the default; the orchestrator runs only on request
+            bare_path = not args.orchestrator
+            config_loader = None
+            if bare_path:
+                configs = load_batch_configs(config_files)
+            else:
+                logger.info(f"Loading configuration from {config_files[0]}")
+                config_loader = ConfigLoader(config_files[0])
+                manifest_config, delivery_config = config_loader.load()
+
+        unsupported = [] if bare_path else bare_only_options(args, config_loader)
+        if unsupported:
+            parser.error(
+                f"{', '.join(unsupported)} not supported by the orchestrator; "
+                "drop --orchestrator to deliver with the mirror + push engine"
+            )
+        if args.resume and args.work_dir is None:
+            parser.error("--resume requires -w/--work-dir holding the interrupted run")
+        if bare_path:
+            from lib.delivery.batch import (
+                BatchOptions,
+                resolve_concurrency,
+                resolve_mirror_cache_max_bytes,
+            )
+            from util.events import open_event_stream
+
+            jobs, per_host_limit = resolve_concurrency(configs, args.jobs, args.max_per_host)
+            with profiler.span("execute"), open_event_stream(args.events) as events:
+                options = BatchOptions(
+                    jobs,
+                    per_host_limit,
+                    args.push_retries,
+                    args.workspace_max_bytes,
+                    events,
+                    resume=args.resume,
+                    skip_unchanged=not args.push_unchanged,
+                    profiler=profiler,
+                    manifest_cache=not args.no_manifest_cache,
+                    mirror_cache_max_bytes=resolve_mirror_cache_max_bytes(
+                        configs, args.mirror_cache_max_bytes
+                    ),
+                )
+                if args.apply:
+                    logger.info(f"Applying delivery plan {args.apply}...")
+                    results = run_apply(
+                        args.apply, configs, args.work_dir, args.dry_run, options, args.shard
+                    )
+                else:
+                    logger.info(f"Starting batch delivery of {len(config_files)} config(s)...")
+                    results = run_batch(
+                        configs, args.work_dir, args.dry_run, options, args.plan_file, args.shard
+                    )
+
+            for name, config_result in results.items():
+                print(f"\n{'Target' if args.apply else 'Configuration'}: {name}")
+                print_summary(config_result)
+
+            if args.result_file:
+                result = merge_partial_results(list(results.values()))
+                if args.shard is not None:
+                    # Lets 'merge' count the manifest once instead of once per shard
+                    result.shard = "{}/{}".format(*args.shard)
+                result.write(args.result_file)
+                logger.info(f"Result written to {args.result_file}")
+
+            return 0 if all(r.failed == 0 for r in results.values()) else 1
 
         # Create orchestrator
+        from lib.delivery.orchestrator import DeliveryOrchestrator
+
         orchestrator = DeliveryOrchestrator(
             manifest_config=manifest_config,
             delivery_config=delivery_config,
@@ -78,29 +966,14 @@ def main() -> int:
 
         # Execute delivery
         logger.info("Starting delivery process...")
-        result = orchestrator.execute(dry_run=args.dry_run)
-
-        # Print results
-        print("\n" + "=" * 60)
-        print("Delivery Summary")
-        print("=" * 60)
-        print(f"Total projects in manifest: {result.total_projects}")
-        print(f"Projects after filtering: {result.filtered_projects}")
-        print(f"Successfully pushed: {result.successful}")
-        print(f"Failed: {result.failed}")
-        print(f"Skipped: {result.skipped}")
-
-        if result.failed_projects:
-            print(f"\nFailed projects:")
-            for project in result.failed_projects:
-                print(f"  - {project}")
-
-        if result.skipped_projects:
-            print(f"\nSkipped projects:")
-            for project in result.skipped_projects:
-                print(f"  - {project}")
-
-        print("=" * 60 + "\n")
+        with profiler.span("execute"):
+            result = orchestrator.execute(dry_run=args.dry_run)
+
+        if args.result_file:
+            PartialResult.from_result(result).write(args.result_file)
+            logger.info(f"Result written to {args.result_file}")
+
+        print_summary(result)
 
         # Return exit code
         return 0 if result.failed == 0 else 1
@@ -111,6 +984,8 @@ def main() -> int:
     except Exception as e:
         logger.error(f"Unexpected error: {e}", exc_info=True)
         return 1
+    finally:
+        write_profile(profiler, args.profile, args.prometheus_textfile)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,3 @@
+"""
+Library modules.
+"""
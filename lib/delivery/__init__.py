@@ -0,0 +1,3 @@
+"""
+Gerrit delivery modules.
+"""
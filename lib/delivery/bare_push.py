@@ -0,0 +1,212 @@
+"""
+Checkout-free push of projects straight from bare repositories.
+"""
+import logging
+import os
+import subprocess
+from dataclasses import dataclass, replace
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Optional, Tuple, Union
+
+from lib.transformer.branch_transformer import BranchTransformer
+from lib.transformer.repo_transformer import RepoTransformer
+from lib.transformer.rules import NameTransformer
+
+if TYPE_CHECKING:
+    from lib.manifest.models import Project
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PushTarget:
+    """Resolved push of one project."""
+
+    url: str
+    repo: str
+    branch: str
+    source_sha: str
+
+    @property
+    def refspec(self) -> str:
+        """Refspec pushed to Gerrit (full refs such as tags are pushed as is)."""
+        if self.branch.startswith("refs/"):
+            return f"{self.source_sha}:{self.branch}"
+        return f"{self.source_sha}:refs/heads/{self.branch}"
+
+
+class BarePusher:
+    """
+    Pushes project revisions from bare repositories without a checkout.
+
+    Only objects and refs are touched, so the cost does not grow with the
+    size of the working tree. Target repository and branch names go
+    through RepoTransformer and BranchTransformer as in a regular delivery,
+    or through the NameTransformer rule engine configured by ConfigLoader.
+    """
+
+    def __init__(
+        self,
+        gerrit_url: str,
+        branch_transformer: Union[BranchTransformer, NameTransformer],
+        repo_transformer: Union[RepoTransformer, NameTransformer],
+        git_env: Optional[Dict[str, str]] = None,
+        push_url: Optional[str] = None,
+    ) -> None:
+        """
+        Initialize bare pusher.
+
+        Args:
+            gerrit_url: Target Gerrit URL
+            branch_transformer: Transformer for target branch names
+            repo_transformer: Transformer for target repository names
+            git_env: Extra environment for git commands (e.g. auth settings)
+            push_url: Base URL pushed to, if it differs from gerrit_url (e.g. the
+                SSH URL with its port spelled out)
+        """
+        self.gerrit_url = gerrit_url.rstrip("/")
+        self.push_url = (push_url or gerrit_url).rstrip("/")
+        self.branch_transformer = branch_transformer
+        self.repo_transformer = repo_transformer
+        self.git_env = git_env or {}
+
+    def target_names(self, project: "Project") -> Tuple[str, str]:
+        """
+        Target repository and branch of a project, without touching git.
+
+        A revision under refs/tags/ is delivered as the same tag, not as a
+        branch, so the full tag ref is returned in place of a branch name.
+
+        Args:
+            project: Manifest project
+
+        Returns:
+            Tuple of (repository, branch or full tag ref)
+        """
+        repo = self.repo_transformer.transform(project.name)
+        if project.revision and project.revision.startswith("refs/tags/"):
+            return repo, project.revision
+        branch = self.branch_transformer.transform_revision(project.revision) or ""
+        if branch.startswith("refs/heads/"):
+            branch = branch[len("refs/heads/") :]
+        return repo, branch
+
+    def resolve(self, mirror_path: Path, project: "Project") -> PushTarget:
+        """
+        Resolve the push target of a project.
+
+        Args:
+            mirror_path: Bare repository holding the project objects
+            project: Manifest project
+
+        Returns:
+            Push target with the source revision resolved to a commit
+
+        Raises:
+            ValueError: If the project has no revision
+            RuntimeError: If the revision does not exist in the repository
+        """
+        if not project.revision:
+            raise ValueError(f"Project {project.name} has no revision")
+
+        return self.target_for(project, self._resolve_commit(mirror_path, project.revision))
+
+    def target_for(self, project: "Project", source_sha: str) -> PushTarget:
+        """
+        Push target of a project whose source commit is already known (e.g. from ls-remote).
+
+        Args:
+            project: Manifest project
+            source_sha: Commit the project revision points to
+
+        Returns:
+            Push target
+        """
+        repo, branch = self.target_names(project)
+        return PushTarget(
+            url=f"{self.push_url}/{repo}", repo=repo, branch=branch, source_sha=source_sha
+        )
+
+    def retarget(self, target: PushTarget) -> PushTarget:
+        """
+        Point a pinned target (e.g. read from a delivery plan) at this pusher's push URL.
+
+        Args:
+            target: Push target
+
+        Returns:
+            Same push, sent through push_url
+        """
+        return replace(target, url=f"{self.push_url}/{target.repo}")
+
+    def push(self, mirror_path: Path, project: "Project", dry_run: bool = False) -> PushTarget:
+        """
+        Push a project revision from a bare repository.
+
+        Args:
+            mirror_path: Bare repository holding the project objects
+            project: Manifest project
+            dry_run: If True, resolve the target without pushing
+
+        Returns:
+            Push target that was (or would be) pushed
+
+        Raises:
+            RuntimeError: If the push fails
+        """
+        return self.push_target(mirror_path, self.resolve(mirror_path, project), dry_run)
+
+    def push_target(
+        self, mirror_path: Optional[Path], target: PushTarget, dry_run: bool = False
+    ) -> PushTarget:
+        """
+        Push an already resolved target (e.g. one read from a delivery plan).
+
+        Args:
+            mirror_path: Bare repository holding the source commit (None for a dry run
+                resolved without a mirror)
+            target: Push target
+            dry_run: If True, only log the push
+
+        Returns:
+            The pushed target
+
+        Raises:
+            RuntimeError: If the push fails
+        """
+        if dry_run:
+            logger.info(
+                f"[DRY-RUN] Would push {target.source_sha[:12]} -> {target.repo}:{target.branch}"
+            )
+            return target
+
+        if mirror_path is None:
+            raise ValueError(f"No mirror to push {target.repo} from")
+        logger.debug(f"Pushing {target.refspec} to {target.url}")
+        self._git(mirror_path, "push", "--quiet", target.url, target.refspec)
+        return target
+
+    def _resolve_commit(self, mirror_path: Path, revision: str) -> str:
+        if revision.startswith("refs/"):
+            candidates = [revision]
+        else:
+            candidates = [f"refs/heads/{revision}", f"refs/tags/{revision}", revision]
+
+        for candidate in candidates:
+            try:
+                return self._git(
+                    mirror_path, "rev-parse", "--verify", "--quiet", f"{candidate}^{{commit}}"
+                )
+            except RuntimeError:
+                continue
+
+        raise RuntimeError(f"Revision {revision} not found in {mirror_path}")
+
+    def _git(self, cwd: Path, *args: str) -> str:
+        env = dict(os.environ, **self.git_env) if self.git_env else None
+        completed = subprocess.run(
+            ["git", *args], cwd=cwd, env=env, capture_output=True, text=True, check=False
+        )
+        if completed.returncode != 0:
+            raise RuntimeError(f"git {args[0]} failed: {completed.stderr.strip()}")
+        return completed.stdout.strip()
@@ -0,0 +1,1203 @@
+"""
+Batch delivery of several configurations sharing upstream fetches.
+"""
+import contextlib
+import dataclasses
+import hashlib
+import logging
+import time
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import (
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    NamedTuple,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+)
+from urllib.parse import urljoin
+
+from lib.delivery.bare_push import BarePusher, PushTarget
+from lib.delivery.history import DeliveryHistory
+from lib.delivery.journal import (
+    OUTCOME_FAILED,
+    OUTCOME_SKIPPED,
+    OUTCOME_SUCCESS,
+    DeliveryJournal,
+)
+from lib.delivery.mirror_cache import MirrorCache
+from lib.delivery.pipeline import Pipeline, Stage
+from lib.delivery.remote_snapshot import STATUS_UP_TO_DATE, RemoteRefSnapshot
+from lib.delivery.retry import BackoffPolicy, RetryScheduler, classify_error
+from lib.delivery.state_store import DeliveryStateStore, StateKey
+from lib.delivery.transport import create_transport, session_key, ssh_push_url
+from lib.delivery.worker_pool import HostLimiter, gerrit_host
+from lib.delivery.workspace import Reservation, Workspace
+from lib.manifest.fetcher import RepoInitFetcher, fetch_manifest
+from lib.manifest.manifest_cache import ManifestCache
+from lib.manifest.models import DeliveryConfig, ManifestConfig, Project
+from lib.manifest.project_table import ProjectTable, ProjectTableView
+from lib.manifest.stream_parser import StreamingManifestParser
+from lib.transformer.rules import NameTransforms
+from util.delivery_plan import PlanEntry, write_plan
+from util.events import (
+    EVENT_DONE,
+    EVENT_FAILED,
+    EVENT_FETCHING,
+    EVENT_PUSHING,
+    EVENT_QUEUED,
+    EVENT_UNCHANGED,
+    EventStream,
+    SummaryCollector,
+)
+from util.git_refs import ls_remote, resolve_revision
+from util.manifest_filter import REVISION_CATEGORIES, iter_filter_projects_by_revision
+from util.profiling import Profiler
+from util.sharding import PartialResult, assign_shards, select_shard
+
+logger = logging.getLogger(__name__)
+
+# Sources processed in parallel when neither -j nor delivery.max_parallel is set
+DEFAULT_MAX_WORKERS = 4
+
+
+@dataclass
+class BatchConfig:
+    """One configuration of a batch run."""
+
+    name: str
+    manifest_config: ManifestConfig
+    delivery_config: DeliveryConfig
+    # Rules compiled by ConfigLoader.load(); built from the presets if unset
+    transforms: Optional[NameTransforms] = None
+    # delivery.max_parallel and delivery.max_per_host
+    max_parallel: Optional[int] = None
+    max_per_host: Optional[int] = None
+    # delivery.mirror_cache_max_bytes
+    mirror_cache_max_bytes: Optional[int] = None
+
+
+@dataclass
+class BatchOptions:
+    """Tuning of a batch run."""
+
+    # Sources processed in parallel
+    max_workers: int = 1
+    # Concurrent pushes per Gerrit host (None for no cap beyond max_workers)
+    per_host_limit: Optional[int] = None
+    # Retries of transiently failing pushes, with adaptive concurrency
+    retries: int = 0
+    # Disk budget of the mirrors, which then become scratch space deleted per project
+    workspace_max_bytes: Optional[int] = None
+    # Stream receiving per-project state change events
+    events: Optional[EventStream] = None
+    # Skip pushes the work dir's journal records as done by an interrupted run
+    resume: bool = False
+    # Skip targets whose upstream SHA matches the last delivery recorded in the work dir
+    skip_unchanged: bool = True
+    # Collector of manifest, parse, filter and per-project fetch/push spans
+    profiler: Optional[Profiler] = None
+    # Load unchanged manifests from the parsed-manifest cache in the work dir
+    manifest_cache: bool = True
+    # Disk budget of the mirror cache kept in the work dir (LRU eviction)
+    mirror_cache_max_bytes: Optional[int] = None
+
+
+def resolve_concurrency(
+    configs: Sequence[BatchConfig], jobs: Optional[int], per_host_limit: Optional[int]
+) -> Tuple[int, Optional[int]]:
+    """
+    Combine command-line and configured concurrency settings.
+
+    Command-line values win; otherwise the most conservative value of
+    the configurations applies.
+
+    Args:
+        configs: Configurations of the run
+        jobs: -j/--jobs value (None if not given)
+        per_host_limit: --max-per-host value (None if not given)
+
+    Returns:
+        Tuple of (max workers, per-host limit or None)
+    """
+    if jobs is None:
+        configured = [c.max_parallel for c in configs if c.max_parallel is not None]
+        jobs = min(configured) if configured else DEFAULT_MAX_WORKERS
+    if per_host_limit is None:
+        configured = [c.max_per_host for c in configs if c.max_per_host is not None]
+        per_host_limit = min(configured) if configured else None
+    return jobs, per_host_limit
+
+
+def resolve_mirror_cache_max_bytes(
+    configs: Sequence[BatchConfig], max_bytes: Optional[int]
+) -> Optional[int]:
+    """
+    Combine the command-line and configured mirror cache budgets.
+
+    The configurations share one cache, so without a command-line value
+    the smallest configured budget applies.
+
+    Args:
+        configs: Configurations of the run
+        max_bytes: --mirror-cache-max-bytes value (None if not given)
+
+    Returns:
+        Budget in bytes, or None for unlimited
+    """
+    if max_bytes is not None:
+        return max_bytes
+    configured = [
+        c.mirror_cache_max_bytes for c in configs if c.mirror_cache_max_bytes is not None
+    ]
+    return min(configured) if configured else None
+
+
+def resolve_remote_urls(manifest_path: Path, manifest_url: str) -> Callable[[Project], str]:
+    """
+    Build a function returning the fetch base URL of a project.
+
+    Relative remote fetch URLs (e.g. "..") are resolved against the
+    manifest repository URL, as `repo` does. Project remotes are read
+    from the manifest itself (Project doesn't carry them), keyed by
+    project path, which is unique within a manifest.
+
+    Args:
+        manifest_path: Manifest file with includes resolved
+        manifest_url: Manifest repository URL
+
+    Returns:
+        Function mapping a project to its remote fetch URL
+
+    Raises:
+        ValueError: If the manifest has no usable default remote
+    """
+    remotes: Dict[str, str] = {}
+    default_remote: Optional[str] = None
+    seen_default = False
+    project_remotes: Dict[str, str] = {}
+    # Streamed like the projects themselves; parsed elements are cleared as we go
+    for _, element in ET.iterparse(str(manifest_path)):
+        if element.tag == "remote":
+            name, fetch = element.get("name"), element.get("fetch")
+            if name and fetch:
+                remotes[name] = fetch if "://" in fetch else urljoin(manifest_url, fetch)
+        elif element.tag == "default" and not seen_default:
+            default_remote, seen_default = element.get("remote"), True
+        elif element.tag == "project":
+            name, remote = element.get("name"), element.get("remote")
+            if name and remote:
+                project_remotes[element.get("path") or name] = remote
+        element.clear()
+
+    if default_remote is None and len(remotes) == 1:
+        default_remote = next(iter(remotes))
+
+    def remote_url_of(project: Project) -> str:
+        remote = project_remotes.get(project.path, default_remote)
+        if remote not in remotes:
+            raise ValueError(f"Unknown remote for project {project.name}: {remote}")
+        return remotes[remote]
+
+    return remote_url_of
+
+
+class FetchSource(NamedTuple):
+    """Upstream repository fetched once for every target that needs it."""
+
+    remote_url: str
+    project_name: str
+
+
+class PushJob(NamedTuple):
+    """Push of one project to the target of one configuration."""
+
+    config: str
+    order: int
+    project: Project
+    # Pinned target of a plan being applied; resolved from the mirror otherwise
+    target: Optional[PushTarget] = None
+
+
+@dataclass
+class FetchPlan:
+    """Deduplicated fetches of a batch and the pushes each one feeds."""
+
+    sources: Dict[FetchSource, List[PushJob]] = field(default_factory=dict)
+    totals: Dict[str, Tuple[int, int]] = field(default_factory=dict)
+    # Manifest projects per revision category, by configuration
+    revision_counts: Dict[str, Dict[str, int]] = field(default_factory=dict)
+
+    def add(
+        self,
+        config: str,
+        projects: Sequence[Project],
+        remote_url_of: Callable[[Project], str],
+        total_projects: Optional[int] = None,
+        revision_counts: Optional[Dict[str, int]] = None,
+    ) -> None:
+        """
+        Add the deliverable projects of one configuration.
+
+        Args:
+            config: Configuration name
+            projects: Projects to deliver (after filtering)
+            remote_url_of: Function returning the remote fetch URL of a project
+            total_projects: Projects in the manifest before filtering
+            revision_counts: Projects per revision category (see util.manifest_filter)
+        """
+        if config in self.totals:
+            raise ValueError(f"Duplicate configuration name: {config}")
+        self.totals[config] = (
+            total_projects if total_projects is not None else len(projects),
+            len(projects),
+        )
+        if revision_counts is not None:
+            self.revision_counts[config] = dict(revision_counts)
+        for order, project in enumerate(projects):
+            source = FetchSource(remote_url_of(project).rstrip("/"), project.name)
+            self.sources.setdefault(source, []).append(PushJob(config, order, project))
+
+    @classmethod
+    def from_entries(cls, entries: Sequence[PlanEntry]) -> "FetchPlan":
+        """
+        Build a plan applying the pinned pushes of a delivery plan.
+
+        Entries are grouped by Gerrit URL, which takes the place of the
+        configuration name.
+
+        Args:
+            entries: Delivery plan entries
+
+        Returns:
+            Fetch plan
+        """
+        plan = cls()
+        orders: Dict[str, int] = {}
+        for entry in entries:
+            config = entry.gerrit_url
+            order = orders.get(config, 0)
+            orders[config] = order + 1
+            source = FetchSource(entry.remote_url.rstrip("/"), entry.project)
+            target = PushTarget(
+                url=entry.target_url,
+                repo=entry.target_repo,
+                branch=entry.target_branch,
+                source_sha=entry.source_sha,
+            )
+            project = Project(name=entry.project, path=entry.project, revision=entry.revision)
+            plan.sources.setdefault(source, []).append(PushJob(config, order, project, target))
+        plan.totals = {config: (count, count) for config, count in orders.items()}
+        return plan
+
+    def fingerprint(self) -> str:
+        """
+        Identity of the plan, used as the journal run key.
+
+        Covers every source and push (with pinned targets), so a resumed
+        run only reuses outcomes of the same deliveries.
+        """
+        digest = hashlib.sha1()
+        for source, jobs in self.sources.items():
+            for job in jobs:
+                target = dataclasses.astuple(job.target) if job.target is not None else ()
+                row = (*source, job.config, job.project.name, job.project.revision, *target)
+                digest.update(repr(row).encode("utf-8"))
+        return digest.hexdigest()
+
+    @property
+    def fetch_count(self) -> int:
+        """Number of upstream fetches."""
+        return len(self.sources)
+
+    @property
+    def push_count(self) -> int:
+        """Number of pushes over all configurations."""
+        return sum(len(jobs) for jobs in self.sources.values())
+
+
+_Outcome = Tuple[PushJob, Optional[PlanEntry]]
+_Sources = List[Tuple[FetchSource, List[PushJob]]]
+
+
+@dataclass
+class _SourceWork:
+    """A source travelling from the fetch stage to the push stage."""
+
+    source: FetchSource
+    jobs: List[PushJob]
+    outcomes: List[_Outcome] = field(default_factory=list)
+    mirror: Optional[Path] = None
+    # Upstream refs listed instead of fetching a mirror (dry runs)
+    refs: Optional[Dict[str, str]] = None
+    size: Optional[int] = None
+    fetch_seconds: float = 0.0
+    push_seconds: float = 0.0
+    started: float = field(default_factory=time.monotonic)
+    # Closes the mirror and releases its workspace reservation
+    cleanup: contextlib.ExitStack = field(default_factory=contextlib.ExitStack)
+
+
+class BatchDelivery:
+    """
+    Delivers a fetch plan: each source is fetched once into the mirror
+    cache and pushed to every configuration's target from that mirror.
+
+    Fetching and pushing are separate pipeline stages joined by a bounded
+    queue, so the next sources are fetched while earlier ones are pushed.
+    """
+
+    def __init__(
+        self,
+        mirror_cache: MirrorCache,
+        pushers: Dict[str, BarePusher],
+        max_workers: int = 1,
+        retry: Optional[RetryScheduler] = None,
+        workspace: Optional[Workspace] = None,
+        events: Optional[EventStream] = None,
+        per_host_limit: Optional[int] = None,
+        journal: Optional[DeliveryJournal] = None,
+        resume: bool = False,
+        state_store: Optional[DeliveryStateStore] = None,
+        profiler: Optional[Profiler] = None,
+        history: Optional[DeliveryHistory] = None,
+        delivery_configs: Optional[Dict[str, DeliveryConfig]] = None,
+    ) -> None:
+        """
+        Initialize batch delivery.
+
+        Args:
+            mirror_cache: Cache of bare upstream mirrors
+            pushers: Pusher of each configuration, by configuration name
+            max_workers: Workers of the fetch stage and of the push stage; also
+                the number of fetched sources that may wait for their pushes
+            retry: Scheduler retrying pushes that fail transiently
+            workspace: Disk budget; when set, fetches wait for space and the
+                mirror cache is held to the same budget (or its own, if lower):
+                least recently used mirrors are evicted after each push instead
+                of every mirror being deleted
+            events: Stream receiving a state change event per project; the
+                mirror size is measured for the events when set
+            per_host_limit: Maximum concurrent pushes per Gerrit host
+            journal: Journal durably recording the outcome of every push
+            resume: Skip pushes the journal records as done by an earlier run
+                of the same plan
+            state_store: Last pushed SHA per target; targets whose upstream
+                SHA hasn't moved are reported unchanged without a fetch, and
+                successful pushes are recorded (except in dry runs)
+            profiler: Collector of a fetch span per source (with the mirror
+                size) and a push span per project
+            history: Timings of previous runs; sources are scheduled
+                longest-expected-first (unseen ones estimated from their cached
+                mirror size), the predicted makespan is reported next to the
+                actual one once a run was recorded, and this run's timings are
+                saved (except in dry runs)
+            delivery_configs: Delivery configuration of each configuration;
+                when set, one remote ref snapshot per Gerrit URL is taken
+                before fetching: pushes to missing repositories fail up
+                front and targets already at the source SHA are skipped
+        """
+        self.mirror_cache = mirror_cache
+        if workspace is not None and workspace.max_bytes is not None:
+            if mirror_cache.max_bytes is None or mirror_cache.max_bytes > workspace.max_bytes:
+                mirror_cache.max_bytes = workspace.max_bytes
+        self.pushers = pushers
+        self.max_workers = max_workers
+        self.retry = retry
+        self.workspace = workspace
+        self.events = events
+        self.per_host_limit = per_host_limit
+        self.journal = journal
+        self.resume = resume
+        self.state_store = state_store
+        self.profiler = profiler
+        self.history = history
+        self.delivery_configs = delivery_configs
+        self.resolved: List[PlanEntry] = []
+
+    def run(self, plan: FetchPlan, dry_run: bool = False) -> Dict[str, PartialResult]:
+        """
+        Fetch every source and push it to all of its targets.
+
+        Args:
+            plan: Fetch plan
+            dry_run: If True, resolve targets without pushing
+
+        Returns:
+            Result of each configuration, in plan order, summarized from
+            the event stream; the resolved pushes of this run are left in
+            self.resolved
+        """
+        missing = set(plan.totals) - set(self.pushers)
+        if missing:
+            raise ValueError(f"No pusher for configurations: {sorted(missing)}")
+
+        collector = SummaryCollector()
+        events = EventStream([collector] + (self.events.listeners if self.events else []))
+        journal = self.journal
+        sources = list(plan.sources.items())
+        if journal is not None:
+            state = journal.start(plan.fingerprint(), resume=self.resume)
+            # Pushes delivered before the interruption count as done without a refetch
+            sources = []
+            for source, jobs in plan.sources.items():
+                done, todo = state.partition(jobs, name_of=_journal_name)
+                for job in done:
+                    events.emit(EVENT_DONE, job.project.name, config=job.config, index=job.order)
+                if todo:
+                    sources.append((source, todo))
+        for _, jobs in sources:
+            for job in jobs:
+                events.emit(EVENT_QUEUED, job.project.name, config=job.config, index=job.order)
+
+        def failed(job: PushJob, error: Exception, started: float) -> None:
+            events.emit(
+                EVENT_FAILED,
+                job.project.name,
+                config=job.config,
+                index=job.order,
+                duration=round(time.monotonic() - started, 3),
+                error_class=classify_error(error),
+                error=str(error),
+            )
+            if journal is not None:
+                journal.record(_journal_name(job), OUTCOME_FAILED, str(error))
+
+        def state_key(job: PushJob) -> StateKey:
+            pusher = self.pushers[job.config]
+            if job.target is not None:
+                return StateKey(pusher.gerrit_url, job.target.repo, job.target.branch)
+            return StateKey(pusher.gerrit_url, *pusher.target_names(job.project))
+
+        snapshots = self._take_snapshots(sources, state_key)
+
+        def up_to_date(job: PushJob, target: PushTarget) -> bool:
+            snapshot = snapshots.get(self.pushers[job.config].gerrit_url)
+            if snapshot is None:
+                return False
+            status = snapshot.classify(target.repo, target.branch, target.source_sha)
+            return status == STATUS_UP_TO_DATE
+
+        def skipped_up_to_date(job: PushJob, target: PushTarget) -> None:
+            logger.info(f"[{job.config}] {target.repo}:{target.branch} is already up to date")
+            events.emit(EVENT_UNCHANGED, job.project.name, config=job.config, index=job.order)
+            if self.state_store is not None and not dry_run:
+                self.state_store.record(state_key(job), target.source_sha)
+            if journal is not None:
+                journal.record(_journal_name(job), OUTCOME_SKIPPED, "up to date")
+
+        if snapshots:
+            # Pushes to repositories that don't exist would fail: skip their fetches
+            sources, missing = _split_missing(sources, snapshots, state_key)
+            for url, snapshot in snapshots.items():
+                repos = snapshot.missing_repos(
+                    state_key(job).repo
+                    for job in missing
+                    if self.pushers[job.config].gerrit_url == url
+                )
+                if repos:
+                    logger.error(f"Target repositories missing on {url}: {', '.join(repos)}")
+            for job in missing:
+                error = RuntimeError(f"Target repository {state_key(job).repo} not found")
+                failed(job, error, time.monotonic())
+            pinned = [
+                (job, job.target) for _, jobs in sources for job in jobs if job.target is not None
+            ]
+            current = [job for job, target in pinned if up_to_date(job, target)]
+            if current:
+                sources = _drop_jobs(sources, current)
+                for job in current:
+                    skipped_up_to_date(job, job.target)
+
+        predicted: Optional[float] = None
+        if self.history is not None:
+
+            def name_of(item: Tuple[FetchSource, List[PushJob]]) -> str:
+                return item[0].project_name
+
+            def size_of(item: Tuple[FetchSource, List[PushJob]]) -> Optional[int]:
+                # Estimates unseen projects whose mirror is already cached
+                path = self.mirror_cache.path_for(item[0].remote_url, item[0].project_name)
+                return self.mirror_cache.size_of(path) if path.exists() else None
+
+            sources = self.history.schedule(sources, name_of, size_of)
+            if self.history.timings:
+                # Without any recorded run the prediction would only be a guess
+                predicted = self.history.predict_makespan(
+                    sources, self.max_workers, name_of, size_of
+                )
+        limiter = HostLimiter(self.per_host_limit)
+
+        def drop_unchanged(source: FetchSource, jobs: List[PushJob]) -> List[PushJob]:
+            store = self.state_store
+            if store is None:
+                return jobs
+            keys = [state_key(job) for job in jobs]
+            if not store.get_many(keys):
+                # Never delivered: skip the upstream query
+                return jobs
+            revisions = sorted({job.project.revision or "" for job in jobs if job.target is None})
+            refs: Dict[str, str] = {}
+            if revisions:
+                try:
+                    url = MirrorCache.remote_project_url(source.remote_url, source.project_name)
+                    refs = ls_remote(url, [r for r in revisions if r])
+                except Exception as e:
+                    logger.warning(f"Cannot query upstream heads of {source.project_name}: {e}")
+                    return jobs
+            shas = [
+                job.target.source_sha
+                if job.target is not None
+                else resolve_revision(refs, job.project.revision or "") or ""
+                for job in jobs
+            ]
+            _, unchanged_keys = store.split_unchanged(zip(keys, shas))
+            unchanged = set(unchanged_keys)
+            todo: List[PushJob] = []
+            for job, key in zip(jobs, keys):
+                if key not in unchanged:
+                    todo.append(job)
+                    continue
+                events.emit(EVENT_UNCHANGED, job.project.name, config=job.config, index=job.order)
+                if journal is not None:
+                    journal.record(_journal_name(job), OUTCOME_SKIPPED, "unchanged")
+            return todo
+
+        def push(pusher: BarePusher, mirror: Optional[Path], target: PushTarget) -> PushTarget:
+            # One source may feed several Gerrit hosts, so the cap applies per push
+            with limiter.slot(gerrit_host(pusher.gerrit_url)):
+                return pusher.push_target(mirror, target, dry_run=dry_run)
+
+        def fetch_stage(item: Tuple[FetchSource, List[PushJob]]) -> _SourceWork:
+            source, jobs = item
+            work = _SourceWork(source, drop_unchanged(source, jobs))
+            if not work.jobs:
+                return work
+            for job in work.jobs:
+                events.emit(EVENT_FETCHING, job.project.name, config=job.config, index=job.order)
+            if dry_run:
+                # Nothing is pushed, so source SHAs come from ls-remote, not a mirror clone
+                list_started = time.monotonic()
+                try:
+                    work.refs = _upstream_refs(source, work.jobs)
+                except Exception as e:
+                    logger.error(f"Failed to list {source.project_name}: {e}")
+                    for job in work.jobs:
+                        failed(job, e, work.started)
+                        work.outcomes.append((job, None))
+                    return work
+                work.fetch_seconds = time.monotonic() - list_started
+                if self.profiler is not None:
+                    self.profiler.record("fetch", work.fetch_seconds, source.project_name)
+                return work
+            try:
+                reservation: Optional[Reservation] = None
+                if self.workspace is not None:
+                    estimate = (
+                        self.history.expected_bytes(source.project_name) if self.history else 0
+                    )
+                    reservation = work.cleanup.enter_context(
+                        self.workspace.reserve(source.project_name, estimate)
+                    )
+                    # Runs once the pushed mirror is unlocked, before its space is released
+                    work.cleanup.callback(self.mirror_cache.evict)
+                fetch_started = time.monotonic()
+                # The mirror stays open (locked against eviction) until pushed
+                work.mirror = work.cleanup.enter_context(
+                    self.mirror_cache.open_mirror(source.remote_url, source.project_name)
+                )
+                work.fetch_seconds = time.monotonic() - fetch_started
+                # Measured by the cache when it updated the mirror
+                work.size = self.mirror_cache.size_of(work.mirror)
+                if reservation is not None:
+                    reservation.resize(work.size)
+                if self.profiler is not None:
+                    self.profiler.record(
+                        "fetch", work.fetch_seconds, source.project_name, work.size
+                    )
+            except Exception as e:
+                logger.error(f"Failed to fetch {source.project_name}: {e}")
+                work.mirror = None
+                work.cleanup.close()
+                for job in work.jobs:
+                    failed(job, e, work.started)
+                    work.outcomes.append((job, None))
+            return work
+
+        def push_stage(work: _SourceWork) -> _SourceWork:
+            if work.mirror is None and work.refs is None:
+                return work
+            try:
+                push_jobs(work, work.mirror)
+            finally:
+                work.cleanup.close()
+            if self.history is not None and not dry_run:
+                if all(entry is not None for _, entry in work.outcomes):
+                    self.history.record(
+                        work.source.project_name, work.fetch_seconds, work.push_seconds, work.size
+                    )
+            return work
+
+        def push_jobs(work: _SourceWork, mirror: Optional[Path]) -> None:
+            for job in work.jobs:
+                pusher = self.pushers[job.config]
+                try:
+                    if job.target is not None:
+                        target = pusher.retarget(job.target)
+                    elif work.refs is not None:
+                        target = pusher.target_for(
+                            job.project, _listed_sha(work.refs, work.source, job.project)
+                        )
+                    else:
+                        target = pusher.resolve(mirror, job.project)
+                except Exception as e:
+                    logger.error(f"[{job.config}] Failed to resolve {job.project.name}: {e}")
+                    failed(job, e, work.started)
+                    work.outcomes.append((job, None))
+                    continue
+                entry = PlanEntry(
+                    project=job.project.name,
+                    remote_url=work.source.remote_url,
+                    revision=job.project.revision or "",
+                    source_sha=target.source_sha,
+                    gerrit_url=pusher.gerrit_url,
+                    target_repo=target.repo,
+                    target_branch=target.branch,
+                )
+                if up_to_date(job, target):
+                    skipped_up_to_date(job, target)
+                    work.outcomes.append((job, entry))
+                    continue
+
+                events.emit(EVENT_PUSHING, job.project.name, config=job.config, index=job.order)
+                push_started = time.monotonic()
+                try:
+                    if self.retry is not None and not dry_run:
+                        self.retry.call(pusher.gerrit_url, lambda: push(pusher, mirror, target))
+                    else:
+                        push(pusher, mirror, target)
+                except Exception as e:
+                    logger.error(f"[{job.config}] Failed to push {job.project.name}: {e}")
+                    failed(job, e, work.started)
+                    work.outcomes.append((job, None))
+                    continue
+                finally:
+                    seconds = time.monotonic() - push_started
+                    work.push_seconds += seconds
+                    if self.profiler is not None:
+                        self.profiler.record("push", seconds, job.project.name)
+                events.emit(
+                    EVENT_DONE,
+                    job.project.name,
+                    config=job.config,
+                    index=job.order,
+                    duration=round(time.monotonic() - work.started, 3),
+                    bytes=work.size,
+                )
+                if self.state_store is not None and not dry_run:
+                    self.state_store.record(state_key(job), target.source_sha)
+                if journal is not None:
+                    journal.record(_journal_name(job), OUTCOME_SUCCESS)
+                work.outcomes.append((job, entry))
+
+        # Fetch and push overlap; the queue between them caps how many
+        # fetched mirrors wait (open and locked) for their pushes
+        pipeline = Pipeline(
+            [
+                Stage("fetch", fetch_stage, workers=self.max_workers),
+                Stage("push", push_stage, workers=self.max_workers),
+            ],
+            queue_size=self.max_workers,
+        )
+        pushed: Dict[str, Dict[int, _Outcome]] = {config: {} for config in plan.totals}
+        run_started = time.monotonic()
+        delivered = pipeline.run(sources)
+        makespan = round(time.monotonic() - run_started, 3)
+        if self.history is not None and not dry_run:
+            self.history.save()
+        if delivered.failures:
+            failure = delivered.failures[0]
+            raise RuntimeError(f"Batch delivery {failure.stage} stage failed: {failure.error}")
+        for _, work in delivered.outputs:
+            for job, entry in work.outcomes:
+                pushed[job.config][job.order] = (job, entry)
+
+        self.resolved = []
+        results: Dict[str, PartialResult] = {}
+        for config, (total, filtered) in plan.totals.items():
+            rows = [pushed[config][order] for order in sorted(pushed[config])]
+            self.resolved.extend(entry for _, entry in rows if entry is not None)
+            result = collector.result(config, total, filtered)
+            result.peak_workspace_bytes = self.workspace.peak_bytes if self.workspace else None
+            result.revision_counts = dict(plan.revision_counts.get(config, {}))
+            if self.history is not None:
+                result.makespan_seconds = makespan
+            if predicted is not None:
+                result.predicted_makespan_seconds = round(predicted, 3)
+            results[config] = result
+        return results
+
+    def _take_snapshots(
+        self, sources: _Sources, target_of: Callable[[PushJob], StateKey]
+    ) -> Dict[str, RemoteRefSnapshot]:
+        if not self.delivery_configs:
+            return {}
+        wanted: Dict[str, Tuple[DeliveryConfig, Set[str], Set[str]]] = {}
+        for _, jobs in sources:
+            for job in jobs:
+                delivery_config = self.delivery_configs.get(job.config)
+                if delivery_config is None:
+                    continue
+                key = target_of(job)
+                _, repos, branches = wanted.setdefault(
+                    key.gerrit_url, (delivery_config, set(), set())
+                )
+                repos.add(key.repo)
+                if not key.branch.startswith("refs/"):
+                    branches.add(key.branch)
+
+        snapshots: Dict[str, RemoteRefSnapshot] = {}
+        for url, (delivery_config, repos, branches) in wanted.items():
+            try:
+                snapshots[url] = RemoteRefSnapshot.from_delivery_config(
+                    delivery_config, branches, repos
+                )
+            except Exception as e:
+                logger.warning(f"Cannot take a ref snapshot of {url}, pushing without it: {e}")
+        return snapshots
+
+
+def _upstream_refs(source: FetchSource, jobs: List[PushJob]) -> Dict[str, str]:
+    revisions = sorted({job.project.revision or "" for job in jobs if job.target is None})
+    patterns = [revision for revision in revisions if revision]
+    if not patterns:
+        return {}
+    url = MirrorCache.remote_project_url(source.remote_url, source.project_name)
+    return ls_remote(url, patterns)
+
+
+def _listed_sha(refs: Dict[str, str], source: FetchSource, project: Project) -> str:
+    sha = resolve_revision(refs, project.revision or "")
+    if sha is None:
+        raise RuntimeError(f"Revision {project.revision} not found in {source.project_name}")
+    return sha
+
+
+def _split_missing(
+    sources: _Sources,
+    snapshots: Dict[str, RemoteRefSnapshot],
+    target_of: Callable[[PushJob], StateKey],
+) -> Tuple[_Sources, List[PushJob]]:
+    kept: _Sources = []
+    missing: List[PushJob] = []
+    for source, jobs in sources:
+        todo: List[PushJob] = []
+        for job in jobs:
+            key = target_of(job)
+            snapshot = snapshots.get(key.gerrit_url)
+            if snapshot is not None and not snapshot.has_repo(key.repo):
+                missing.append(job)
+            else:
+                todo.append(job)
+        if todo:
+            kept.append((source, todo))
+    return kept, missing
+
+
+def _drop_jobs(sources: _Sources, dropped: Sequence[PushJob]) -> _Sources:
+    ids = {id(job) for job in dropped}
+    kept: _Sources = []
+    for source, jobs in sources:
+        todo = [job for job in jobs if id(job) not in ids]
+        if todo:
+            kept.append((source, todo))
+    return kept
+
+
+def _journal_name(job: PushJob) -> str:
+    return f"{job.config}:{job.project.name}"
+
+
+def _manifest_key(manifest_config: ManifestConfig) -> str:
+    ref = manifest_config.tag or manifest_config.branch or "HEAD"
+    return hashlib.sha1(f"{manifest_config.repo_url}\0{ref}".encode("utf-8")).hexdigest()[:12]
+
+
+def iter_manifest_projects(
+    manifest_path: Path, manifest_config: ManifestConfig
+) -> Iterator[Project]:
+    """
+    Stream the projects of a manifest, applying the configured default revision.
+
+    Args:
+        manifest_path: Manifest file
+        manifest_config: Manifest configuration
+
+    Yields:
+        Projects in manifest order
+    """
+    default_revision = manifest_config.default_revision
+    for project in StreamingManifestParser(manifest_path).iter_projects():
+        if default_revision and not project.revision:
+            project = dataclasses.replace(project, revision=default_revision)
+        yield project
+
+
+def parse_manifest_projects(
+    manifest_path: Path, manifest_config: ManifestConfig
+) -> List[Project]:
+    """
+    Parse a manifest, applying the configured default revision.
+
+    Args:
+        manifest_path: Manifest file
+        manifest_config: Manifest configuration
+
+    Returns:
+        Projects in manifest order
+    """
+    return list(iter_manifest_projects(manifest_path, manifest_config))
+
+
+class LoadedManifest(NamedTuple):
+    """Parsed manifest of a configuration."""
+
+    # A list when cached; streamed from the manifest file (single pass) otherwise
+    projects: Iterable[Project]
+    remote_url_of: Callable[[Project], str]
+    # Resolved manifest file (fetched, or the copy kept by the manifest cache)
+    path: Path
+
+
+def _cached_remote_urls(remote_urls: Dict[str, str]) -> Callable[[Project], str]:
+    def remote_url_of(project: Project) -> str:
+        if project.path not in remote_urls:
+            raise ValueError(f"Unknown remote for project {project.name}")
+        return remote_urls[project.path]
+
+    return remote_url_of
+
+
+def load_manifest(
+    manifest_config: ManifestConfig,
+    work_dir: Path,
+    manifest_cache: Optional[ManifestCache] = None,
+    profiler: Optional[Profiler] = None,
+) -> LoadedManifest:
+    """
+    Fetch and parse a manifest, or load it from the manifest cache.
+
+    With a cache, the manifest ref is resolved with one ls-remote; a
+    known commit skips both the fetch and the parse, and a new one is
+    stored after parsing. Without one, the projects are streamed from the
+    manifest file as they are consumed, so parsing overlaps filtering.
+
+    Args:
+        manifest_config: Manifest configuration
+        work_dir: Working directory
+        manifest_cache: Cache of parsed manifests by commit SHA
+        profiler: Collector of "manifest" (fetch or cache lookup) and "parse" spans
+
+    Returns:
+        Projects (default revision applied), their remote URLs and the manifest file
+    """
+    profiler = profiler or Profiler()
+    projects: Iterable[Project]
+    key: Optional[str] = None
+    with profiler.span("manifest"):
+        if manifest_cache is not None:
+            try:
+                sha = manifest_cache.resolve_sha(manifest_config)
+            except RuntimeError as e:
+                logger.warning(f"Manifest cache bypassed: {e}")
+                sha = None
+            if sha:
+                key = manifest_cache.key(manifest_config, sha)
+                cached = manifest_cache.load_manifest(key)
+                if cached is not None and cached.manifest_path is not None:
+                    logger.info(f"Using cached manifest {sha[:12]}")
+                    return LoadedManifest(
+                        cached.projects,
+                        _cached_remote_urls(cached.remote_urls),
+                        cached.manifest_path,
+                    )
+        manifest_dir = work_dir / "manifests" / _manifest_key(manifest_config)
+        manifest_path = fetch_manifest(
+            manifest_config,
+            manifest_dir,
+            fallback=RepoInitFetcher(manifest_config, manifest_dir).fetch,
+        )
+
+    with profiler.span("parse"):
+        remote_url_of = resolve_remote_urls(manifest_path, manifest_config.repo_url)
+        projects = iter_manifest_projects(manifest_path, manifest_config)
+        if manifest_cache is not None and key is not None:
+            projects = list(projects)
+
+    if manifest_cache is not None and key is not None:
+        remote_urls: Dict[str, str] = {}
+        for project in projects:
+            try:
+                remote_urls[project.path] = remote_url_of(project)
+            except ValueError:
+                # Stays unknown on a cache hit too, failing only if the project is delivered
+                pass
+        manifest_cache.store(key, projects, remote_urls, manifest_path)
+    return LoadedManifest(projects, remote_url_of, manifest_path)
+
+
+def shard_weights(work_dir: Path) -> Optional[Callable[[str], float]]:
+    """
+    Weight of each project name for balanced shards.
+
+    Args:
+        work_dir: Working directory holding the delivery history
+
+    Returns:
+        Expected seconds per project from the history, or None (stable hash
+        assignment) if no run was recorded yet
+    """
+    history = DeliveryHistory.for_work_dir(work_dir)
+    return history.expected_seconds if history.timings else None
+
+
+class _FilteredManifest(NamedTuple):
+    projects: ProjectTableView
+    remote_url_of: Callable[[Project], str]
+    counts: Dict[str, int]
+
+
+def build_fetch_plan(
+    configs: Sequence[BatchConfig],
+    work_dir: Path,
+    shard: Optional[Tuple[int, int]] = None,
+    profiler: Optional[Profiler] = None,
+    manifest_cache: Optional[ManifestCache] = None,
+) -> FetchPlan:
+    """
+    Fetch and parse the manifests of a batch and build its fetch plan.
+
+    Configurations pointing at the same manifest repository, ref and
+    default revision share one manifest fetch. The deliverable projects of
+    a manifest are kept in a ProjectTable, and shards are views over it.
+
+    Args:
+        configs: Batch configurations
+        work_dir: Working directory
+        shard: Deliver only shard K of N, balanced by the expected durations of
+            the work dir's delivery history (stable hash of the project name
+            without one); the manifest totals stay whole so shard results merge
+        profiler: Collector of "manifest" (fetch), "parse" and "filter" spans
+        manifest_cache: Cache of parsed manifests consulted before fetching
+
+    Returns:
+        Fetch plan covering the union of deliverable projects
+    """
+    profiler = profiler or Profiler()
+    weight_of = shard_weights(work_dir) if shard is not None else None
+    plan = FetchPlan()
+    filtered_manifests: Dict[Tuple[str, Optional[str]], _FilteredManifest] = {}
+    for config in configs:
+        manifest_config = config.manifest_config
+        key = (_manifest_key(manifest_config), manifest_config.default_revision)
+        if key not in filtered_manifests:
+            projects, remote_url_of, _ = load_manifest(
+                manifest_config, work_dir, manifest_cache, profiler
+            )
+            with profiler.span("filter"):
+                # Parsing streams through the filter; only kept rows are stored
+                counts = {category: 0 for category in REVISION_CATEGORIES}
+                table = ProjectTable.from_projects(
+                    iter_filter_projects_by_revision(projects, counts)
+                )
+                kept = table.view()
+                if shard is not None:
+                    assignment = assign_shards(
+                        (record.name for record in kept), shard[1], weight_of
+                    )
+                    kept = kept.filter(lambda record: assignment[record.name] == shard[0])
+            filtered_manifests[key] = _FilteredManifest(kept, remote_url_of, counts)
+        filtered = filtered_manifests[key]
+
+        plan.add(
+            config.name,
+            filtered.projects.to_projects(),
+            filtered.remote_url_of,
+            total_projects=sum(filtered.counts.values()),
+            revision_counts=filtered.counts,
+        )
+
+    logger.info(
+        f"Batch plan: {len(configs)} configuration(s), {plan.fetch_count} fetch(es), "
+        f"{plan.push_count} push(es)"
+    )
+    return plan
+
+
+def _create_pushers(
+    stack: contextlib.ExitStack,
+    delivery_configs: Dict[str, DeliveryConfig],
+    dry_run: bool,
+    transforms: Optional[Dict[str, Optional[NameTransforms]]] = None,
+) -> Dict[str, BarePusher]:
+    pushers: Dict[str, BarePusher] = {}
+    # Configurations on the same host share its session: one SSH master per host
+    sessions: Dict[Tuple[Optional[str], ...], Dict[str, str]] = {}
+    for name, delivery_config in delivery_configs.items():
+        git_env: Dict[str, str] = {}
+        if not dry_run:
+            key = session_key(delivery_config)
+            if key not in sessions:
+                sessions[key] = stack.enter_context(create_transport(delivery_config)).git_env()
+            git_env = sessions[key]
+        push_url = delivery_config.gerrit_url
+        if delivery_config.auth_method != "http":
+            push_url = ssh_push_url(push_url)
+        names = (transforms or {}).get(name) or NameTransforms.from_config(
+            branch_transform=delivery_config.branch_transform,
+            repo_alias=delivery_config.repo_alias,
+        )
+        pushers[name] = BarePusher(
+            delivery_config.gerrit_url, names.branch, names.repo, git_env, push_url
+        )
+    return pushers
+
+
+def _batch_delivery(
+    stack: contextlib.ExitStack,
+    work_dir: Path,
+    pushers: Dict[str, BarePusher],
+    options: BatchOptions,
+    dry_run: bool,
+    delivery_configs: Optional[Dict[str, DeliveryConfig]] = None,
+) -> BatchDelivery:
+    mirrors_dir = work_dir / "mirrors"
+    retry = None
+    if options.retries > 0:
+        retry = RetryScheduler(
+            options.per_host_limit or options.max_workers,
+            BackoffPolicy(max_attempts=options.retries + 1),
+        )
+    workspace = None
+    if options.workspace_max_bytes is not None:
+        workspace = Workspace(mirrors_dir, options.workspace_max_bytes)
+    # A dry run delivers nothing, so it neither records nor consumes outcomes
+    journal = None
+    if not dry_run:
+        journal = stack.enter_context(DeliveryJournal.for_work_dir(work_dir))
+    state_store = None
+    if options.skip_unchanged:
+        state_store = stack.enter_context(DeliveryStateStore(work_dir))
+    history = DeliveryHistory.for_work_dir(work_dir)
+    return BatchDelivery(
+        MirrorCache(mirrors_dir, options.mirror_cache_max_bytes),
+        pushers,
+        options.max_workers,
+        retry,
+        workspace,
+        options.events,
+        options.per_host_limit,
+        journal,
+        options.resume,
+        state_store,
+        options.profiler,
+        history,
+        delivery_configs,
+    )
+
+
+def run_plan(
+    configs: Sequence[BatchConfig],
+    plan: FetchPlan,
+    work_dir: Path,
+    dry_run: bool = False,
+    plan_path: Optional[Path] = None,
+    options: Optional[BatchOptions] = None,
+) -> Dict[str, PartialResult]:
+    """
+    Deliver a fetch plan with each configuration's transformers and transport.
+
+    Args:
+        configs: Configurations of the plan
+        plan: Fetch plan
+        work_dir: Working directory holding the mirror cache
+        dry_run: If True, resolve targets without pushing
+        plan_path: Write the resolved pushes as a delivery plan to this path
+        options: Concurrency, retry, disk budget, event and resume settings
+
+    Returns:
+        Result of each configuration
+    """
+    delivery_configs = {config.name: config.delivery_config for config in configs}
+    with contextlib.ExitStack() as stack:
+        pushers = _create_pushers(
+            stack,
+            delivery_configs,
+            dry_run,
+            {config.name: config.transforms for config in configs},
+        )
+        delivery = _batch_delivery(
+            stack, work_dir, pushers, options or BatchOptions(), dry_run, delivery_configs
+        )
+        results = delivery.run(plan, dry_run=dry_run)
+
+    if plan_path is not None:
+        count = write_plan(plan_path, delivery.resolved)
+        logger.info(f"Delivery plan with {count} push(es) written to {plan_path}")
+    return results
+
+
+def apply_plan(
+    entries: Sequence[PlanEntry],
+    delivery_configs: Sequence[DeliveryConfig],
+    work_dir: Path,
+    dry_run: bool = False,
+    options: Optional[BatchOptions] = None,
+    shard: Optional[Tuple[int, int]] = None,
+) -> Dict[str, PartialResult]:
+    """
+    Push exactly the commits recorded in a delivery plan.
+
+    No manifest is fetched or parsed; each source is fetched into the
+    mirror cache and its pinned SHA pushed to the recorded target.
+
+    Args:
+        entries: Delivery plan entries
+        delivery_configs: Configurations providing credentials, matched by Gerrit URL
+        work_dir: Working directory holding the mirror cache
+        dry_run: If True, only log the pushes
+        options: Concurrency, retry, disk budget, event and resume settings
+        shard: Apply only the entries of shard K of N, balanced as in build_fetch_plan
+
+    Returns:
+        Result per Gerrit URL
+
+    Raises:
+        ValueError: If no configuration matches a Gerrit URL of the plan
+    """
+    by_url = {config.gerrit_url.rstrip("/"): config for config in delivery_configs}
+    if shard is not None:
+        entries = select_shard(
+            entries,
+            *shard,
+            name_of=lambda entry: entry.project,
+            weight_of=shard_weights(work_dir),
+        )
+    plan = FetchPlan.from_entries(entries)
+    missing = sorted(url for url in plan.totals if url.rstrip("/") not in by_url)
+    if missing:
+        raise ValueError(f"No configuration for Gerrit URLs of the plan: {missing}")
+
+    delivery_configs = {url: by_url[url.rstrip("/")] for url in plan.totals}
+    with contextlib.ExitStack() as stack:
+        pushers = _create_pushers(stack, delivery_configs, dry_run)
+        delivery = _batch_delivery(
+            stack, work_dir, pushers, options or BatchOptions(), dry_run, delivery_configs
+        )
+        return delivery.run(plan, dry_run=dry_run)
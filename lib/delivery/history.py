@@ -0,0 +1,244 @@
+"""
+Per-project delivery history for longest-expected-first scheduling.
+"""
+import heapq
+import json
+import logging
+import os
+import statistics
+import threading
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, TypeVar
+
+logger = logging.getLogger(__name__)
+
+HISTORY_FILE_NAME = "delivery_history.json"
+
+# Expected duration of a project when nothing is known at all
+DEFAULT_EXPECTED_SECONDS = 1.0
+
+P = TypeVar("P")
+
+
+@dataclass
+class ProjectTiming:
+    """Smoothed timings of one project over previous runs."""
+
+    fetch_seconds: float = 0.0
+    push_seconds: float = 0.0
+    bytes: int = 0
+    runs: int = 0
+
+    @property
+    def total_seconds(self) -> float:
+        """Expected fetch + push duration."""
+        return self.fetch_seconds + self.push_seconds
+
+
+def simulate_makespan(durations: Iterable[float], workers: int) -> float:
+    """
+    Makespan of running durations in the given order on a worker pool.
+
+    Each task goes to the worker that becomes free first.
+
+    Args:
+        durations: Task durations in scheduling order
+        workers: Number of workers
+
+    Returns:
+        Time until the last task finishes
+    """
+    if workers < 1:
+        raise ValueError("workers must be at least 1")
+    finish_times = [0.0] * workers
+    for duration in durations:
+        earliest = heapq.heappop(finish_times)
+        heapq.heappush(finish_times, earliest + duration)
+    return max(finish_times)
+
+
+class DeliveryHistory:
+    """
+    Fetch/push durations and transferred bytes from previous runs.
+
+    Used to schedule the longest expected projects first so a few huge
+    repositories don't end up alone at the tail of a run. Projects that
+    were never seen are estimated from their size (using the observed
+    seconds-per-byte rate) or, without a size, from the median duration.
+    """
+
+    def __init__(self, path: Path, smoothing: float = 0.5) -> None:
+        """
+        Initialize history, loading previous runs from path if it exists.
+
+        An unreadable history file is ignored with a warning (and replaced
+        on the next save), so it never fails a delivery.
+
+        Args:
+            path: History file path
+            smoothing: Weight of the newest sample in the moving average (0-1]
+        """
+        if not 0.0 < smoothing <= 1.0:
+            raise ValueError("smoothing must be in (0, 1]")
+        self.path = path
+        self.smoothing = smoothing
+        self.timings: Dict[str, ProjectTiming] = {}
+        self._lock = threading.Lock()
+
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+            self.timings = {
+                name: ProjectTiming(**values) for name, values in data.get("projects", {}).items()
+            }
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning(f"Ignoring unreadable delivery history {path.name}: {e}")
+            self.timings = {}
+
+    @classmethod
+    def for_work_dir(cls, work_dir: Path) -> "DeliveryHistory":
+        """Open the history file kept in a work dir."""
+        return cls(work_dir / HISTORY_FILE_NAME)
+
+    def record(
+        self,
+        name: str,
+        fetch_seconds: float,
+        push_seconds: float,
+        transferred_bytes: Optional[int] = None,
+    ) -> None:
+        """
+        Record the timings of one delivered project.
+
+        Args:
+            name: Project name
+            fetch_seconds: Fetch duration
+            push_seconds: Push duration
+            transferred_bytes: Bytes fetched, if known
+        """
+        with self._lock:
+            timing = self.timings.get(name)
+            if timing is None:
+                self.timings[name] = ProjectTiming(
+                    fetch_seconds, push_seconds, transferred_bytes or 0, 1
+                )
+                return
+
+            a = self.smoothing
+            timing.fetch_seconds = a * fetch_seconds + (1 - a) * timing.fetch_seconds
+            timing.push_seconds = a * push_seconds + (1 - a) * timing.push_seconds
+            if transferred_bytes is not None:
+                timing.bytes = transferred_bytes
+            timing.runs += 1
+
+    def save(self) -> None:
+        """Write the history file atomically."""
+        with self._lock:
+            data = {"projects": {name: asdict(t) for name, t in sorted(self.timings.items())}}
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_name(self.path.name + ".tmp")
+        tmp_path.write_text(json.dumps(data, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, self.path)
+
+    def _seconds_per_byte(self) -> Optional[float]:
+        known = [t for t in self.timings.values() if t.bytes > 0]
+        total_bytes = sum(t.bytes for t in known)
+        if not total_bytes:
+            return None
+        return sum(t.total_seconds for t in known) / total_bytes
+
+    def expected_seconds(self, name: str, size_hint: Optional[int] = None) -> float:
+        """
+        Expected fetch + push duration of a project.
+
+        Args:
+            name: Project name
+            size_hint: Approximate repository size in bytes, for unseen projects
+
+        Returns:
+            Expected duration in seconds
+        """
+        timing = self.timings.get(name)
+        if timing is not None:
+            return timing.total_seconds
+
+        if size_hint:
+            rate = self._seconds_per_byte()
+            if rate is not None:
+                return size_hint * rate
+
+        if self.timings:
+            return statistics.median(t.total_seconds for t in self.timings.values())
+        return DEFAULT_EXPECTED_SECONDS
+
+    def expected_bytes(self, name: str) -> int:
+        """
+        Expected disk usage of a project, for workspace reservations.
+
+        Args:
+            name: Project name
+
+        Returns:
+            Bytes of the last run; the median of known projects for unseen
+            ones, or 0 if no sizes were recorded
+        """
+        timing = self.timings.get(name)
+        if timing is not None and timing.bytes > 0:
+            return timing.bytes
+        known = [t.bytes for t in self.timings.values() if t.bytes > 0]
+        return int(statistics.median(known)) if known else 0
+
+    def schedule(
+        self,
+        items: Sequence[P],
+        name_of: Callable[[P], str] = lambda item: getattr(item, "name"),
+        size_of: Optional[Callable[[P], Optional[int]]] = None,
+    ) -> List[P]:
+        """
+        Order items longest-expected-first.
+
+        Ties keep their original (manifest) order.
+
+        Args:
+            items: Items to schedule (e.g. projects)
+            name_of: Function returning the project name of an item
+            size_of: Function returning a size hint for an item
+
+        Returns:
+            Items in scheduling order
+        """
+        expected = [
+            self.expected_seconds(name_of(item), size_of(item) if size_of else None)
+            for item in items
+        ]
+        order = sorted(range(len(items)), key=lambda i: -expected[i])
+        return [items[i] for i in order]
+
+    def predict_makespan(
+        self,
+        items: Sequence[P],
+        workers: int,
+        name_of: Callable[[P], str] = lambda item: getattr(item, "name"),
+        size_of: Optional[Callable[[P], Optional[int]]] = None,
+    ) -> float:
+        """
+        Predict the run time of delivering items in the given order.
+
+        Args:
+            items: Items in scheduling order
+            workers: Number of workers
+            name_of: Function returning the project name of an item
+            size_of: Function returning a size hint for an item
+
+        Returns:
+            Predicted makespan in seconds
+        """
+        return simulate_makespan(
+            (
+                self.expected_seconds(name_of(item), size_of(item) if size_of else None)
+                for item in items
+            ),
+            workers,
+        )
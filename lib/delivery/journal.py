@@ -0,0 +1,243 @@
+"""
+Append-only journal of per-project delivery outcomes for resumable runs.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import IO, Callable, Dict, List, Optional, Sequence, Tuple, TypeVar
+
+logger = logging.getLogger(__name__)
+
+JOURNAL_FILE_NAME = "delivery_journal.jsonl"
+
+OUTCOME_SUCCESS = "success"
+OUTCOME_FAILED = "failed"
+OUTCOME_SKIPPED = "skipped"
+OUTCOMES = (OUTCOME_SUCCESS, OUTCOME_FAILED, OUTCOME_SKIPPED)
+
+# Outcomes that don't need to be delivered again on resume
+DONE_OUTCOMES = frozenset({OUTCOME_SUCCESS, OUTCOME_SKIPPED})
+
+P = TypeVar("P")
+
+
+@dataclass
+class JournalSummary:
+    """Outcome of every project of a run, in manifest order."""
+
+    successful: List[str] = field(default_factory=list)
+    failed: List[str] = field(default_factory=list)
+    skipped: List[str] = field(default_factory=list)
+    pending: List[str] = field(default_factory=list)
+
+
+@dataclass
+class JournalState:
+    """Replayed content of a journal."""
+
+    run_key: Optional[str] = None
+    outcomes: Dict[str, str] = field(default_factory=dict)
+
+    def is_done(self, name: str) -> bool:
+        """Whether a project was delivered (or skipped) already."""
+        return self.outcomes.get(name) in DONE_OUTCOMES
+
+    def partition(
+        self, items: Sequence[P], name_of: Callable[[P], str] = lambda item: getattr(item, "name")
+    ) -> Tuple[List[P], List[P]]:
+        """
+        Split items into already done and still to deliver.
+
+        Failed and never attempted projects are both delivered again.
+
+        Args:
+            items: Items of the run (e.g. filtered projects)
+            name_of: Function returning the project name of an item
+
+        Returns:
+            Tuple of (done items, items to deliver), each in input order
+        """
+        done: List[P] = []
+        todo: List[P] = []
+        for item in items:
+            (done if self.is_done(name_of(item)) else todo).append(item)
+        return done, todo
+
+    def summarize(self, names: Sequence[str]) -> JournalSummary:
+        """
+        Summarize the latest outcome of each project.
+
+        After a resumed run has finished, this is what an uninterrupted
+        run would have reported.
+
+        Args:
+            names: Project names of the run, in manifest order
+
+        Returns:
+            Summary of outcomes
+        """
+        summary = JournalSummary()
+        by_outcome = {
+            OUTCOME_SUCCESS: summary.successful,
+            OUTCOME_FAILED: summary.failed,
+            OUTCOME_SKIPPED: summary.skipped,
+        }
+        for name in names:
+            by_outcome.get(self.outcomes.get(name, ""), summary.pending).append(name)
+        return summary
+
+
+class DeliveryJournal:
+    """
+    Journal file in the work dir recording each project as it completes.
+
+    Every record is a JSON line that is flushed and fsync'd before
+    record() returns, so an OOM kill or a cancelled CI job loses at most
+    the project that was in flight. The first line holds a run key (for
+    example a fingerprint of the manifest SHA and target settings); a
+    journal written for a different run key is discarded instead of
+    resumed.
+    """
+
+    def __init__(self, path: Path) -> None:
+        """
+        Initialize journal.
+
+        Args:
+            path: Journal file path
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._file: Optional[IO[str]] = None
+
+    @classmethod
+    def for_work_dir(cls, work_dir: Path) -> "DeliveryJournal":
+        """Open the journal kept in a work dir."""
+        return cls(work_dir / JOURNAL_FILE_NAME)
+
+    @staticmethod
+    def replay(path: Path) -> JournalState:
+        """
+        Read a journal, the latest outcome of a project winning.
+
+        A torn last line (the process died mid-write) is ignored.
+
+        Args:
+            path: Journal file path
+
+        Returns:
+            Replayed state (empty if the file doesn't exist)
+        """
+        state = JournalState()
+        try:
+            lines = path.read_text(encoding="utf-8").splitlines()
+        except FileNotFoundError:
+            return state
+
+        for number, line in enumerate(lines, 1):
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                logger.warning(f"Ignoring corrupt journal line {number} in {path.name}")
+                continue
+            if "run" in entry:
+                state.run_key = entry["run"]
+            elif entry.get("outcome") in OUTCOMES:
+                state.outcomes.pop(entry["project"], None)
+                state.outcomes[entry["project"]] = entry["outcome"]
+        return state
+
+    def start(self, run_key: str, resume: bool = False) -> JournalState:
+        """
+        Open the journal for a run.
+
+        Args:
+            run_key: Identity of the run
+            resume: Continue an existing journal with the same run key
+
+        Returns:
+            State to resume from (empty when starting fresh)
+        """
+        state = self.replay(self.path) if resume else JournalState()
+        if resume and state.run_key != run_key:
+            if state.run_key is not None:
+                logger.warning("Journal belongs to a different run, starting from scratch")
+            state = JournalState()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            self._close()
+            if state.run_key is None:
+                self._file = self.path.open("w", encoding="utf-8")
+                self._write({"run": run_key, "started_at": time.time()})
+                self._fsync_dir()
+            else:
+                self._drop_torn_tail()
+                self._file = self.path.open("a", encoding="utf-8")
+
+        state.run_key = run_key
+        if state.outcomes:
+            done = sum(1 for name in state.outcomes if state.is_done(name))
+            logger.info(f"Resuming run: {done} project(s) already delivered")
+        return state
+
+    def record(self, name: str, outcome: str, detail: Optional[str] = None) -> None:
+        """
+        Durably record the outcome of one project.
+
+        Args:
+            name: Project name
+            outcome: One of OUTCOMES
+            detail: Optional message (e.g. the error of a failed push)
+        """
+        if outcome not in OUTCOMES:
+            raise ValueError(f"Unknown outcome: {outcome}")
+        entry = {"project": name, "outcome": outcome, "at": time.time()}
+        if detail:
+            entry["detail"] = detail
+        with self._lock:
+            if self._file is None:
+                raise RuntimeError("Journal is not started")
+            self._write(entry)
+
+    def _drop_torn_tail(self) -> None:
+        # A record torn by a crash must not swallow the next appended one
+        with self.path.open("rb+") as f:
+            data = f.read()
+            if data and not data.endswith(b"\n"):
+                f.truncate(data.rfind(b"\n") + 1)
+                f.flush()
+                os.fsync(f.fileno())
+
+    def _write(self, entry: Dict[str, object]) -> None:
+        assert self._file is not None
+        self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _fsync_dir(self) -> None:
+        fd = os.open(str(self.path.parent), os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+
+    def _close(self) -> None:
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def close(self) -> None:
+        """Close the journal file."""
+        with self._lock:
+            self._close()
+
+    def __enter__(self) -> "DeliveryJournal":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
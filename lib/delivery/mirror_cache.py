@@ -0,0 +1,292 @@
+"""
+Persistent bare-mirror cache shared between delivery runs.
+"""
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import subprocess
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import IO, Any, Dict, Iterable, Iterator, List, Optional
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX platforms
+    fcntl = None  # type: ignore
+
+from lib.delivery.workspace import directory_size
+
+logger = logging.getLogger(__name__)
+
+META_FILE = "cicd-mirror.json"
+CACHE_LOCK_FILE = ".cache.lock"
+
+
+class _FileLock:
+    """flock-based lock shared between processes on the same host."""
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        self._file: Optional[IO[str]] = None
+
+    def acquire(self, exclusive: bool = True, blocking: bool = True) -> bool:
+        """
+        Acquire the lock.
+
+        Args:
+            exclusive: Exclusive (True) or shared (False) lock
+            blocking: Wait for the lock if it is held elsewhere
+
+        Returns:
+            True if acquired, False if non-blocking and already held
+        """
+        if self._file is None:
+            self._file = open(self.path, "a+", encoding="utf-8")
+        if fcntl is None:
+            return True
+
+        flags = fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH
+        if not blocking:
+            flags |= fcntl.LOCK_NB
+        try:
+            fcntl.flock(self._file.fileno(), flags)
+        except BlockingIOError:
+            return False
+        return True
+
+    def release(self) -> None:
+        """Release the lock."""
+        if self._file is None:
+            return
+        if fcntl is not None:
+            fcntl.flock(self._file.fileno(), fcntl.LOCK_UN)
+        self._file.close()
+        self._file = None
+
+
+@dataclass
+class MirrorEntry:
+    """A bare mirror stored in the cache."""
+
+    path: Path
+    size: int
+    last_used: float
+
+
+class MirrorCache:
+    """
+    Cache of bare mirror repositories keyed by remote URL and project name.
+
+    The first use of a project clones a bare mirror; later runs update it
+    with an incremental `git fetch`. When max_bytes is set, least recently
+    used mirrors are evicted until the cache fits the budget. Mirrors in
+    use by any process on the host hold a shared lock and are never
+    evicted. Each mirror's size is measured after its update and kept in
+    its meta file, so eviction doesn't walk the whole cache.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: Optional[int] = None) -> None:
+        """
+        Initialize mirror cache.
+
+        Args:
+            cache_dir: Directory holding the mirrors
+            max_bytes: Disk budget in bytes (None for unlimited)
+        """
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes cannot be negative")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def remote_project_url(remote_url: str, project_name: str) -> str:
+        """
+        Build the fetch URL of a project from its remote URL.
+
+        Args:
+            remote_url: Remote fetch URL from the manifest
+            project_name: Project name
+
+        Returns:
+            Project repository URL
+        """
+        return f"{remote_url.rstrip('/')}/{project_name}"
+
+    def path_for(self, remote_url: str, project_name: str) -> Path:
+        """
+        Get the cache path of a mirror.
+
+        Args:
+            remote_url: Remote fetch URL
+            project_name: Project name
+
+        Returns:
+            Path of the bare mirror (may not exist yet)
+        """
+        digest = hashlib.sha1(f"{remote_url}\0{project_name}".encode("utf-8")).hexdigest()
+        slug = re.sub(r"[^A-Za-z0-9._-]+", "_", project_name).strip("_")[-48:]
+        return self.cache_dir / f"{slug}-{digest[:16]}.git"
+
+    @contextmanager
+    def open_mirror(self, remote_url: str, project_name: str) -> Iterator[Path]:
+        """
+        Create or update a mirror and keep it locked while in use.
+
+        Args:
+            remote_url: Remote fetch URL
+            project_name: Project name
+
+        Yields:
+            Path of the up-to-date bare mirror
+
+        Raises:
+            RuntimeError: If cloning or fetching fails
+        """
+        path = self.path_for(remote_url, project_name)
+        lock = _FileLock(self._lock_path(path))
+        lock.acquire(exclusive=True)
+        try:
+            url = self.remote_project_url(remote_url, project_name)
+            self._update(path, url, project_name)
+            self._write_meta(path, url, project_name)
+            # Keep a shared lock while the caller uses the mirror
+            lock.acquire(exclusive=False)
+            self.evict(keep=[path])
+            yield path
+        finally:
+            lock.release()
+
+    def size_of(self, path: Path) -> int:
+        """
+        Size of a mirror as recorded by its last update.
+
+        Args:
+            path: Mirror path
+
+        Returns:
+            Size in bytes (measured if the meta file has no size)
+        """
+        size = _read_meta(path).get("size")
+        return size if isinstance(size, int) else directory_size(path)
+
+    def entries(self) -> List[MirrorEntry]:
+        """
+        List cached mirrors.
+
+        Returns:
+            Mirror entries, least recently used first
+        """
+        entries: List[MirrorEntry] = []
+        for path in self.cache_dir.glob("*.git"):
+            meta = path / META_FILE
+            if not meta.exists():
+                continue
+            try:
+                last_used = meta.stat().st_mtime
+            except OSError:
+                continue
+            entries.append(MirrorEntry(path=path, size=self.size_of(path), last_used=last_used))
+        entries.sort(key=lambda entry: (entry.last_used, entry.path.name))
+        return entries
+
+    def remove(self, remote_url: str, project_name: str) -> None:
+        """
+        Delete a mirror right away (e.g. when the cache is only scratch space).
+
+        Args:
+            remote_url: Remote fetch URL
+            project_name: Project name
+        """
+        path = self.path_for(remote_url, project_name)
+        lock = _FileLock(self._lock_path(path))
+        lock.acquire(exclusive=True)
+        try:
+            shutil.rmtree(path, ignore_errors=True)
+        finally:
+            lock.release()
+
+    def evict(self, keep: Iterable[Path] = ()) -> List[Path]:
+        """
+        Evict least recently used mirrors until the cache fits the budget.
+
+        Args:
+            keep: Mirrors that must not be evicted
+
+        Returns:
+            Paths of evicted mirrors
+        """
+        if self.max_bytes is None:
+            return []
+
+        keep_set = {Path(p) for p in keep}
+        cache_lock = _FileLock(self.cache_dir / CACHE_LOCK_FILE)
+        cache_lock.acquire(exclusive=True)
+        try:
+            entries = self.entries()
+            total = sum(entry.size for entry in entries)
+            evicted: List[Path] = []
+
+            for entry in entries:
+                if total <= self.max_bytes:
+                    break
+                if entry.path in keep_set:
+                    continue
+
+                entry_lock = _FileLock(self._lock_path(entry.path))
+                if not entry_lock.acquire(exclusive=True, blocking=False):
+                    # In use by another worker or process
+                    continue
+                try:
+                    logger.debug(f"Evicting mirror {entry.path.name} ({entry.size} bytes)")
+                    shutil.rmtree(entry.path, ignore_errors=True)
+                finally:
+                    entry_lock.release()
+                total -= entry.size
+                evicted.append(entry.path)
+
+            return evicted
+        finally:
+            cache_lock.release()
+
+    def _lock_path(self, path: Path) -> Path:
+        return path.with_name(path.name + ".lock")
+
+    def _update(self, path: Path, url: str, project_name: str) -> None:
+        if (path / META_FILE).exists():
+            logger.debug(f"Updating mirror of {project_name}")
+            _run_git(["git", "fetch", "--prune", "--quiet", "origin"], cwd=path)
+            return
+
+        if path.exists():
+            # Leftover from an interrupted clone
+            shutil.rmtree(path)
+
+        logger.debug(f"Creating mirror of {project_name}")
+        _run_git(["git", "clone", "--mirror", "--quiet", url, str(path)])
+
+    def _write_meta(self, path: Path, url: str, project_name: str) -> None:
+        # Rewriting the meta file also marks the mirror as just used (mtime)
+        meta = {"url": url, "project": project_name, "size": directory_size(path)}
+        tmp_path = path / (META_FILE + ".tmp")
+        tmp_path.write_text(json.dumps(meta), encoding="utf-8")
+        os.replace(tmp_path, path / META_FILE)
+
+
+def _read_meta(path: Path) -> Dict[str, Any]:
+    try:
+        data = json.loads((path / META_FILE).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def _run_git(command: List[str], cwd: Optional[Path] = None) -> None:
+    completed = subprocess.run(command, cwd=cwd, capture_output=True, text=True, check=False)
+    if completed.returncode != 0:
+        raise RuntimeError(f"{' '.join(command[:2])} failed: {completed.stderr.strip()}")
+
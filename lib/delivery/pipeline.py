@@ -0,0 +1,231 @@
+"""
+Staged delivery pipeline with bounded queues between stages.
+"""
+import logging
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+@dataclass
+class Stage:
+    """One pipeline stage (e.g. resolve, fetch, transform, push)."""
+
+    name: str
+    func: Callable[[Any], Any]
+    workers: int = 1
+
+    def __post_init__(self) -> None:
+        if self.workers < 1:
+            raise ValueError(f"Stage {self.name}: workers must be at least 1")
+
+
+@dataclass
+class StageStats:
+    """Counters of one stage."""
+
+    name: str
+    processed: int = 0
+    failed: int = 0
+    busy_seconds: float = 0.0
+    max_queue_depth: int = 0
+
+    def throughput(self, elapsed: float) -> float:
+        """Items processed per second over elapsed seconds."""
+        return self.processed / elapsed if elapsed > 0 else 0.0
+
+
+@dataclass
+class PipelineFailure:
+    """An item that failed in a stage."""
+
+    item: Any
+    stage: str
+    error: BaseException
+
+
+@dataclass
+class PipelineResult:
+    """Outcome of a pipeline run."""
+
+    outputs: List[Tuple[Any, Any]] = field(default_factory=list)
+    failures: List[PipelineFailure] = field(default_factory=list)
+    stats: Dict[str, StageStats] = field(default_factory=dict)
+    elapsed: float = 0.0
+
+
+class Pipeline:
+    """
+    Runs items through stages connected by bounded queues.
+
+    Each stage has its own worker count, so for example fetch and push run
+    at the same time and keep both network directions busy. A full queue
+    blocks the stage feeding it, which caps how many items (e.g. fetched
+    but not yet pushed repositories) exist between two stages. Outputs and
+    failures are reported in input order.
+    """
+
+    def __init__(
+        self, stages: Sequence[Stage], queue_size: int = 4, log_interval: float = 10.0
+    ) -> None:
+        """
+        Initialize pipeline.
+
+        Args:
+            stages: Stages in execution order
+            queue_size: Capacity of the queue in front of each stage
+            log_interval: Seconds between queue depth/throughput debug logs (0 to disable)
+        """
+        if not stages:
+            raise ValueError("Pipeline needs at least one stage")
+        if queue_size < 1:
+            raise ValueError("queue_size must be at least 1")
+        self.stages = list(stages)
+        self.queue_size = queue_size
+        self.log_interval = log_interval
+
+    def run(self, items: Iterable[Any]) -> PipelineResult:
+        """
+        Run items through all stages.
+
+        The input iterable is consumed lazily, so a streaming source can
+        feed the pipeline while it is still being produced.
+
+        Args:
+            items: Items to process
+
+        Returns:
+            Pipeline result with outputs, failures and per-stage stats
+
+        Raises:
+            Exception: Whatever iterating items raises, once the queued items
+                have been processed
+        """
+        queues: List["queue.Queue[Any]"] = [
+            queue.Queue(maxsize=self.queue_size) for _ in self.stages
+        ]
+        stats = {stage.name: StageStats(name=stage.name) for stage in self.stages}
+        remaining = [stage.workers for stage in self.stages]
+        outputs: Dict[int, Tuple[Any, Any]] = {}
+        failures: Dict[int, PipelineFailure] = {}
+        lock = threading.Lock()
+        done = threading.Event()
+        started = time.monotonic()
+
+        def worker(index: int) -> None:
+            stage = self.stages[index]
+            inbox = queues[index]
+            outbox: Optional["queue.Queue[Any]"] = (
+                queues[index + 1] if index + 1 < len(queues) else None
+            )
+            stage_stats = stats[stage.name]
+
+            while True:
+                entry = inbox.get()
+                if entry is _STOP:
+                    break
+
+                position, item, value = entry
+                began = time.monotonic()
+                try:
+                    value = stage.func(value)
+                except Exception as e:
+                    with lock:
+                        stage_stats.failed += 1
+                        stage_stats.busy_seconds += time.monotonic() - began
+                        failures[position] = PipelineFailure(item=item, stage=stage.name, error=e)
+                    continue
+
+                with lock:
+                    stage_stats.processed += 1
+                    stage_stats.busy_seconds += time.monotonic() - began
+                    if outbox is None:
+                        outputs[position] = (item, value)
+
+                if outbox is not None:
+                    outbox.put((position, item, value))
+                    with lock:
+                        next_stats = stats[self.stages[index + 1].name]
+                        next_stats.max_queue_depth = max(
+                            next_stats.max_queue_depth, outbox.qsize()
+                        )
+
+            with lock:
+                remaining[index] -= 1
+                last = remaining[index] == 0
+            if last and outbox is not None:
+                for _ in range(self.stages[index + 1].workers):
+                    outbox.put(_STOP)
+
+        threads = [
+            threading.Thread(
+                target=worker, args=(index,), name=f"pipeline-{stage.name}-{n}", daemon=True
+            )
+            for index, stage in enumerate(self.stages)
+            for n in range(stage.workers)
+        ]
+        for thread in threads:
+            thread.start()
+
+        monitor: Optional[threading.Thread] = None
+        if self.log_interval > 0:
+            monitor = threading.Thread(
+                target=self._monitor, args=(queues, stats, lock, done, started), daemon=True
+            )
+            monitor.start()
+
+        first_stats = stats[self.stages[0].name]
+        try:
+            for position, item in enumerate(items):
+                queues[0].put((position, item, item))
+                with lock:
+                    first_stats.max_queue_depth = max(
+                        first_stats.max_queue_depth, queues[0].qsize()
+                    )
+        finally:
+            # Also when items raises: the stages drain what was queued and stop
+            for _ in range(self.stages[0].workers):
+                queues[0].put(_STOP)
+            for thread in threads:
+                thread.join()
+            done.set()
+            if monitor is not None:
+                monitor.join()
+
+        elapsed = time.monotonic() - started
+        self._log_stats(stats, elapsed, queues)
+        return PipelineResult(
+            outputs=[outputs[k] for k in sorted(outputs)],
+            failures=[failures[k] for k in sorted(failures)],
+            stats=stats,
+            elapsed=elapsed,
+        )
+
+    def _monitor(
+        self,
+        queues: List["queue.Queue[Any]"],
+        stats: Dict[str, StageStats],
+        lock: threading.Lock,
+        done: threading.Event,
+        started: float,
+    ) -> None:
+        while not done.wait(self.log_interval):
+            with lock:
+                self._log_stats(stats, time.monotonic() - started, queues)
+
+    def _log_stats(
+        self, stats: Dict[str, StageStats], elapsed: float, queues: List["queue.Queue[Any]"]
+    ) -> None:
+        for stage, stage_queue in zip(self.stages, queues):
+            s = stats[stage.name]
+            logger.debug(
+                f"Stage {stage.name}: queue={stage_queue.qsize()}/{self.queue_size} "
+                f"(max {s.max_queue_depth}), processed={s.processed}, failed={s.failed}, "
+                f"throughput={s.throughput(elapsed):.2f}/s"
+            )
@@ -0,0 +1,265 @@
+"""
+Bulk snapshot of target repositories and branches on Gerrit.
+"""
+import base64
+import json
+import logging
+import os
+import subprocess
+import urllib.request
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional
+from urllib.parse import urlencode, urlparse
+
+from util.git_refs import ls_remote
+
+if TYPE_CHECKING:
+    from lib.manifest.models import DeliveryConfig
+
+logger = logging.getLogger(__name__)
+
+# Gerrit prefixes JSON responses to prevent XSSI
+XSSI_PREFIX = ")]}'"
+
+# Branch names per listing request, keeps query strings short
+BRANCH_CHUNK_SIZE = 20
+
+STATUS_PUSH = "push"
+STATUS_UP_TO_DATE = "up_to_date"
+STATUS_MISSING_REPO = "missing_repo"
+
+
+def _chunks(items: List[str], size: int) -> Iterable[List[str]]:
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+
+def _merge_listing(refs: Dict[str, Dict[str, str]], listing: Dict[str, dict]) -> None:
+    for name, info in listing.items():
+        branches = refs.setdefault(name, {})
+        branches.update((info or {}).get("branches") or {})
+
+
+class RemoteRefSnapshot:
+    """
+    Snapshot of which target repositories exist and where their branches point.
+
+    Built with a few batched queries before pushing, so up-to-date pushes
+    can be skipped and missing repositories reported up front instead of
+    learning both from one push attempt per project.
+    """
+
+    def __init__(self, refs: Optional[Dict[str, Dict[str, str]]] = None) -> None:
+        """
+        Initialize snapshot.
+
+        Args:
+            refs: Mapping of repository name to {branch name: SHA}
+        """
+        self.refs: Dict[str, Dict[str, str]] = refs or {}
+
+    @classmethod
+    def from_gerrit_rest(
+        cls,
+        base_url: str,
+        branches: Iterable[str],
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        timeout: float = 30,
+    ) -> "RemoteRefSnapshot":
+        """
+        Build a snapshot with the Gerrit REST API.
+
+        One request lists all projects; then one request per chunk of
+        branch names returns the SHA of those branches in every project.
+
+        Args:
+            base_url: Gerrit HTTP(S) URL
+            branches: Target branch names of interest
+            username: HTTP username (uses the authenticated /a/ endpoints)
+            password: HTTP password
+            timeout: Request timeout in seconds
+
+        Returns:
+            Snapshot of target refs
+        """
+        prefix = base_url.rstrip("/") + ("/a" if username else "")
+        headers = {"Accept": "application/json"}
+        if username:
+            token = base64.b64encode(f"{username}:{password or ''}".encode("utf-8"))
+            headers["Authorization"] = "Basic " + token.decode("ascii")
+
+        def get(query: str) -> Dict[str, dict]:
+            request = urllib.request.Request(f"{prefix}/projects/?{query}", headers=headers)
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                body = response.read().decode("utf-8")
+            if body.startswith(XSSI_PREFIX):
+                body = body[len(XSSI_PREFIX) :]
+            return json.loads(body)
+
+        snapshot = cls()
+        _merge_listing(snapshot.refs, get(urlencode({"type": "ALL"})))
+        for chunk in _chunks(sorted(set(branches)), BRANCH_CHUNK_SIZE):
+            _merge_listing(snapshot.refs, get(urlencode([("b", b) for b in chunk])))
+
+        logger.debug(f"Remote snapshot: {len(snapshot.refs)} repositories")
+        return snapshot
+
+    @classmethod
+    def from_gerrit_ssh(
+        cls,
+        gerrit_url: str,
+        branches: Iterable[str],
+        ssh_key_path: Optional[str] = None,
+        username: Optional[str] = None,
+        timeout: float = 120,
+    ) -> "RemoteRefSnapshot":
+        """
+        Build a snapshot with `gerrit ls-projects` over SSH.
+
+        Args:
+            gerrit_url: Gerrit SSH URL ("ssh://[user@]host[:port]" or "host")
+            branches: Target branch names of interest
+            ssh_key_path: Path to SSH private key
+            username: SSH username (overrides the one in the URL)
+            timeout: Command timeout in seconds
+
+        Returns:
+            Snapshot of target refs
+
+        Raises:
+            RuntimeError: If the SSH command fails
+        """
+        parsed = urlparse(gerrit_url if "://" in gerrit_url else f"ssh://{gerrit_url}")
+        user = username or parsed.username
+        destination = f"{user}@{parsed.hostname}" if user else str(parsed.hostname)
+
+        base = ["ssh", "-p", str(parsed.port or 29418)]
+        if ssh_key_path:
+            base += ["-i", ssh_key_path]
+        base += [destination, "gerrit", "ls-projects", "--format", "json"]
+
+        def run(extra: List[str]) -> Dict[str, dict]:
+            completed = subprocess.run(
+                base + extra, capture_output=True, text=True, timeout=timeout, check=False
+            )
+            if completed.returncode != 0:
+                raise RuntimeError(f"gerrit ls-projects failed: {completed.stderr.strip()}")
+            return json.loads(completed.stdout or "{}")
+
+        snapshot = cls()
+        _merge_listing(snapshot.refs, run(["--type", "all"]))
+        for chunk in _chunks(sorted(set(branches)), BRANCH_CHUNK_SIZE):
+            extra: List[str] = []
+            for branch in chunk:
+                extra += ["-b", branch]
+            _merge_listing(snapshot.refs, run(extra))
+
+        logger.debug(f"Remote snapshot: {len(snapshot.refs)} repositories")
+        return snapshot
+
+    @classmethod
+    def from_ls_remote(
+        cls, base_url: str, repos: Iterable[str], branches: Iterable[str]
+    ) -> "RemoteRefSnapshot":
+        """
+        Build a snapshot with one `git ls-remote` per repository.
+
+        For targets without a Gerrit API, such as local bare repositories;
+        a repository that cannot be listed counts as missing.
+
+        Args:
+            base_url: Base URL or path of the target repositories
+            repos: Target repository names
+            branches: Target branch names of interest
+
+        Returns:
+            Snapshot of target refs
+        """
+        patterns = [f"refs/heads/{branch}" for branch in sorted(set(branches))]
+        snapshot = cls()
+        for repo in sorted(set(repos)):
+            try:
+                refs = ls_remote(f"{base_url.rstrip('/')}/{repo}", patterns)
+            except RuntimeError:
+                continue
+            snapshot.refs[repo] = {
+                ref[len("refs/heads/") :]: sha
+                for ref, sha in refs.items()
+                if ref.startswith("refs/heads/")
+            }
+        return snapshot
+
+    @classmethod
+    def from_delivery_config(
+        cls,
+        delivery_config: "DeliveryConfig",
+        branches: Iterable[str],
+        repos: Iterable[str] = (),
+    ) -> "RemoteRefSnapshot":
+        """
+        Build a snapshot using the transport configured for delivery.
+
+        Local targets (a path or file:// URL) are listed with git ls-remote.
+
+        Args:
+            delivery_config: Delivery configuration
+            branches: Target branch names of interest
+            repos: Target repository names (only needed for local targets)
+
+        Returns:
+            Snapshot of target refs
+        """
+        url = delivery_config.gerrit_url
+        if url.startswith("file://") or os.path.isabs(url):
+            return cls.from_ls_remote(url, repos, branches)
+        if delivery_config.auth_method == "http":
+            return cls.from_gerrit_rest(
+                delivery_config.gerrit_url,
+                branches,
+                username=delivery_config.username,
+                password=delivery_config.password,
+            )
+        return cls.from_gerrit_ssh(
+            delivery_config.gerrit_url,
+            branches,
+            ssh_key_path=delivery_config.ssh_key_path,
+            username=delivery_config.username,
+        )
+
+    def has_repo(self, repo: str) -> bool:
+        """Whether the target repository exists."""
+        return repo in self.refs
+
+    def branch_sha(self, repo: str, branch: str) -> Optional[str]:
+        """SHA the target branch points at, or None if it doesn't exist."""
+        return self.refs.get(repo, {}).get(branch)
+
+    def classify(self, repo: str, branch: str, source_sha: Optional[str]) -> str:
+        """
+        Decide what to do with one target.
+
+        Args:
+            repo: Target repository name
+            branch: Target branch name
+            source_sha: SHA that would be pushed (None if unknown)
+
+        Returns:
+            STATUS_MISSING_REPO, STATUS_UP_TO_DATE or STATUS_PUSH
+        """
+        if not self.has_repo(repo):
+            return STATUS_MISSING_REPO
+        if source_sha and self.branch_sha(repo, branch) == source_sha:
+            return STATUS_UP_TO_DATE
+        return STATUS_PUSH
+
+    def missing_repos(self, repos: Iterable[str]) -> List[str]:
+        """
+        List target repositories that don't exist.
+
+        Args:
+            repos: Target repository names
+
+        Returns:
+            Missing repository names, sorted and deduplicated
+        """
+        return sorted({repo for repo in repos if not self.has_repo(repo)})
@@ -0,0 +1,253 @@
+"""
+Retry with backoff and adaptive concurrency for pushes under Gerrit back-pressure.
+"""
+import logging
+import random
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterator, Optional, TypeVar
+
+from lib.delivery.worker_pool import gerrit_host
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+ERROR_TRANSIENT = "transient"
+ERROR_PERMANENT = "permanent"
+
+# Messages of failures that retrying cannot fix: authentication, missing
+# repositories or revisions, rejected pushes. Checked first, because git
+# wraps them in generic messages such as "Could not read from remote
+# repository" or "RPC failed" that also accompany dropped connections.
+_PERMANENT_PATTERN = re.compile(
+    r"permission denied|authentication failed|access denied|\bnot found\b"
+    r"|does not appear to be a git repository|\b40[134]\b|unauthorized|forbidden"
+    r"|remote rejected|\[rejected\]|prohibited|non-fast-forward",
+    re.IGNORECASE,
+)
+
+# Messages of failures worth retrying: overloaded server, dropped connections
+_TRANSIENT_PATTERN = re.compile(
+    r"too many concurrent|too many requests|\b429\b|\b502\b|\b503\b|\b504\b"
+    r"|service unavailable|bad gateway|gateway time-?out|temporarily unavailable"
+    r"|connection (?:reset|refused|closed|timed out)|timed? ?out"
+    r"|remote end hung up|early eof|broken pipe|unexpected disconnect"
+    r"|could not read from remote|rpc failed|ssh_exchange_identification"
+    r"|kex_exchange_identification|resource temporarily",
+    re.IGNORECASE,
+)
+
+
+def classify_error(error: BaseException) -> str:
+    """
+    Classify a failure as transient (retry) or permanent.
+
+    Network-level exceptions are transient; otherwise the message (e.g.
+    git stderr wrapped in RuntimeError) decides. Rejected pushes,
+    authentication errors and missing repositories or revisions are
+    permanent even if the message also carries a transient-looking phrase.
+
+    Args:
+        error: Raised exception
+
+    Returns:
+        ERROR_TRANSIENT or ERROR_PERMANENT
+    """
+    if isinstance(error, (ConnectionError, TimeoutError)):
+        return ERROR_TRANSIENT
+    message = str(error)
+    if _PERMANENT_PATTERN.search(message):
+        return ERROR_PERMANENT
+    if _TRANSIENT_PATTERN.search(message):
+        return ERROR_TRANSIENT
+    return ERROR_PERMANENT
+
+
+@dataclass
+class BackoffPolicy:
+    """Jittered exponential backoff."""
+
+    base_seconds: float = 1.0
+    max_seconds: float = 60.0
+    max_attempts: int = 5
+
+    def __post_init__(self) -> None:
+        if self.max_attempts < 1:
+            raise ValueError("max_attempts must be at least 1")
+        if self.base_seconds < 0 or self.max_seconds < self.base_seconds:
+            raise ValueError("Invalid backoff bounds")
+
+    def delay(self, attempt: int, rng: random.Random) -> float:
+        """
+        Delay before the next attempt ("full jitter").
+
+        Args:
+            attempt: Number of the attempt that just failed (1-based)
+            rng: Random generator
+
+        Returns:
+            Seconds to wait
+        """
+        ceiling = min(self.max_seconds, self.base_seconds * (2 ** (attempt - 1)))
+        return rng.uniform(0, ceiling)
+
+
+class AdaptiveLimiter:
+    """
+    Concurrency limit adjusted by additive increase, multiplicative decrease.
+
+    The limit is halved on back-pressure and grows by one after a full
+    window of successes (as many successes as the current limit), so the
+    number of in-flight operations settles near what the server accepts.
+    """
+
+    def __init__(
+        self,
+        maximum: int,
+        minimum: int = 1,
+        initial: Optional[int] = None,
+        decrease_factor: float = 0.5,
+    ) -> None:
+        """
+        Initialize limiter.
+
+        Args:
+            maximum: Upper bound of the limit
+            minimum: Lower bound of the limit
+            initial: Starting limit (default: maximum)
+            decrease_factor: Factor applied to the limit on back-pressure (0-1)
+        """
+        if minimum < 1 or maximum < minimum:
+            raise ValueError("Require 1 <= minimum <= maximum")
+        if not 0.0 < decrease_factor < 1.0:
+            raise ValueError("decrease_factor must be in (0, 1)")
+        self.minimum = minimum
+        self.maximum = maximum
+        self.decrease_factor = decrease_factor
+        self.limit = min(maximum, max(minimum, initial if initial is not None else maximum))
+        self.in_flight = 0
+        self._successes = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Hold one of the currently allowed slots."""
+        with self._condition:
+            while self.in_flight >= self.limit:
+                self._condition.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.in_flight -= 1
+                self._condition.notify_all()
+
+    def on_success(self) -> None:
+        """Record a success; widen the limit after a window of them."""
+        with self._condition:
+            self._successes += 1
+            if self._successes >= self.limit and self.limit < self.maximum:
+                self.limit += 1
+                self._successes = 0
+                self._condition.notify_all()
+
+    def on_backpressure(self) -> None:
+        """Record a transient failure; shrink the limit."""
+        with self._condition:
+            limit = max(self.minimum, int(self.limit * self.decrease_factor))
+            if limit != self.limit:
+                logger.info(f"Back-pressure detected, concurrency {self.limit} -> {limit}")
+            self.limit = limit
+            self._successes = 0
+
+
+class RetryScheduler:
+    """
+    Runs operations against Gerrit hosts with retries and adaptive concurrency.
+
+    Each host gets its own AdaptiveLimiter, so back-pressure from one
+    server doesn't slow deliveries to another. Transient failures are
+    retried with jittered exponential backoff (waiting outside the slot);
+    permanent failures and exhausted retries are raised to the caller.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int,
+        policy: Optional[BackoffPolicy] = None,
+        sleep: Callable[[float], None] = time.sleep,
+        rng: Optional[random.Random] = None,
+    ) -> None:
+        """
+        Initialize retry scheduler.
+
+        Args:
+            max_concurrency: Maximum in-flight operations per host
+            policy: Backoff policy
+            sleep: Function used to wait between attempts
+            rng: Random generator for jitter
+        """
+        self.max_concurrency = max_concurrency
+        self.policy = policy or BackoffPolicy()
+        self.sleep = sleep
+        self.rng = rng or random.Random()
+        self.retries = 0
+        self._limiters: Dict[str, AdaptiveLimiter] = {}
+        self._lock = threading.Lock()
+
+    def limiter(self, url: str) -> AdaptiveLimiter:
+        """Get the limiter of the host of url."""
+        host = gerrit_host(url)
+        with self._lock:
+            limiter = self._limiters.get(host)
+            if limiter is None:
+                limiter = AdaptiveLimiter(self.max_concurrency)
+                self._limiters[host] = limiter
+            return limiter
+
+    def call(self, url: str, func: Callable[[], R]) -> R:
+        """
+        Run func with retries, within the concurrency limit of url's host.
+
+        Args:
+            url: Target URL (selects the host limiter)
+            func: Operation to run
+
+        Returns:
+            Result of func
+
+        Raises:
+            Exception: The last error, if permanent or retries are exhausted
+        """
+        limiter = self.limiter(url)
+        attempt = 1
+        while True:
+            with limiter.slot():
+                try:
+                    result = func()
+                except Exception as e:
+                    error: Exception = e
+                else:
+                    limiter.on_success()
+                    return result
+
+            if classify_error(error) != ERROR_TRANSIENT:
+                raise error
+            limiter.on_backpressure()
+            if attempt >= self.policy.max_attempts:
+                raise error
+
+            delay = self.policy.delay(attempt, self.rng)
+            logger.warning(
+                f"Transient failure on {gerrit_host(url)} (attempt {attempt}), "
+                f"retrying in {delay:.1f}s: {error}"
+            )
+            with self._lock:
+                self.retries += 1
+            self.sleep(delay)
+            attempt += 1
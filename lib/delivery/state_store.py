@@ -0,0 +1,189 @@
+"""
+Persistent delivery state for incremental runs.
+"""
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+if TYPE_CHECKING:
+    from lib.manifest.models import Project
+    from lib.transformer.branch_transformer import BranchTransformer
+    from lib.transformer.repo_transformer import RepoTransformer
+
+STATE_DB_NAME = "delivery_state.db"
+
+
+class StateKey(NamedTuple):
+    """Identity of one delivered target branch."""
+
+    gerrit_url: str
+    repo: str
+    branch: str
+
+
+def make_state_key(
+    gerrit_url: str,
+    project: "Project",
+    repo_transformer: "RepoTransformer",
+    branch_transformer: "BranchTransformer",
+) -> StateKey:
+    """
+    Build the state key for a project using the configured transformers.
+
+    Args:
+        gerrit_url: Target Gerrit URL
+        project: Manifest project
+        repo_transformer: Transformer for the target repository name
+        branch_transformer: Transformer for the target branch name
+
+    Returns:
+        State key of the project's delivery target
+    """
+    return StateKey(
+        gerrit_url=gerrit_url,
+        repo=repo_transformer.transform(project.name),
+        branch=branch_transformer.transform_revision(project.revision) or "",
+    )
+
+
+class DeliveryStateStore:
+    """
+    SQLite-backed record of the last source SHA pushed per target.
+
+    Keys use the transformed repository and branch names (the values
+    produced by RepoTransformer and BranchTransformer), so changing the
+    alias or branch suffix starts a fresh history.
+    """
+
+    def __init__(self, work_dir: Path) -> None:
+        """
+        Open (or create) the state store under work_dir.
+
+        Args:
+            work_dir: Working directory holding the state database
+        """
+        work_dir.mkdir(parents=True, exist_ok=True)
+        self.db_path = work_dir / STATE_DB_NAME
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS delivered (
+                gerrit_url TEXT NOT NULL,
+                repo TEXT NOT NULL,
+                branch TEXT NOT NULL,
+                source_sha TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (gerrit_url, repo, branch)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def get(self, key: StateKey) -> Optional[str]:
+        """
+        Get the last pushed source SHA for key.
+
+        Args:
+            key: Target identity
+
+        Returns:
+            SHA, or None if the target was never delivered
+        """
+        return self.get_many([key]).get(key)
+
+    def get_many(self, keys: Iterable[StateKey]) -> Dict[StateKey, str]:
+        """
+        Get last pushed SHAs for many keys in one pass.
+
+        Args:
+            keys: Target identities
+
+        Returns:
+            Mapping of key to SHA for keys that have a record
+        """
+        wanted = set(keys)
+        if not wanted:
+            return {}
+
+        rows: List[Tuple[str, str, str, str]] = []
+        with self._lock:
+            for gerrit_url in {key.gerrit_url for key in wanted}:
+                rows.extend(
+                    self._conn.execute(
+                        "SELECT gerrit_url, repo, branch, source_sha FROM delivered "
+                        "WHERE gerrit_url = ?",
+                        (gerrit_url,),
+                    )
+                )
+
+        found: Dict[StateKey, str] = {}
+        for gerrit_url, repo, branch, sha in rows:
+            key = StateKey(gerrit_url, repo, branch)
+            if key in wanted:
+                found[key] = sha
+        return found
+
+    def record(self, key: StateKey, source_sha: str) -> None:
+        """
+        Record a successful push.
+
+        Args:
+            key: Target identity
+            source_sha: Source SHA that was pushed
+        """
+        self.record_many([(key, source_sha)])
+
+    def record_many(self, entries: Iterable[Tuple[StateKey, str]]) -> None:
+        """
+        Record several successful pushes in one transaction.
+
+        Args:
+            entries: (key, source SHA) pairs
+        """
+        now = time.time()
+        rows = [(k.gerrit_url, k.repo, k.branch, sha, now) for k, sha in entries]
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO delivered "
+                "(gerrit_url, repo, branch, source_sha, updated_at) VALUES (?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._conn.commit()
+
+    def split_unchanged(
+        self, candidates: Iterable[Tuple[StateKey, str]]
+    ) -> Tuple[List[StateKey], List[StateKey]]:
+        """
+        Split candidates into changed and unchanged targets.
+
+        Args:
+            candidates: (key, current upstream SHA) pairs
+
+        Returns:
+            Tuple of (changed keys, unchanged keys), each in input order
+        """
+        candidates = list(candidates)
+        known = self.get_many(key for key, _ in candidates)
+
+        changed: List[StateKey] = []
+        unchanged: List[StateKey] = []
+        for key, sha in candidates:
+            if sha and known.get(key) == sha:
+                unchanged.append(key)
+            else:
+                changed.append(key)
+        return changed, unchanged
+
+    def close(self) -> None:
+        """Close the database connection."""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "DeliveryStateStore":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
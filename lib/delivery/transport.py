@@ -0,0 +1,265 @@
+"""
+Shared Gerrit transport sessions (SSH multiplexing, HTTP auth) for a run.
+"""
+import atexit
+import base64
+import logging
+import os
+import shlex
+import shutil
+import subprocess
+import tempfile
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple, Union
+from urllib.parse import urlparse, urlunparse
+
+if TYPE_CHECKING:
+    from lib.manifest.models import DeliveryConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SSH_PORT = 29418
+
+
+def _ssh_destination(gerrit_url: str, username: Optional[str]) -> Tuple[str, int]:
+    parsed = urlparse(gerrit_url if "://" in gerrit_url else f"ssh://{gerrit_url}")
+    user = username or parsed.username
+    host = parsed.hostname or ""
+    return (f"{user}@{host}" if user else host), parsed.port or DEFAULT_SSH_PORT
+
+
+def ssh_push_url(gerrit_url: str) -> str:
+    """
+    Gerrit SSH URL with the port the master connection uses spelled out.
+
+    Without it git would push over ssh's default port 22, which neither
+    reaches Gerrit's SSH daemon nor matches the master's ControlPath.
+
+    Args:
+        gerrit_url: Gerrit SSH URL ("ssh://[user@]host[:port][/path]" or "host")
+
+    Returns:
+        ssh:// URL with an explicit port (other URLs and local paths unchanged)
+    """
+    if os.path.isabs(gerrit_url) or ("://" in gerrit_url and not gerrit_url.startswith("ssh://")):
+        return gerrit_url
+    parsed = urlparse(gerrit_url if "://" in gerrit_url else f"ssh://{gerrit_url}")
+    if parsed.port:
+        return urlunparse(parsed)
+    user = f"{parsed.username}@" if parsed.username else ""
+    return urlunparse(parsed._replace(netloc=f"{user}{parsed.hostname}:{DEFAULT_SSH_PORT}"))
+
+
+def session_key(delivery_config: "DeliveryConfig") -> Tuple[Optional[str], ...]:
+    """
+    Key of the transport session a configuration can share with others.
+
+    SSH configurations reaching the same host, port and login with the same
+    key share one multiplexer (one master per host for the whole run).
+
+    Args:
+        delivery_config: Delivery configuration
+
+    Returns:
+        Hashable session key
+    """
+    if delivery_config.auth_method == "http":
+        return (
+            "http",
+            delivery_config.gerrit_url,
+            delivery_config.username,
+            delivery_config.password,
+        )
+    host, port = _ssh_destination(delivery_config.gerrit_url, delivery_config.username)
+    return ("ssh", host, str(port), delivery_config.ssh_key_path)
+
+
+class SshMultiplexer:
+    """
+    One multiplexed SSH master connection per Gerrit host for the whole run.
+
+    git commands started with git_env() reuse the master through
+    ControlPath instead of doing a handshake and key exchange per push.
+    Masters are shut down by close(), on context exit, or at interpreter
+    exit as a last resort.
+    """
+
+    def __init__(
+        self,
+        ssh_key_path: Optional[str] = None,
+        username: Optional[str] = None,
+        persist_seconds: int = 600,
+    ) -> None:
+        """
+        Initialize SSH multiplexer.
+
+        Args:
+            ssh_key_path: Path to SSH private key
+            username: SSH username (overrides the one in the URL)
+            persist_seconds: How long an idle master stays up
+        """
+        self.ssh_key_path = os.path.expanduser(ssh_key_path) if ssh_key_path else None
+        self.username = username
+        self.persist_seconds = persist_seconds
+        # Short base dir: unix socket paths are limited to ~100 characters
+        self.control_dir = tempfile.mkdtemp(prefix="cicd-ssh-")
+        self._masters: List[Tuple[str, int]] = []
+        self._closed = False
+        atexit.register(self.close)
+
+    @property
+    def control_path(self) -> str:
+        """ControlPath template shared by the master and its clients."""
+        return f"{self.control_dir}/%C"
+
+    def _ssh_options(self) -> List[str]:
+        options = [
+            "-o",
+            f"ControlPath={self.control_path}",
+            "-o",
+            "BatchMode=yes",
+        ]
+        if self.ssh_key_path:
+            options += ["-i", self.ssh_key_path]
+        # Push URLs carry no user: without -l, git's ssh would log in as the
+        # local user, miss the master (%C hashes the user) and authenticate anew
+        if self.username:
+            options += ["-l", self.username]
+        return options
+
+    def start(self, gerrit_url: str) -> None:
+        """
+        Start the master connection for a Gerrit host (once per host).
+
+        Args:
+            gerrit_url: Gerrit SSH URL
+
+        Raises:
+            RuntimeError: If the master connection cannot be established
+        """
+        destination = _ssh_destination(gerrit_url, self.username)
+        if destination in self._masters:
+            return
+
+        host, port = destination
+        command = ["ssh", "-M", "-N", "-f", "-p", str(port)]
+        command += self._ssh_options()
+        command += ["-o", f"ControlPersist={self.persist_seconds}", host]
+
+        logger.debug(f"Starting SSH master connection to {host}:{port}")
+        completed = subprocess.run(command, capture_output=True, text=True, check=False)
+        if completed.returncode != 0:
+            raise RuntimeError(
+                f"SSH master connection to {host} failed: {completed.stderr.strip()}"
+            )
+        self._masters.append(destination)
+
+    def git_env(self) -> Dict[str, str]:
+        """
+        Environment for git commands that should reuse the master connections.
+
+        Returns:
+            Environment variables to add to git subprocesses
+        """
+        ssh_command = ["ssh", "-o", "ControlMaster=auto"] + self._ssh_options()
+        return {"GIT_SSH_COMMAND": " ".join(shlex.quote(arg) for arg in ssh_command)}
+
+    def close(self) -> None:
+        """Shut down all master connections (safe to call more than once)."""
+        if self._closed:
+            return
+        self._closed = True
+
+        for host, port in self._masters:
+            logger.debug(f"Closing SSH master connection to {host}:{port}")
+            subprocess.run(
+                ["ssh", "-O", "exit", "-p", str(port), "-o", f"ControlPath={self.control_path}"]
+                + [host],
+                capture_output=True,
+                check=False,
+            )
+        self._masters.clear()
+        shutil.rmtree(self.control_dir, ignore_errors=True)
+        atexit.unregister(self.close)
+
+    def __enter__(self) -> "SshMultiplexer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class HttpAuthSession:
+    """
+    HTTP credentials configured once for every git command of a run.
+
+    The Authorization header is passed through GIT_CONFIG_* environment
+    variables, so credentials never appear on the command line and no
+    credential helper or prompt is involved per project.
+    """
+
+    def __init__(self, username: str, password: Optional[str] = None) -> None:
+        """
+        Initialize HTTP auth session.
+
+        Args:
+            username: HTTP username
+            password: HTTP password or token
+        """
+        token = base64.b64encode(f"{username}:{password or ''}".encode("utf-8")).decode("ascii")
+        self._env = {
+            "GIT_TERMINAL_PROMPT": "0",
+            "GIT_CONFIG_COUNT": "2",
+            "GIT_CONFIG_KEY_0": "http.extraHeader",
+            "GIT_CONFIG_VALUE_0": f"Authorization: Basic {token}",
+            "GIT_CONFIG_KEY_1": "credential.helper",
+            "GIT_CONFIG_VALUE_1": "",
+        }
+
+    def start(self, gerrit_url: str) -> None:
+        """No connection to set up for HTTP; kept for a uniform interface."""
+
+    def git_env(self) -> Dict[str, str]:
+        """
+        Environment for git commands that should use these credentials.
+
+        Returns:
+            Environment variables to add to git subprocesses
+        """
+        return dict(self._env)
+
+    def close(self) -> None:
+        """Nothing to tear down for HTTP."""
+
+    def __enter__(self) -> "HttpAuthSession":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+def create_transport(
+    delivery_config: "DeliveryConfig",
+) -> Union[SshMultiplexer, HttpAuthSession]:
+    """
+    Create the transport session for a delivery run and connect it.
+
+    Args:
+        delivery_config: Delivery configuration
+
+    Returns:
+        Transport session; use it as a context manager to tear it down
+    """
+    transport: Union[SshMultiplexer, HttpAuthSession]
+    if delivery_config.auth_method == "http":
+        transport = HttpAuthSession(delivery_config.username or "", delivery_config.password)
+    else:
+        transport = SshMultiplexer(
+            ssh_key_path=delivery_config.ssh_key_path, username=delivery_config.username
+        )
+
+    try:
+        transport.start(delivery_config.gerrit_url)
+    except Exception:
+        transport.close()
+        raise
+    return transport
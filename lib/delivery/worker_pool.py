@@ -0,0 +1,156 @@
+"""
+Bounded worker pool for concurrent project delivery.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Generic, Iterator, List, Optional, Sequence, TypeVar
+from urllib.parse import urlparse
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+def gerrit_host(url: str) -> str:
+    """
+    Extract host name from a Gerrit or remote URL.
+
+    Supports "ssh://user@host:29418/path", "https://host/path",
+    scp-like "user@host:path" and bare "host" forms.
+
+    Args:
+        url: Remote URL
+
+    Returns:
+        Lower-cased host name, or empty string if it cannot be determined
+    """
+    if not url:
+        return ""
+
+    if "://" in url:
+        return (urlparse(url).hostname or "").lower()
+
+    # scp-like "user@host:path" or bare "host[:port]"
+    host = url.split("@", 1)[-1]
+    host = host.split(":", 1)[0]
+    host = host.split("/", 1)[0]
+    return host.lower()
+
+
+class HostLimiter:
+    """Limits the number of concurrent operations per host."""
+
+    def __init__(self, per_host_limit: Optional[int] = None) -> None:
+        """
+        Initialize host limiter.
+
+        Args:
+            per_host_limit: Maximum concurrent operations per host (None for unlimited)
+        """
+        if per_host_limit is not None and per_host_limit < 1:
+            raise ValueError("per_host_limit must be at least 1")
+        self.per_host_limit = per_host_limit
+        self._semaphores: Dict[str, threading.BoundedSemaphore] = {}
+        self._lock = threading.Lock()
+
+    def _semaphore(self, host: str) -> threading.BoundedSemaphore:
+        with self._lock:
+            semaphore = self._semaphores.get(host)
+            if semaphore is None:
+                semaphore = threading.BoundedSemaphore(self.per_host_limit or 1)
+                self._semaphores[host] = semaphore
+            return semaphore
+
+    @contextmanager
+    def slot(self, host: str) -> Iterator[None]:
+        """
+        Hold one concurrency slot for host while the block runs.
+
+        Args:
+            host: Host name the operation talks to
+        """
+        if self.per_host_limit is None:
+            yield
+            return
+
+        semaphore = self._semaphore(host)
+        with semaphore:
+            yield
+
+
+@dataclass
+class TaskOutcome(Generic[T]):
+    """Outcome of running one item through the pool."""
+
+    item: T
+    result: Any = None
+    error: Optional[BaseException] = None
+
+    @property
+    def ok(self) -> bool:
+        """Whether the task finished without raising."""
+        return self.error is None
+
+
+class WorkerPool:
+    """
+    Bounded thread pool for network-bound per-project work (fetch + push).
+
+    Outcomes are returned in input order, so callers can update counters and
+    failed/skipped lists from a single thread and get the same result
+    regardless of which worker finished first.
+    """
+
+    def __init__(self, max_workers: int = 1, per_host_limit: Optional[int] = None) -> None:
+        """
+        Initialize worker pool.
+
+        Args:
+            max_workers: Maximum number of concurrent workers
+            per_host_limit: Maximum concurrent tasks per host (None for unlimited)
+        """
+        if max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_workers = max_workers
+        self.limiter = HostLimiter(per_host_limit)
+
+    def map(
+        self,
+        func: Callable[[T], R],
+        items: Sequence[T],
+        host_of: Optional[Callable[[T], str]] = None,
+    ) -> List[TaskOutcome[T]]:
+        """
+        Run func for every item and collect outcomes.
+
+        Exceptions raised by func are captured in the outcome instead of
+        aborting the remaining items.
+
+        Args:
+            func: Function to run for each item
+            items: Items to process
+            host_of: Function returning the host an item talks to (for per-host limit;
+                without it, func is expected to take self.limiter slots itself)
+
+        Returns:
+            List of outcomes, in the same order as items
+        """
+
+        def run(item: T) -> TaskOutcome[T]:
+            try:
+                if host_of is None:
+                    return TaskOutcome(item=item, result=func(item))
+                with self.limiter.slot(host_of(item)):
+                    return TaskOutcome(item=item, result=func(item))
+            except Exception as e:
+                return TaskOutcome(item=item, error=e)
+
+        if self.max_workers == 1 or len(items) <= 1:
+            return [run(item) for item in items]
+
+        with ThreadPoolExecutor(
+            max_workers=min(self.max_workers, len(items)),
+            thread_name_prefix="delivery",
+        ) as executor:
+            return list(executor.map(run, items))
@@ -0,0 +1,192 @@
+"""
+Disk-budgeted workspace with eager per-project cleanup.
+"""
+import logging
+import os
+import re
+import shutil
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, Optional
+
+logger = logging.getLogger(__name__)
+
+_SIZE_PATTERN = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)i?B?\s*$", re.IGNORECASE)
+_SIZE_UNITS = {"": 1, "K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+
+
+def parse_size(value: str) -> int:
+    """
+    Parse a byte size such as "512M", "20G" or "1.5GiB".
+
+    Args:
+        value: Size with an optional binary unit suffix
+
+    Returns:
+        Size in bytes
+
+    Raises:
+        ValueError: If the value is malformed
+    """
+    match = _SIZE_PATTERN.match(value)
+    if not match:
+        raise ValueError(f"Invalid size '{value}', expected e.g. 512M or 20G")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2).upper()])
+
+
+def format_size(size: int) -> str:
+    """Render a byte count with a binary unit, e.g. "1.5 GiB"."""
+    value = float(size)
+    for unit in ("B", "KiB", "MiB", "GiB"):
+        if value < 1024:
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024
+    return f"{value:.1f} TiB"
+
+
+def directory_size(path: Path) -> int:
+    """Total size in bytes of the files under path (0 if it doesn't exist)."""
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.lstat(os.path.join(root, name)).st_size
+            except OSError:
+                continue
+    return total
+
+
+class Reservation:
+    """Bytes of the workspace budget held by one project."""
+
+    def __init__(self, workspace: "Workspace", name: str, size: int) -> None:
+        """
+        Initialize reservation.
+
+        Args:
+            workspace: Owning workspace
+            name: Project name
+            size: Reserved bytes
+        """
+        self.workspace = workspace
+        self.name = name
+        self.size = size
+        self.path: Optional[Path] = None
+
+    def resize(self, size: int) -> None:
+        """
+        Replace the estimate with the measured size (e.g. after a fetch).
+
+        Args:
+            size: Bytes actually used
+        """
+        self.workspace._resize(self, size)
+
+    def measure(self) -> int:
+        """
+        Resize the reservation to the current size of its scratch directory.
+
+        Returns:
+            Measured bytes
+        """
+        size = directory_size(self.path) if self.path is not None else 0
+        self.resize(size)
+        return size
+
+
+class Workspace:
+    """
+    Scratch space shared by concurrent project deliveries.
+
+    Every project reserves its expected size before fetching; when the
+    reservations would exceed max_bytes, the reservation blocks until
+    earlier projects are pushed and their space is reclaimed. A project
+    is always admitted when nothing else is in use, so one repository
+    larger than the budget cannot stall the run. The peak usage is kept
+    for the summary.
+    """
+
+    def __init__(self, root: Path, max_bytes: Optional[int] = None) -> None:
+        """
+        Initialize workspace.
+
+        Args:
+            root: Directory holding per-project scratch directories
+            max_bytes: Budget in bytes (None for unlimited)
+        """
+        if max_bytes is not None and max_bytes < 0:
+            raise ValueError("max_bytes cannot be negative")
+        self.root = root
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.peak_bytes = 0
+        self._active = 0
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def reserve(self, name: str, estimate: int = 0) -> Iterator[Reservation]:
+        """
+        Hold budget for one project while it is being delivered.
+
+        Args:
+            name: Project name
+            estimate: Expected bytes (e.g. size from the previous run)
+
+        Yields:
+            Reservation; resize it once the actual size is known
+        """
+        estimate = max(0, estimate)
+        with self._condition:
+            while self._active and not self._fits(estimate):
+                logger.debug(f"Waiting for workspace space for {name}")
+                self._condition.wait()
+            self._active += 1
+            reservation = Reservation(self, name, 0)
+            self._add(reservation, estimate)
+        try:
+            yield reservation
+        finally:
+            with self._condition:
+                self._active -= 1
+                self._add(reservation, -reservation.size)
+                self._condition.notify_all()
+
+    @contextmanager
+    def scratch(self, name: str, estimate: int = 0) -> Iterator[Reservation]:
+        """
+        Create a project scratch directory, removed as soon as the block exits.
+
+        Call measure() on the reservation after fetching so the budget
+        reflects the real size while the project is pushed.
+
+        Args:
+            name: Project name
+            estimate: Expected bytes
+
+        Yields:
+            Reservation whose path is the empty scratch directory
+        """
+        path = self.root / re.sub(r"[^A-Za-z0-9._-]+", "_", name).strip("_")
+        with self.reserve(name, estimate) as reservation:
+            path.mkdir(parents=True, exist_ok=True)
+            reservation.path = path
+            try:
+                yield reservation
+            finally:
+                reservation.measure()
+                shutil.rmtree(path, ignore_errors=True)
+
+    def _fits(self, size: int) -> bool:
+        # A zero estimate still needs some free space
+        return self.max_bytes is None or self.used_bytes + max(size, 1) <= self.max_bytes
+
+    def _add(self, reservation: Reservation, delta: int) -> None:
+        reservation.size += delta
+        self.used_bytes += delta
+        self.peak_bytes = max(self.peak_bytes, self.used_bytes)
+
+    def _resize(self, reservation: Reservation, size: int) -> None:
+        with self._condition:
+            self._add(reservation, max(0, size) - reservation.size)
+            self._condition.notify_all()
@@ -0,0 +1,3 @@
+"""
+Manifest handling modules.
+"""
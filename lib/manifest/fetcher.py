@@ -0,0 +1,239 @@
+"""
+Lightweight manifest acquisition without `repo init`, with `repo init` as fallback.
+"""
+import logging
+import shutil
+import subprocess
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Callable, List, Optional, Set
+
+from lib.manifest.models import ManifestConfig
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MANIFEST_NAME = "default.xml"
+RESOLVED_MANIFEST_NAME = "manifest.resolved.xml"
+REPO_COMMAND = "repo"
+
+
+class ManifestFetchError(RuntimeError):
+    """Raised when the manifest cannot be fetched natively."""
+
+
+class ManifestFetcher:
+    """
+    Fetches only the manifest repository with a depth-1 git fetch.
+
+    Skips the repo launcher and .repo layout entirely. <include> elements
+    are inlined locally, producing a single manifest file that
+    ManifestParser can read.
+    """
+
+    def __init__(
+        self,
+        manifest_config: ManifestConfig,
+        work_dir: Path,
+        manifest_name: str = DEFAULT_MANIFEST_NAME,
+    ) -> None:
+        """
+        Initialize manifest fetcher.
+
+        Args:
+            manifest_config: Manifest configuration
+            work_dir: Working directory for the manifest checkout
+            manifest_name: Manifest file inside the repository
+        """
+        self.manifest_config = manifest_config
+        self.work_dir = work_dir
+        self.manifest_name = manifest_name
+        self.checkout_dir = work_dir / "manifest-repo"
+
+    @property
+    def ref(self) -> str:
+        """Ref fetched from the manifest repository."""
+        if self.manifest_config.tag:
+            return f"refs/tags/{self.manifest_config.tag}"
+        if self.manifest_config.branch:
+            return f"refs/heads/{self.manifest_config.branch}"
+        return "HEAD"
+
+    def fetch(self) -> Path:
+        """
+        Fetch the manifest and resolve includes.
+
+        Returns:
+            Path of the resolved single-file manifest
+
+        Raises:
+            ManifestFetchError: If fetching or resolving fails
+        """
+        if self.checkout_dir.exists():
+            shutil.rmtree(self.checkout_dir)
+        self.checkout_dir.mkdir(parents=True)
+
+        logger.info(f"Fetching manifest {self.manifest_config.repo_url} ({self.ref})")
+        self._git("init", "-q")
+        self._git("fetch", "-q", "--depth", "1", self.manifest_config.repo_url, self.ref)
+        self._git("checkout", "-q", "FETCH_HEAD")
+
+        manifest_path = self.checkout_dir / self.manifest_name
+        if not manifest_path.exists():
+            raise ManifestFetchError(f"Manifest file not found in repository: {self.manifest_name}")
+
+        try:
+            root = self.resolve_includes(manifest_path)
+        except (ET.ParseError, OSError, ValueError) as e:
+            raise ManifestFetchError(f"Failed to resolve manifest includes: {e}") from e
+
+        resolved = self.work_dir / RESOLVED_MANIFEST_NAME
+        ET.ElementTree(root).write(resolved, encoding="UTF-8", xml_declaration=True)
+        return resolved
+
+    def resolve_includes(self, manifest_path: Path) -> ET.Element:
+        """
+        Load a manifest with its <include> elements inlined.
+
+        Include names are relative to the manifest repository root, as
+        with `repo`.
+
+        Args:
+            manifest_path: Top-level manifest file
+
+        Returns:
+            Root element of the merged manifest
+
+        Raises:
+            ValueError: If includes are recursive
+            FileNotFoundError: If an included file doesn't exist
+        """
+        return self._load(manifest_path, set())
+
+    def _load(self, path: Path, seen: Set[Path]) -> ET.Element:
+        resolved = path.resolve()
+        if resolved in seen:
+            raise ValueError(f"Recursive manifest include: {path.name}")
+        seen = seen | {resolved}
+
+        root = ET.parse(path).getroot()
+        children: List[ET.Element] = []
+        for child in list(root):
+            if child.tag == "include":
+                include_path = self.checkout_dir / child.get("name", "")
+                if not include_path.is_file():
+                    raise FileNotFoundError(f"Included manifest not found: {include_path.name}")
+                children.extend(self._load(include_path, seen))
+            else:
+                children.append(child)
+
+        root[:] = children
+        return root
+
+    def _git(self, *args: str) -> None:
+        completed = subprocess.run(
+            ["git", *args], cwd=self.checkout_dir, capture_output=True, text=True, check=False
+        )
+        if completed.returncode != 0:
+            raise ManifestFetchError(f"git {args[0]} failed: {completed.stderr.strip()}")
+
+
+class RepoInitFetcher:
+    """
+    Fetches the manifest with the repo tool, as a full `repo init` does.
+
+    Slower than ManifestFetcher (launcher download, .repo layout) but
+    understands everything `repo` does; `repo manifest -o` writes the
+    merged manifest with includes inlined.
+    """
+
+    def __init__(
+        self,
+        manifest_config: ManifestConfig,
+        work_dir: Path,
+        manifest_name: str = DEFAULT_MANIFEST_NAME,
+        repo_command: str = REPO_COMMAND,
+    ) -> None:
+        """
+        Initialize repo init fetcher.
+
+        Args:
+            manifest_config: Manifest configuration
+            work_dir: Working directory for the repo client
+            manifest_name: Manifest file inside the repository
+            repo_command: repo launcher executable
+        """
+        self.manifest_config = manifest_config
+        self.work_dir = work_dir
+        self.manifest_name = manifest_name
+        self.repo_command = repo_command
+        self.client_dir = work_dir / "repo-client"
+
+    def fetch(self) -> Path:
+        """
+        Run `repo init` and export the merged manifest.
+
+        Returns:
+            Path of the resolved single-file manifest
+
+        Raises:
+            ManifestFetchError: If repo is missing or fails
+        """
+        if self.client_dir.exists():
+            shutil.rmtree(self.client_dir)
+        self.client_dir.mkdir(parents=True)
+
+        args = ["init", "-q", "-u", self.manifest_config.repo_url, "-m", self.manifest_name]
+        if self.manifest_config.tag:
+            args += ["-b", f"refs/tags/{self.manifest_config.tag}"]
+        elif self.manifest_config.branch:
+            args += ["-b", self.manifest_config.branch]
+
+        logger.info(f"Running repo init for {self.manifest_config.repo_url}")
+        self._repo(*args)
+        resolved = self.work_dir / RESOLVED_MANIFEST_NAME
+        self._repo("manifest", "-o", str(resolved))
+        return resolved
+
+    def _repo(self, *args: str) -> None:
+        try:
+            completed = subprocess.run(
+                [self.repo_command, *args],
+                cwd=self.client_dir,
+                capture_output=True,
+                text=True,
+                check=False,
+            )
+        except OSError as e:
+            raise ManifestFetchError(f"Cannot run {self.repo_command}: {e}") from e
+        if completed.returncode != 0:
+            raise ManifestFetchError(f"repo {args[0]} failed: {completed.stderr.strip()}")
+
+
+def fetch_manifest(
+    manifest_config: ManifestConfig,
+    work_dir: Path,
+    fallback: Optional[Callable[[], Path]] = None,
+    manifest_name: str = DEFAULT_MANIFEST_NAME,
+) -> Path:
+    """
+    Get the manifest natively, falling back to `repo init` on failure.
+
+    Args:
+        manifest_config: Manifest configuration
+        work_dir: Working directory
+        fallback: Function performing the `repo init` based download
+        manifest_name: Manifest file inside the repository
+
+    Returns:
+        Path of a manifest file ready for ManifestParser
+
+    Raises:
+        ManifestFetchError: If the native fetch fails and there is no fallback
+    """
+    try:
+        return ManifestFetcher(manifest_config, work_dir, manifest_name).fetch()
+    except ManifestFetchError as e:
+        if fallback is None:
+            raise
+        logger.warning(f"Native manifest fetch failed ({e}), falling back to repo init")
+        return fallback()
@@ -0,0 +1,242 @@
+"""
+Cache of parsed manifests keyed by manifest commit SHA.
+"""
+import dataclasses
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional
+
+from lib.manifest.models import ManifestConfig, Project
+from util.git_refs import ls_remote, resolve_revision
+
+logger = logging.getLogger(__name__)
+
+CACHE_FORMAT_VERSION = 2
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Cache directory inside a work dir
+MANIFEST_CACHE_DIR_NAME = "manifest-cache"
+
+
+def _project_fields(project: Project) -> Dict[str, Any]:
+    if dataclasses.is_dataclass(project):
+        return {
+            f.name: getattr(project, f.name) for f in dataclasses.fields(project) if f.init
+        }
+    return {"name": project.name, "path": project.path, "revision": project.revision}
+
+
+@dataclass
+class CachedManifest:
+    """Cache entry of one manifest commit."""
+
+    projects: List[Project]
+    # Remote fetch URL of each project, by project path
+    remote_urls: Dict[str, str] = field(default_factory=dict)
+    # Copy of the resolved manifest file, if one was stored
+    manifest_path: Optional[Path] = None
+
+
+class ManifestCache:
+    """
+    On-disk cache of parsed project lists.
+
+    The manifest ref is resolved to a commit SHA with one `git ls-remote`;
+    when that SHA was seen before, the already parsed project list (with
+    includes and defaults resolved) is loaded from disk instead of running
+    `repo init` and parsing the XML again. Least recently used entries are
+    evicted once the cache exceeds max_bytes.
+    """
+
+    def __init__(self, cache_dir: Path, max_bytes: int = DEFAULT_MAX_BYTES) -> None:
+        """
+        Initialize manifest cache.
+
+        Args:
+            cache_dir: Directory holding cache entries
+            max_bytes: Maximum total size of cache entries
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes cannot be negative")
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def resolve_sha(manifest_config: ManifestConfig) -> Optional[str]:
+        """
+        Resolve the configured manifest branch/tag to a commit SHA.
+
+        Args:
+            manifest_config: Manifest configuration
+
+        Returns:
+            Commit SHA, or None if the ref does not exist
+
+        Raises:
+            RuntimeError: If the remote query fails
+        """
+        if manifest_config.tag:
+            patterns = [f"refs/tags/{manifest_config.tag}"]
+            revision = f"refs/tags/{manifest_config.tag}"
+        elif manifest_config.branch:
+            patterns = [f"refs/heads/{manifest_config.branch}"]
+            revision = f"refs/heads/{manifest_config.branch}"
+        else:
+            patterns = ["HEAD"]
+            revision = "HEAD"
+
+        refs = ls_remote(manifest_config.repo_url, patterns)
+        if revision == "HEAD":
+            return refs.get("HEAD")
+        return resolve_revision(refs, revision)
+
+    @staticmethod
+    def key(manifest_config: ManifestConfig, sha: str) -> str:
+        """
+        Build the cache key of a manifest commit.
+
+        Settings that change the parsed result (repository URL, default
+        revision) are part of the key.
+
+        Args:
+            manifest_config: Manifest configuration
+            sha: Manifest commit SHA
+
+        Returns:
+            Cache key
+        """
+        settings = f"{manifest_config.repo_url}\0{manifest_config.default_revision or ''}"
+        digest = hashlib.sha1(settings.encode("utf-8")).hexdigest()[:12]
+        return f"{sha}-{digest}"
+
+    def _entry_path(self, key: str) -> Path:
+        return self.cache_dir / f"{key}.json"
+
+    def load(self, key: str) -> Optional[List[Project]]:
+        """
+        Load a cached project list.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Projects, or None on a cache miss
+        """
+        entry = self.load_manifest(key)
+        return entry.projects if entry is not None else None
+
+    def load_manifest(self, key: str) -> Optional[CachedManifest]:
+        """
+        Load a cache entry with its remote URLs and manifest copy.
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Cache entry, or None on a cache miss
+        """
+        path = self._entry_path(key)
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning(f"Discarding unreadable manifest cache entry {path.name}: {e}")
+            path.unlink(missing_ok=True)
+            return None
+
+        if data.get("version") != CACHE_FORMAT_VERSION:
+            return None
+
+        manifest_path: Optional[Path] = path.with_suffix(".xml")
+        if not data.get("manifest") or not manifest_path.is_file():
+            manifest_path = None
+
+        now = time.time()
+        os.utime(path, (now, now))
+        logger.debug(f"Manifest cache hit for {key}")
+        return CachedManifest(
+            projects=[Project(**fields) for fields in data["projects"]],
+            remote_urls=data.get("remote_urls", {}),
+            manifest_path=manifest_path,
+        )
+
+    def store(
+        self,
+        key: str,
+        projects: Iterable[Project],
+        remote_urls: Optional[Dict[str, str]] = None,
+        manifest_path: Optional[Path] = None,
+    ) -> None:
+        """
+        Store a parsed project list.
+
+        Args:
+            key: Cache key
+            projects: Parsed projects
+            remote_urls: Remote fetch URL of each project, by project path
+            manifest_path: Resolved manifest file to keep a copy of
+        """
+        path = self._entry_path(key)
+        if manifest_path is not None:
+            tmp_copy = path.with_name(f"{key}.xml.{os.getpid()}.tmp")
+            shutil.copyfile(manifest_path, tmp_copy)
+            os.replace(tmp_copy, path.with_suffix(".xml"))
+        payload = {
+            "version": CACHE_FORMAT_VERSION,
+            "projects": [_project_fields(project) for project in projects],
+            "remote_urls": remote_urls or {},
+            "manifest": manifest_path is not None,
+        }
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(payload, separators=(",", ":")), encoding="utf-8")
+        os.replace(tmp_path, path)
+        self.evict(keep=path)
+
+    def invalidate(self, key: str) -> None:
+        """Remove a cache entry (e.g. to force a refresh)."""
+        self._entry_path(key).unlink(missing_ok=True)
+        self._entry_path(key).with_suffix(".xml").unlink(missing_ok=True)
+
+    def evict(self, keep: Optional[Path] = None) -> List[Path]:
+        """
+        Evict least recently used entries until the cache fits max_bytes.
+
+        Args:
+            keep: Entry that must not be evicted
+
+        Returns:
+            Paths of evicted entries
+        """
+        entries = []
+        for path in self.cache_dir.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            size = stat.st_size
+            try:
+                size += path.with_suffix(".xml").stat().st_size
+            except FileNotFoundError:
+                pass
+            entries.append((stat.st_mtime, path, size))
+        entries.sort()
+
+        total = sum(size for _, _, size in entries)
+        evicted: List[Path] = []
+        for _, path, size in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            path.unlink(missing_ok=True)
+            path.with_suffix(".xml").unlink(missing_ok=True)
+            total -= size
+            evicted.append(path)
+        return evicted
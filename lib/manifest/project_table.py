@@ -0,0 +1,230 @@
+"""
+Compact columnar storage of manifest projects with lookup indexes.
+"""
+import sys
+from array import array
+from typing import Callable, Dict, Iterable, Iterator, List, NamedTuple, Optional, Tuple
+
+from lib.manifest.models import Project
+from util.manifest_filter import KEPT_CATEGORIES, REVISION_CATEGORIES, classify_revision
+
+
+class ProjectRecord(NamedTuple):
+    """Lightweight read-only view of one project row."""
+
+    name: str
+    path: str
+    revision: Optional[str]
+    remote: Optional[str]
+
+
+def _intern(value: Optional[str]) -> Optional[str]:
+    return sys.intern(value) if value is not None else None
+
+
+class ProjectTable:
+    """
+    Columnar table of manifest projects.
+
+    Each attribute is stored in its own list; revision and remote strings
+    are interned since thousands of projects share a handful of values.
+    Hash indexes give constant-time lookup by name, path and revision,
+    and views select rows by index without copying project data.
+    """
+
+    def __init__(self) -> None:
+        """Initialize an empty table."""
+        self._names: List[str] = []
+        self._paths: List[str] = []
+        self._revisions: List[Optional[str]] = []
+        self._remotes: List[Optional[str]] = []
+        self._by_name: Dict[str, List[int]] = {}
+        self._by_path: Dict[str, int] = {}
+        self._by_revision: Dict[Optional[str], List[int]] = {}
+
+    @classmethod
+    def from_projects(cls, projects: Iterable[Project]) -> "ProjectTable":
+        """
+        Build a table from projects (a list or a streaming iterator).
+
+        Args:
+            projects: Projects to store
+
+        Returns:
+            Populated table
+        """
+        table = cls()
+        for project in projects:
+            table.append(
+                project.name, project.path, project.revision, getattr(project, "remote", None)
+            )
+        return table
+
+    def append(
+        self, name: str, path: str, revision: Optional[str] = None, remote: Optional[str] = None
+    ) -> int:
+        """
+        Append a project row.
+
+        Args:
+            name: Project name
+            path: Checkout path (unique within a manifest)
+            revision: Revision
+            remote: Remote name
+
+        Returns:
+            Row index
+
+        Raises:
+            ValueError: If name or path is empty, or path is already used
+        """
+        if not name:
+            raise ValueError("Project name cannot be empty")
+        if not path:
+            raise ValueError("Project path cannot be empty")
+        if path in self._by_path:
+            raise ValueError(f"Duplicate project path: {path}")
+
+        row = len(self._names)
+        revision = _intern(revision)
+        self._names.append(name)
+        self._paths.append(path)
+        self._revisions.append(revision)
+        self._remotes.append(_intern(remote))
+        self._by_name.setdefault(name, []).append(row)
+        self._by_path[path] = row
+        self._by_revision.setdefault(revision, []).append(row)
+        return row
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def __iter__(self) -> Iterator[ProjectRecord]:
+        return (self.record(row) for row in range(len(self._names)))
+
+    def record(self, row: int) -> ProjectRecord:
+        """
+        Get a row as a record.
+
+        Args:
+            row: Row index
+
+        Returns:
+            Project record
+        """
+        return ProjectRecord(
+            self._names[row], self._paths[row], self._revisions[row], self._remotes[row]
+        )
+
+    def to_project(self, row: int) -> Project:
+        """
+        Materialize a row as a Project.
+
+        Args:
+            row: Row index
+
+        Returns:
+            Project object
+        """
+        return Project(name=self._names[row], path=self._paths[row], revision=self._revisions[row])
+
+    def get_by_path(self, path: str) -> Optional[ProjectRecord]:
+        """Look up the project checked out at path."""
+        row = self._by_path.get(path)
+        return self.record(row) if row is not None else None
+
+    def find_by_name(self, name: str) -> List[ProjectRecord]:
+        """Look up all rows of a project name (a name may be checked out at several paths)."""
+        return [self.record(row) for row in self._by_name.get(name, ())]
+
+    def rows_with_revision(self, revision: Optional[str]) -> List[int]:
+        """Row indexes of projects using revision."""
+        return list(self._by_revision.get(revision, ()))
+
+    def duplicate_names(self) -> Dict[str, List[str]]:
+        """
+        Project names that appear more than once.
+
+        Returns:
+            Mapping of name to the paths it is checked out at
+        """
+        return {
+            name: [self._paths[row] for row in rows]
+            for name, rows in self._by_name.items()
+            if len(rows) > 1
+        }
+
+    def view(self, rows: Optional[Iterable[int]] = None) -> "ProjectTableView":
+        """
+        Create a view over selected rows (all rows by default).
+
+        Args:
+            rows: Row indexes
+
+        Returns:
+            View sharing this table's storage
+        """
+        if rows is None:
+            rows = range(len(self._names))
+        return ProjectTableView(self, array("l", rows))
+
+    def filter_by_revision(self) -> Tuple["ProjectTableView", Dict[str, int]]:
+        """
+        Select rows with deliverable revisions (exclude hash and empty).
+
+        Each distinct revision is classified once through the revision
+        index, instead of once per project.
+
+        Returns:
+            Tuple of (view of kept rows in table order, counts per revision category)
+        """
+        counts = {category: 0 for category in REVISION_CATEGORIES}
+        kept: List[int] = []
+        for revision, rows in self._by_revision.items():
+            category = classify_revision(revision)
+            counts[category] += len(rows)
+            if category in KEPT_CATEGORIES:
+                kept.extend(rows)
+        kept.sort()
+        return self.view(kept), counts
+
+
+class ProjectTableView:
+    """Row selection over a ProjectTable; holds indexes only."""
+
+    def __init__(self, table: ProjectTable, rows: "array[int]") -> None:
+        """
+        Initialize view.
+
+        Args:
+            table: Underlying table
+            rows: Selected row indexes
+        """
+        self.table = table
+        self.rows = rows
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[ProjectRecord]:
+        record = self.table.record
+        return (record(row) for row in self.rows)
+
+    def filter(self, predicate: Callable[[ProjectRecord], bool]) -> "ProjectTableView":
+        """
+        Narrow the view.
+
+        Args:
+            predicate: Function returning True for records to keep
+
+        Returns:
+            New view over the matching rows
+        """
+        record = self.table.record
+        return ProjectTableView(
+            self.table, array("l", (row for row in self.rows if predicate(record(row))))
+        )
+
+    def to_projects(self) -> List[Project]:
+        """Materialize the selected rows as Project objects."""
+        return [self.table.to_project(row) for row in self.rows]
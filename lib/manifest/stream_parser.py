@@ -0,0 +1,96 @@
+"""
+Streaming parser for very large repo manifest XML files.
+"""
+import xml.etree.ElementTree as ET
+from pathlib import Path
+from typing import Iterator, Optional, Set
+
+from lib.manifest.models import Project
+
+
+class StreamingManifestParser:
+    """
+    Incremental manifest parser.
+
+    Yields projects as their elements are closed instead of building the
+    whole tree first, and clears parsed elements along the way so memory
+    stays flat for manifests with tens of thousands of projects.
+    """
+
+    def __init__(self, manifest_path: Path) -> None:
+        """
+        Initialize streaming parser.
+
+        Args:
+            manifest_path: Path to manifest XML file
+
+        Raises:
+            FileNotFoundError: If manifest file doesn't exist
+        """
+        self.manifest_path = manifest_path
+        if not manifest_path.exists():
+            raise FileNotFoundError(f"Manifest file not found: {manifest_path}")
+
+        self.default_revision: Optional[str] = None
+        self.default_remote: Optional[str] = None
+
+    def iter_projects(self) -> Iterator[Project]:
+        """
+        Iterate over projects in document order.
+
+        <include> elements are resolved relative to the manifest directory
+        and streamed in place. <default> values apply to the projects that
+        follow them; each call starts over without the defaults of a
+        previous iteration.
+
+        Yields:
+            Project objects
+
+        Raises:
+            ET.ParseError: If XML parsing fails
+            FileNotFoundError: If an included manifest doesn't exist
+        """
+        self.default_revision = None
+        self.default_remote = None
+        yield from self._iter_file(self.manifest_path, set())
+
+    def _iter_file(self, path: Path, seen: Set[Path]) -> Iterator[Project]:
+        resolved = path.resolve()
+        if resolved in seen:
+            raise ValueError(f"Recursive manifest include: {path}")
+        seen = seen | {resolved}
+
+        context = ET.iterparse(str(path), events=("start", "end"))
+        _, root = next(context)
+
+        for event, element in context:
+            if event != "end" or element.tag == root.tag:
+                continue
+
+            if element.tag == "default":
+                self.default_revision = element.get("revision", self.default_revision)
+                self.default_remote = element.get("remote", self.default_remote)
+            elif element.tag == "include":
+                include_path = path.parent / element.get("name", "")
+                if not include_path.exists():
+                    raise FileNotFoundError(f"Included manifest not found: {include_path}")
+                yield from self._iter_file(include_path, seen)
+            elif element.tag == "project":
+                project = self._to_project(element)
+                if project is not None:
+                    yield project
+
+            # Only direct children of <manifest> are complete here; drop them
+            if element in root:
+                root.remove(element)
+
+    def _to_project(self, element: ET.Element) -> Optional[Project]:
+        name = element.get("name")
+        if not name:
+            return None
+
+        return Project(
+            name=name,
+            path=element.get("path") or name,
+            revision=element.get("revision") or self.default_revision,
+        )
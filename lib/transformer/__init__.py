@@ -0,0 +1,3 @@
+"""
+Name transformers.
+"""
@@ -0,0 +1,258 @@
+"""
+Rule-based name transformation for target branches and repositories.
+"""
+import re
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+DEFAULT_DATE_FORMAT = "%y%m%d"
+
+_TEMPLATE_GROUP = re.compile(r"\\(?:g<([^>]*)>|(\d+))")
+# Unescaped numeric group reference, e.g. \1 (but not \\1)
+_NUMERIC_GROUP = re.compile(r"(?<!\\)((?:\\\\)*)\\(\d+)")
+
+_run_date: Optional[datetime] = None
+_run_date_lock = threading.Lock()
+
+
+def run_date() -> datetime:
+    """
+    Date of the current run, pinned on first use.
+
+    Every configuration of a run stamps names with the same date, even
+    if the run crosses midnight.
+
+    Returns:
+        Time of the first call in this process
+    """
+    global _run_date
+    with _run_date_lock:
+        if _run_date is None:
+            _run_date = datetime.now()
+        return _run_date
+
+
+@dataclass(frozen=True)
+class TransformRule:
+    """Regex substitution applied to a name."""
+
+    pattern: Pattern[str]
+    template: str
+    stop: bool = False
+
+    def apply(self, name: str) -> Tuple[str, bool]:
+        """
+        Substitute the first match of the pattern.
+
+        Args:
+            name: Name to transform
+
+        Returns:
+            Tuple of (new name, whether the pattern matched)
+        """
+        result, count = self.pattern.subn(self.template, name, count=1)
+        return result, count > 0
+
+
+def _check_template(pattern: Pattern[str], template: str) -> None:
+    for match in _TEMPLATE_GROUP.finditer(template):
+        group = match.group(1) if match.group(1) is not None else match.group(2)
+        if group.isdigit():
+            if int(group) > pattern.groups:
+                raise ValueError(f"Template refers to missing group {group}: {template}")
+        elif group not in pattern.groupindex:
+            raise ValueError(f"Template refers to unknown group '{group}': {template}")
+
+
+def compile_rules(specs: Sequence[Dict[str, Any]], date_stamp: str) -> List[TransformRule]:
+    """
+    Compile rule specifications from the configuration.
+
+    Each specification has a `match` regex, a `replace` template
+    (re.sub syntax, e.g. "\\1" or "\\g<name>", plus "{date}" for the run
+    date) and an optional `stop` flag ending the rule list once the
+    rule matched.
+
+    Args:
+        specs: Rule specifications in application order
+        date_stamp: Formatted run date substituted for "{date}"
+
+    Returns:
+        Compiled rules
+
+    Raises:
+        ValueError: If a rule is malformed
+    """
+    rules: List[TransformRule] = []
+    for number, spec in enumerate(specs, 1):
+        if not isinstance(spec, dict) or "match" not in spec or "replace" not in spec:
+            raise ValueError(f"Rule {number} needs 'match' and 'replace'")
+        unknown = set(spec) - {"match", "replace", "stop"}
+        if unknown:
+            raise ValueError(f"Rule {number} has unknown keys: {sorted(unknown)}")
+        try:
+            pattern = re.compile(str(spec["match"]))
+        except re.error as e:
+            raise ValueError(f"Rule {number} has an invalid pattern: {e}") from None
+        # "\1{date}" must not turn into a reference to group 1240102
+        template = _NUMERIC_GROUP.sub(r"\1\\g<\2>", str(spec["replace"]))
+        template = template.replace("{date}", date_stamp.replace("\\", "\\\\"))
+        _check_template(pattern, template)
+        rules.append(TransformRule(pattern, template, bool(spec.get("stop", False))))
+    return rules
+
+
+def date_suffix_rules() -> List[Dict[str, Any]]:
+    """Rules of the `branch_transform` preset: append the run date."""
+    return [{"match": r"^(.+)$", "replace": r"\g<1>{date}"}]
+
+
+def alias_rules(alias: str) -> List[Dict[str, Any]]:
+    """
+    Rules of the `repo_alias` preset: insert alias before the last path part.
+
+    Args:
+        alias: Alias to insert
+
+    Returns:
+        Rule specifications
+    """
+    alias = alias.replace("\\", "\\\\")
+    return [
+        {"match": r"^(.*)/([^/]+)$", "replace": rf"\g<1>/{alias}/\g<2>", "stop": True},
+        {"match": r"^([^/]+)$", "replace": rf"{alias}/\g<1>"},
+    ]
+
+
+class NameTransformer:
+    """
+    Applies an ordered list of rules to names.
+
+    Results are memoized: the rules and the run date are fixed, so each
+    distinct name is transformed once per run.
+    """
+
+    def __init__(self, rules: Sequence[TransformRule] = ()) -> None:
+        """
+        Initialize name transformer.
+
+        Args:
+            rules: Compiled rules in application order
+        """
+        self.rules = list(rules)
+        self._cache: Dict[str, str] = {}
+
+    def transform(self, name: str) -> str:
+        """
+        Transform a name.
+
+        Args:
+            name: Branch or repository name
+
+        Returns:
+            Transformed name (empty names are returned unchanged)
+        """
+        if not name or not self.rules:
+            return name
+        result = self._cache.get(name)
+        if result is None:
+            result = name
+            for rule in self.rules:
+                result, matched = rule.apply(result)
+                if matched and rule.stop:
+                    break
+            self._cache[name] = result
+        return result
+
+    def transform_revision(self, revision: Optional[str]) -> Optional[str]:
+        """
+        Transform a revision (branch name), keeping None.
+
+        Args:
+            revision: Revision or None
+
+        Returns:
+            Transformed revision or None
+        """
+        if revision is None:
+            return None
+        return self.transform(revision)
+
+    def transform_many(self, names: Iterable[str]) -> List[str]:
+        """
+        Transform names in bulk.
+
+        Args:
+            names: Names to transform
+
+        Returns:
+            Transformed names in input order
+        """
+        return [self.transform(name) for name in names]
+
+
+@dataclass
+class NameTransforms:
+    """Branch and repository transformers of one configuration."""
+
+    branch: NameTransformer
+    repo: NameTransformer
+    # True if explicit rule lists are configured (not just the presets)
+    custom: bool = False
+
+    @classmethod
+    def from_config(
+        cls,
+        data: Optional[Dict[str, Any]] = None,
+        branch_transform: bool = False,
+        repo_alias: Optional[str] = None,
+        now: Optional[datetime] = None,
+    ) -> "NameTransforms":
+        """
+        Compile the `transform` section of a delivery configuration.
+
+        `branch_transform` and `repo_alias` are presets for the branch and
+        repository rule lists; each can be replaced by an explicit list
+        but not combined with one.
+
+        Args:
+            data: `transform` section (date_format, branch and repo rule lists)
+            branch_transform: Append the run date to branch names
+            repo_alias: Alias inserted into repository names
+            now: Date stamped into names (default: run_date())
+
+        Returns:
+            Compiled transformers
+
+        Raises:
+            ValueError: If the section is malformed
+        """
+        data = data or {}
+        if not isinstance(data, dict):
+            raise ValueError("'transform' must be a mapping")
+        unknown = set(data) - {"date_format", "branch", "repo"}
+        if unknown:
+            raise ValueError(f"Unknown keys in 'transform': {sorted(unknown)}")
+        if branch_transform and "branch" in data:
+            raise ValueError("Use either 'branch_transform' or 'transform.branch', not both")
+        if repo_alias and "repo" in data:
+            raise ValueError("Use either 'repo_alias' or 'transform.repo', not both")
+
+        date_stamp = (now or run_date()).strftime(data.get("date_format", DEFAULT_DATE_FORMAT))
+        branch_specs = data.get("branch", date_suffix_rules() if branch_transform else [])
+        repo_specs = data.get("repo", alias_rules(repo_alias) if repo_alias else [])
+        for key, specs in (("branch", branch_specs), ("repo", repo_specs)):
+            if not isinstance(specs, list):
+                raise ValueError(f"'transform.{key}' must be a list of rules")
+
+        try:
+            branch = NameTransformer(compile_rules(branch_specs, date_stamp))
+        except ValueError as e:
+            raise ValueError(f"Invalid branch rule: {e}") from None
+        try:
+            repo = NameTransformer(compile_rules(repo_specs, date_stamp))
+        except ValueError as e:
+            raise ValueError(f"Invalid repo rule: {e}") from None
+        return cls(branch=branch, repo=repo, custom="branch" in data or "repo" in data)
@@ -0,0 +1,123 @@
+"""
+Tests for checkout-free bare push.
+"""
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from lib.delivery.bare_push import BarePusher
+from lib.manifest.models import Project
+from lib.transformer.branch_transformer import BranchTransformer
+from lib.transformer.repo_transformer import RepoTransformer
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def mirror(tmp_path: Path) -> Path:
+    """Create a bare mirror with a branch and an annotated tag."""
+    work = tmp_path / "work"
+    work.mkdir()
+    _git(work, "init", "-q", "-b", "main")
+    (work / "file.txt").write_text("content\n")
+    _git(work, "add", "file.txt")
+    _git(work, "commit", "-q", "-m", "initial")
+    _git(work, "tag", "-a", "v1.0", "-m", "release")
+
+    mirror_path = tmp_path / "mirror.git"
+    _git(tmp_path, "clone", "-q", "--mirror", str(work), str(mirror_path))
+    return mirror_path
+
+
+@pytest.fixture
+def gerrit(tmp_path: Path) -> Path:
+    """Create a directory of bare repositories standing in for Gerrit."""
+    root = tmp_path / "gerrit"
+    for name in ("platform/build", "platform/alias/build"):
+        repo = root / name
+        repo.mkdir(parents=True)
+        _git(repo, "init", "-q", "--bare")
+    return root
+
+
+class TestBarePusher:
+    """Tests for BarePusher."""
+
+    def test_push_branch(self, mirror: Path, gerrit: Path) -> None:
+        """Test a branch revision is pushed to the transformed target."""
+        pusher = BarePusher(str(gerrit), BranchTransformer(), RepoTransformer(alias="alias"))
+        project = Project(name="platform/build", path="build", revision="main")
+
+        target = pusher.push(mirror, project)
+
+        assert target.repo == "platform/alias/build"
+        assert target.refspec == f"{target.source_sha}:refs/heads/main"
+        assert _git(gerrit / "platform/alias/build", "rev-parse", "refs/heads/main") == (
+            target.source_sha
+        )
+
+    def test_push_tag_as_branch(self, mirror: Path, gerrit: Path) -> None:
+        """Test a tag revision is pushed as a branch pointing at the commit."""
+        pusher = BarePusher(str(gerrit), BranchTransformer(), RepoTransformer())
+        project = Project(name="platform/build", path="build", revision="v1.0")
+
+        target = pusher.push(mirror, project)
+
+        assert target.source_sha == _git(mirror, "rev-parse", "refs/heads/main")
+        assert _git(gerrit / "platform/build", "rev-parse", "refs/heads/v1.0") == (
+            target.source_sha
+        )
+
+    def test_push_tag_ref_as_tag(self, mirror: Path, gerrit: Path) -> None:
+        """Test a refs/tags/ revision is pushed as the same tag, not as a branch."""
+        pusher = BarePusher(
+            str(gerrit), BranchTransformer(add_date_suffix=True), RepoTransformer()
+        )
+        project = Project(name="platform/build", path="build", revision="refs/tags/v1.0")
+
+        target = pusher.push(mirror, project)
+
+        assert pusher.target_names(project) == ("platform/build", "refs/tags/v1.0")
+        assert target.refspec == f"{target.source_sha}:refs/tags/v1.0"
+        assert _git(gerrit / "platform/build", "rev-parse", "refs/tags/v1.0^{commit}") == (
+            target.source_sha
+        )
+        assert _git(gerrit / "platform/build", "for-each-ref", "refs/heads") == ""
+
+    def test_branch_transform(self, mirror: Path, gerrit: Path) -> None:
+        """Test branch transformer is honored for the target branch."""
+        pusher = BarePusher(
+            str(gerrit), BranchTransformer(add_date_suffix=True), RepoTransformer()
+        )
+        project = Project(name="platform/build", path="build", revision="main")
+
+        target = pusher.resolve(mirror, project)
+
+        assert target.branch.startswith("main")
+        assert len(target.branch) == len("main") + 6
+
+    def test_dry_run(self, mirror: Path, gerrit: Path) -> None:
+        """Test dry-run does not push."""
+        pusher = BarePusher(str(gerrit), BranchTransformer(), RepoTransformer())
+        project = Project(name="platform/build", path="build", revision="main")
+
+        pusher.push(mirror, project, dry_run=True)
+
+        assert _git(gerrit / "platform/build", "for-each-ref") == ""
+
+    def test_missing_revision(self, mirror: Path, gerrit: Path) -> None:
+        """Test unknown revision raises error."""
+        pusher = BarePusher(str(gerrit), BranchTransformer(), RepoTransformer())
+        project = Project(name="platform/build", path="build", revision="develop")
+
+        with pytest.raises(RuntimeError, match="not found"):
+            pusher.push(mirror, project)
@@ -0,0 +1,797 @@
+"""
+Tests for multi-config batch delivery.
+"""
+import contextlib
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+import pytest
+
+from benchmarks.synthetic import create_local_repos
+from lib.delivery import batch as batch_module
+from lib.delivery import transport as transport_module
+from lib.delivery.bare_push import BarePusher, PushTarget
+from lib.delivery.batch import (
+    DEFAULT_MAX_WORKERS,
+    BatchConfig,
+    BatchDelivery,
+    FetchPlan,
+    apply_plan,
+    build_fetch_plan,
+    parse_manifest_projects,
+    resolve_concurrency,
+    resolve_mirror_cache_max_bytes,
+    resolve_remote_urls,
+    run_plan,
+)
+from lib.delivery.history import DeliveryHistory
+from lib.delivery.journal import DeliveryJournal
+from lib.delivery.mirror_cache import MirrorCache
+from lib.delivery.retry import BackoffPolicy, RetryScheduler
+from lib.delivery.workspace import Workspace
+from lib.manifest.fetcher import ManifestFetchError, ManifestFetcher
+from lib.manifest.manifest_cache import ManifestCache
+from lib.manifest.models import DeliveryConfig, ManifestConfig, Project
+from lib.transformer.branch_transformer import BranchTransformer
+from lib.transformer.repo_transformer import RepoTransformer
+from util.delivery_plan import PlanEntry, read_plan
+from util.events import Event, EventStream
+from util.sharding import PartialResult
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", *args], cwd=cwd, check=True, capture_output=True, text=True
+    ).stdout.strip()
+
+
+def _init_targets(root: Path, names: List[str]) -> Path:
+    for name in names:
+        repo = root / name
+        repo.mkdir(parents=True)
+        _git(repo, "init", "-q", "--bare")
+    return root
+
+
+@pytest.fixture
+def local_repos(tmp_path: Path) -> Path:
+    """Create upstream projects, a manifest repository and two target roots."""
+    root = tmp_path / "repos"
+    names = create_local_repos(root, 3, files_per_repo=1)
+    _init_targets(root / "gerrit2", names)
+    return root
+
+
+def _projects(count: int) -> List[Project]:
+    return [
+        Project(name=f"platform/project{i:04d}", path=f"project{i}", revision="main")
+        for i in range(count)
+    ]
+
+
+class TestResolveRemoteUrls:
+    """Tests for resolve_remote_urls."""
+
+    def test_relative_and_named_remotes(self, tmp_path: Path) -> None:
+        """Test each parsed project gets its own remote, relative URLs resolved."""
+        manifest = tmp_path / "default.xml"
+        manifest.write_text(
+            "<manifest>"
+            '<remote name="aosp" fetch=".." />'
+            '<remote name="vendor" fetch="ssh://vendor.example.com/" />'
+            '<default revision="main" remote="aosp" />'
+            '<project name="platform/build" path="build" />'
+            '<project name="vendor/hal" path="vendor/hal" remote="vendor" />'
+            '<project name="vendor/blobs" remote="vendor" />'
+            "</manifest>"
+        )
+        projects = parse_manifest_projects(
+            manifest, ManifestConfig(repo_url="https://android.example.com/platform/manifest")
+        )
+        remote_url_of = resolve_remote_urls(
+            manifest, "https://android.example.com/platform/manifest"
+        )
+
+        assert [remote_url_of(p) for p in projects] == [
+            "https://android.example.com/",
+            "ssh://vendor.example.com/",
+            "ssh://vendor.example.com/",
+        ]
+
+    def test_unknown_remote(self, tmp_path: Path) -> None:
+        """Test a project on an undefined remote is rejected."""
+        manifest = tmp_path / "default.xml"
+        manifest.write_text(
+            '<manifest><remote name="aosp" fetch="https://a.example.com/" />'
+            '<project name="x" remote="missing" /></manifest>'
+        )
+        remote_url_of = resolve_remote_urls(manifest, "https://a.example.com/manifest")
+
+        with pytest.raises(ValueError, match="Unknown remote for project x: missing"):
+            remote_url_of(Project(name="x", path="x"))
+
+
+class TestFetchPlan:
+    """Tests for FetchPlan."""
+
+    def test_shared_projects_are_fetched_once(self) -> None:
+        """Test the plan covers the union of projects with one fetch each."""
+        plan = FetchPlan()
+        plan.add("a.yaml", _projects(3), lambda p: "https://upstream/")
+        plan.add("b.yaml", _projects(5), lambda p: "https://upstream")
+
+        assert plan.fetch_count == 5
+        assert plan.push_count == 8
+        assert plan.totals == {"a.yaml": (3, 3), "b.yaml": (5, 5)}
+
+    def test_duplicate_config_name(self) -> None:
+        """Test a configuration can only be added once."""
+        plan = FetchPlan()
+        plan.add("a.yaml", _projects(1), lambda p: "https://upstream")
+        with pytest.raises(ValueError, match="Duplicate configuration"):
+            plan.add("a.yaml", _projects(1), lambda p: "https://upstream")
+
+
+class TestBatchDelivery:
+    """Tests for BatchDelivery."""
+
+    def test_fan_out_to_every_target(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test each source is fetched once and pushed to all targets."""
+        upstream = str(local_repos / "upstream")
+        plan = FetchPlan()
+        plan.add("first", _projects(2), lambda p: upstream, total_projects=4)
+        plan.add("second", _projects(3), lambda p: upstream)
+
+        cache = MirrorCache(tmp_path / "mirrors")
+        pushers = {
+            "first": BarePusher(
+                str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer()
+            ),
+            "second": BarePusher(
+                str(local_repos / "gerrit2"), BranchTransformer(), RepoTransformer()
+            ),
+        }
+        results = BatchDelivery(cache, pushers, max_workers=2).run(plan)
+
+        assert len(cache.entries()) == 3
+        assert (results["first"].total_projects, results["first"].successful) == (4, 2)
+        assert results["second"].successful == 3
+        for target in ("gerrit", "gerrit2"):
+            repo = local_repos / target / "platform/project0001"
+            assert _git(repo, "rev-parse", "refs/heads/main")
+
+    def test_failed_fetch_fails_all_targets(self, tmp_path: Path) -> None:
+        """Test a source that cannot be fetched fails every push of it."""
+        plan = FetchPlan()
+        plan.add("first", _projects(1), lambda p: str(tmp_path / "missing"))
+        plan.add("second", _projects(1), lambda p: str(tmp_path / "missing"))
+
+        pusher = BarePusher(str(tmp_path / "gerrit"), BranchTransformer(), RepoTransformer())
+        results = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"), {"first": pusher, "second": pusher}
+        ).run(plan)
+
+        assert results["first"].failed_projects == ["platform/project0000"]
+        assert results["second"].failed == 1
+
+    def test_remote_snapshot(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test missing target repositories fail before fetching and current targets are skipped."""
+        gerrit_url = str(local_repos / "gerrit")
+        shutil.rmtree(local_repos / "gerrit" / "platform/project0002")
+        delivery_config = DeliveryConfig(gerrit_url=gerrit_url, auth_method="http", username="u")
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(gerrit_url, BranchTransformer(), RepoTransformer())
+        push = pusher.push_target
+        pushed: List[str] = []
+        seen: List[str] = []
+
+        def tracked_push(mirror: Path, target: PushTarget, **kwargs: Any) -> Any:
+            pushed.append(target.repo)
+            return push(mirror, target, **kwargs)
+
+        def record(event: Event) -> None:
+            seen.append(f"{event.state} {event.project}")
+
+        pusher.push_target = tracked_push  # type: ignore[method-assign]
+
+        def run() -> PartialResult:
+            return BatchDelivery(
+                MirrorCache(tmp_path / "mirrors"),
+                {"nightly": pusher},
+                events=EventStream([record]),
+                delivery_configs={"nightly": delivery_config},
+            ).run(plan)["nightly"]
+
+        first = run()
+        assert first.failed_projects == ["platform/project0002"]
+        assert "fetching platform/project0002" not in seen
+        assert sorted(pushed) == ["platform/project0000", "platform/project0001"]
+
+        pushed.clear()
+        second = run()
+        assert pushed == []
+        assert (second.unchanged, second.failed) == (2, 1)
+
+    def test_missing_pusher(self, tmp_path: Path) -> None:
+        """Test every configuration of the plan needs a pusher."""
+        plan = FetchPlan()
+        plan.add("first", _projects(1), lambda p: "https://upstream")
+        with pytest.raises(ValueError, match="No pusher"):
+            BatchDelivery(MirrorCache(tmp_path / "mirrors"), {}).run(plan)
+
+
+class TestBuildFetchPlan:
+    """Tests for build_fetch_plan."""
+
+    def test_configs_share_manifest(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test configurations on the same manifest share projects and the manifest fetch."""
+        manifest_config = ManifestConfig(
+            repo_url=f"file://{local_repos / 'manifest.git'}", branch="main"
+        )
+        configs = [
+            BatchConfig(
+                name,
+                manifest_config,
+                DeliveryConfig(gerrit_url=url, auth_method="http", username="user"),
+            )
+            for name, url in (("a", "https://gerrit-a"), ("b", "https://gerrit-b"))
+        ]
+
+        plan = build_fetch_plan(configs, tmp_path / "work")
+
+        assert plan.fetch_count == 3
+        assert plan.push_count == 6
+        assert len(list((tmp_path / "work" / "manifests").iterdir())) == 1
+        source = next(iter(plan.sources))
+        assert source.remote_url.endswith("/upstream")
+
+    def test_manifest_cache_skips_fetch_and_parse(
+        self, local_repos: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test a manifest commit seen before is loaded from the cache."""
+        manifest_config = ManifestConfig(
+            repo_url=f"file://{local_repos / 'manifest.git'}", branch="main"
+        )
+        config = BatchConfig(
+            "a",
+            manifest_config,
+            DeliveryConfig(gerrit_url="https://gerrit-a", auth_method="http", username="user"),
+        )
+        cache = ManifestCache(tmp_path / "manifest-cache")
+        first = build_fetch_plan([config], tmp_path / "work", manifest_cache=cache)
+
+        def no_fetch(*args: Any, **kwargs: Any) -> Path:
+            raise AssertionError("manifest fetched despite a cache hit")
+
+        monkeypatch.setattr(batch_module, "fetch_manifest", no_fetch)
+        monkeypatch.setattr(batch_module, "iter_manifest_projects", no_fetch)
+        second = build_fetch_plan([config], tmp_path / "other", manifest_cache=cache)
+
+        assert second.sources == first.sources
+        assert second.totals == first.totals
+
+    def test_repo_init_fallback(
+        self, local_repos: Path, tmp_path: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test the manifest comes from repo init when the native fetch fails."""
+        manifest = tmp_path / "exported.xml"
+        manifest.write_text(_git(local_repos / "manifest.git", "show", "main:default.xml"))
+        bin_dir = tmp_path / "bin"
+        bin_dir.mkdir()
+        (bin_dir / "repo").write_text(
+            f'#!/bin/sh\nif [ "$1" = manifest ]; then cp "{manifest}" "$3"; fi\n'
+        )
+        (bin_dir / "repo").chmod(0o755)
+        monkeypatch.setenv("PATH", f"{bin_dir}{os.pathsep}{os.environ['PATH']}")
+
+        def fail(self: ManifestFetcher) -> Path:
+            raise ManifestFetchError("native fetch unavailable")
+
+        monkeypatch.setattr(ManifestFetcher, "fetch", fail)
+        config = BatchConfig(
+            "a",
+            ManifestConfig(repo_url=f"file://{local_repos / 'manifest.git'}", branch="main"),
+            DeliveryConfig(gerrit_url="https://gerrit-a", auth_method="http", username="user"),
+        )
+
+        plan = build_fetch_plan([config], tmp_path / "work")
+
+        assert plan.fetch_count == 3
+        assert next(iter(plan.sources)).remote_url.endswith("/upstream")
+
+    def test_shards_balance_by_history(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a project known to be slow gets a shard of its own."""
+        history = DeliveryHistory.for_work_dir(tmp_path / "work")
+        history.record("platform/project0001", 50.0, 50.0)
+        history.record("platform/project0000", 1.0, 1.0)
+        history.record("platform/project0002", 1.0, 1.0)
+        history.save()
+        config = BatchConfig(
+            "a",
+            ManifestConfig(repo_url=f"file://{local_repos / 'manifest.git'}", branch="main"),
+            DeliveryConfig(gerrit_url="https://gerrit-a", auth_method="http", username="user"),
+        )
+
+        plans = [build_fetch_plan([config], tmp_path / "work", (k, 2)) for k in (1, 2)]
+
+        shards = sorted([source.project_name for source in plan.sources] for plan in plans)
+        assert shards == [
+            ["platform/project0000", "platform/project0002"],
+            ["platform/project0001"],
+        ]
+
+    def test_shards_split_projects(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test shards are disjoint and complete while totals cover the whole manifest."""
+        manifest_config = ManifestConfig(
+            repo_url=f"file://{local_repos / 'manifest.git'}", branch="main"
+        )
+        config = BatchConfig(
+            "a",
+            manifest_config,
+            DeliveryConfig(gerrit_url="https://gerrit-a", auth_method="http", username="user"),
+        )
+
+        plans = [build_fetch_plan([config], tmp_path / "work", (k, 2)) for k in (1, 2)]
+
+        names = [source.project_name for plan in plans for source in plan.sources]
+        assert sorted(names) == sorted(set(names)) and len(names) == 3
+        assert [plan.totals["a"][0] for plan in plans] == [3, 3]
+        assert sum(plan.totals["a"][1] for plan in plans) == 3
+        assert [sum(plan.revision_counts["a"].values()) for plan in plans] == [3, 3]
+
+
+class TestCreatePushers:
+    """Tests for the transport sessions shared by pushers."""
+
+    def test_one_ssh_master_per_host(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test configurations on one host share its master and push to its port."""
+        calls: List[List[str]] = []
+
+        def fake_run(command: List[str], **kwargs: Any) -> subprocess.CompletedProcess:
+            calls.append(command)
+            return subprocess.CompletedProcess(command, 0, "", "")
+
+        monkeypatch.setattr(transport_module.subprocess, "run", fake_run)
+        configs = {
+            name: DeliveryConfig(
+                gerrit_url="ssh://gerrit.example.com",
+                auth_method="ssh",
+                ssh_key_path="/keys/id_rsa",
+                username="bot",
+            )
+            for name in ("a", "b")
+        }
+
+        with contextlib.ExitStack() as stack:
+            pushers = batch_module._create_pushers(stack, configs, dry_run=False)
+            target = pushers["b"].retarget(
+                PushTarget("ssh://gerrit.example.com/platform/build", "platform/build", "m", "0")
+            )
+
+        assert len([c for c in calls if "-M" in c]) == 1
+        assert pushers["a"].git_env == pushers["b"].git_env
+        assert target.url == "ssh://gerrit.example.com:29418/platform/build"
+
+
+class TestDeliveryPlans:
+    """Tests for writing and applying delivery plans."""
+
+    def test_dry_run_unknown_revision(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a revision missing upstream fails the dry run of that project only."""
+        projects = _projects(2)
+        projects[1] = Project(name=projects[1].name, path=projects[1].path, revision="nope")
+        plan = FetchPlan()
+        plan.add("nightly", projects, lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+
+        result = BatchDelivery(MirrorCache(tmp_path / "mirrors"), {"nightly": pusher}).run(
+            plan, dry_run=True
+        )["nightly"]
+
+        assert (result.successful, result.failed) == (1, 1)
+
+    def test_dry_run_plan_then_apply(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a dry-run plan pins SHAs and applying it pushes exactly those."""
+        upstream = str(local_repos / "upstream")
+        gerrit_url = str(local_repos / "gerrit")
+        delivery_config = DeliveryConfig(gerrit_url=gerrit_url, auth_method="http", username="u")
+        config = BatchConfig(
+            "nightly", ManifestConfig(repo_url="https://unused", branch="main"), delivery_config
+        )
+        plan = FetchPlan()
+        plan.add("nightly", _projects(2), lambda p: upstream)
+        plan_path = tmp_path / "plan.jsonl"
+
+        run_plan([config], plan, tmp_path / "work", dry_run=True, plan_path=plan_path)
+
+        entries = read_plan(plan_path)
+        assert [e.project for e in entries] == ["platform/project0000", "platform/project0001"]
+        head = _git(local_repos / "upstream/platform/project0000", "rev-parse", "HEAD")
+        assert entries[0].source_sha == head
+        # Planning lists upstream refs; the mirrors are cloned only when applying
+        assert not list((tmp_path / "work" / "mirrors").glob("*.git"))
+        target = local_repos / "gerrit/platform/project0000"
+        assert not _git(target, "for-each-ref")
+
+        results = apply_plan(entries, [delivery_config], tmp_path / "work")
+
+        assert results[gerrit_url].successful == 2
+        assert _git(target, "rev-parse", "refs/heads/main") == head
+
+    def test_unchanged_sources_are_not_fetched_again(
+        self, local_repos: Path, tmp_path: Path
+    ) -> None:
+        """Test a rerun reports targets whose upstream SHA hasn't moved as unchanged."""
+        upstream = local_repos / "upstream"
+        gerrit_url = str(local_repos / "gerrit")
+        config = BatchConfig(
+            "nightly",
+            ManifestConfig(repo_url="https://unused", branch="main"),
+            DeliveryConfig(gerrit_url=gerrit_url, auth_method="http", username="u"),
+        )
+        plan = FetchPlan()
+        plan.add("nightly", _projects(2), lambda p: str(upstream))
+        work_dir = tmp_path / "work"
+
+        first = run_plan([config], plan, work_dir)["nightly"]
+        (upstream / "platform/project0001/new.txt").write_text("change\n")
+        _git(upstream / "platform/project0001", "add", "new.txt")
+        _git(
+            upstream / "platform/project0001",
+            *("-c", "user.name=t", "-c", "user.email=t@example.com"),
+            *("commit", "-q", "-m", "change"),
+        )
+        second = run_plan([config], plan, work_dir)["nightly"]
+
+        assert (first.successful, first.unchanged) == (2, 0)
+        assert (second.successful, second.unchanged) == (1, 1)
+        head = _git(upstream / "platform/project0001", "rev-parse", "HEAD")
+        target = local_repos / "gerrit/platform/project0001"
+        assert _git(target, "rev-parse", "refs/heads/main") == head
+
+    def test_apply_requires_matching_config(self, tmp_path: Path) -> None:
+        """Test every Gerrit URL of a plan needs credentials."""
+        entry = PlanEntry(
+            "platform/build", "https://upstream", "main", "a" * 40, "https://gerrit-a",
+            "platform/build", "main",
+        )
+        other = DeliveryConfig(gerrit_url="https://gerrit-b", auth_method="http", username="u")
+        with pytest.raises(ValueError, match="No configuration for Gerrit URLs"):
+            apply_plan([entry], [other], tmp_path / "work")
+
+
+class TestConcurrency:
+    """Tests for concurrency settings of batch delivery."""
+
+    def _config(self, max_parallel: Any = None, max_per_host: Any = None) -> BatchConfig:
+        return BatchConfig(
+            "c",
+            ManifestConfig(repo_url="https://example.com/manifest"),
+            DeliveryConfig(gerrit_url="https://gerrit", auth_method="http", username="u"),
+            max_parallel=max_parallel,
+            max_per_host=max_per_host,
+        )
+
+    def test_resolve_concurrency(self) -> None:
+        """Test command-line values win over the most conservative configured ones."""
+        configs = [self._config(8, 4), self._config(2), self._config()]
+
+        assert resolve_concurrency(configs, None, None) == (2, 4)
+        assert resolve_concurrency(configs, 16, 1) == (16, 1)
+        assert resolve_concurrency([self._config()], None, None) == (DEFAULT_MAX_WORKERS, None)
+
+    def test_resolve_mirror_cache_max_bytes(self) -> None:
+        """Test the command line wins, else the smallest configured budget applies."""
+        configs = [self._config(), self._config(), self._config()]
+        configs[0].mirror_cache_max_bytes = 4096
+        configs[1].mirror_cache_max_bytes = 1024
+
+        assert resolve_mirror_cache_max_bytes(configs, None) == 1024
+        assert resolve_mirror_cache_max_bytes(configs, 8192) == 8192
+        assert resolve_mirror_cache_max_bytes([self._config()], None) is None
+
+    def test_per_host_limit(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test pushes to one Gerrit host never exceed the per-host cap."""
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        push = pusher.push_target
+        active: List[int] = [0, 0]
+        lock = threading.Lock()
+
+        def tracked_push(*args: Any, **kwargs: Any) -> Any:
+            with lock:
+                active[0] += 1
+                active[1] = max(active[1], active[0])
+            try:
+                time.sleep(0.02)
+                return push(*args, **kwargs)
+            finally:
+                with lock:
+                    active[0] -= 1
+
+        pusher.push_target = tracked_push  # type: ignore[method-assign]
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+
+        delivery = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"), {"nightly": pusher}, 3, per_host_limit=1
+        )
+        results = delivery.run(plan)
+
+        assert results["nightly"].successful == 3
+        assert active[1] == 1
+
+    def test_fetch_overlaps_push(
+        self, local_repos: Path, tmp_path: Path, caplog: pytest.LogCaptureFixture
+    ) -> None:
+        """Test the next source is fetched before the previous one's push is done."""
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        push = pusher.push_target
+        seen: List[str] = []
+
+        def slow_push(*args: Any, **kwargs: Any) -> Any:
+            time.sleep(0.1)
+            return push(*args, **kwargs)
+
+        def record(event: Event) -> None:
+            seen.append(f"{event.state} {event.project}")
+
+        pusher.push_target = slow_push  # type: ignore[method-assign]
+        plan = FetchPlan()
+        plan.add("nightly", _projects(2), lambda p: str(local_repos / "upstream"))
+
+        delivery = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"), {"nightly": pusher}, 1, events=EventStream([record])
+        )
+        with caplog.at_level(logging.DEBUG, logger="lib.delivery.pipeline"):
+            results = delivery.run(plan)
+
+        assert results["nightly"].successful == 2
+        assert seen.index("fetching platform/project0001") < seen.index(
+            "done platform/project0000"
+        )
+        assert "Stage fetch:" in caplog.text and "Stage push:" in caplog.text
+
+
+class TestBatchRetry:
+    """Tests for retrying pushes in batch delivery."""
+
+    def test_transient_push_failure_is_retried(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a push failing transiently once still succeeds."""
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        push = pusher.push_target
+        failures = ["git push failed: remote: Too many concurrent connections"]
+
+        def flaky_push(*args: Any, **kwargs: Any) -> Any:
+            if failures:
+                raise RuntimeError(failures.pop())
+            return push(*args, **kwargs)
+
+        pusher.push_target = flaky_push  # type: ignore[method-assign]
+        plan = FetchPlan()
+        plan.add("nightly", _projects(1), lambda p: str(local_repos / "upstream"))
+        retry = RetryScheduler(2, BackoffPolicy(max_attempts=2), sleep=lambda _: None)
+
+        delivery = BatchDelivery(MirrorCache(tmp_path / "mirrors"), {"nightly": pusher}, 1, retry)
+        results = delivery.run(plan)
+
+        assert results["nightly"].successful == 1
+        assert retry.retries == 1
+
+
+class TestBatchResume:
+    """Tests for resuming an interrupted batch from the journal."""
+
+    def test_resume_pushes_only_undelivered(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a resumed run skips journaled pushes and still reports them."""
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        push = pusher.push_target
+        interrupted = ["platform/project0001"]
+        pushed: List[str] = []
+
+        def tracked_push(mirror: Path, target: PushTarget, **kwargs: Any) -> Any:
+            if target.repo in interrupted:
+                interrupted.remove(target.repo)
+                raise RuntimeError("git push failed: interrupted")
+            pushed.append(target.repo)
+            return push(mirror, target, **kwargs)
+
+        pusher.push_target = tracked_push  # type: ignore[method-assign]
+        cache = MirrorCache(tmp_path / "mirrors")
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            first = BatchDelivery(cache, {"nightly": pusher}, journal=journal).run(plan)
+        assert first["nightly"].failed_projects == ["platform/project0001"]
+
+        pushed.clear()
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            delivery = BatchDelivery(cache, {"nightly": pusher}, journal=journal, resume=True)
+            results = delivery.run(plan)
+
+        assert pushed == ["platform/project0001"]
+        assert (results["nightly"].successful, results["nightly"].failed) == (3, 0)
+
+
+class TestBatchHistory:
+    """Tests for history-based scheduling in batch delivery."""
+
+    def test_longest_first_and_makespan(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test sources run longest-expected-first and timings are saved."""
+        history = DeliveryHistory.for_work_dir(tmp_path)
+        history.record("platform/project0002", 5.0, 5.0, 1000)
+        history.record("platform/project0000", 1.0, 1.0, 100)
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        fetched: List[str] = []
+
+        def record(event: Event) -> None:
+            if event.state == "fetching":
+                fetched.append(event.project)
+
+        delivery = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"),
+            {"nightly": pusher},
+            events=EventStream([record]),
+            history=history,
+        )
+        result = delivery.run(plan)["nightly"]
+
+        assert fetched[0] == "platform/project0002"
+        assert result.predicted_makespan_seconds is not None
+        assert result.makespan_seconds is not None
+        saved = DeliveryHistory.for_work_dir(tmp_path)
+        assert saved.timings["platform/project0001"].runs == 1
+        assert saved.timings["platform/project0002"].runs == 2
+
+
+    def test_no_prediction_without_history(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a first run reports its makespan without a made-up prediction."""
+        plan = FetchPlan()
+        plan.add("nightly", _projects(2), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+
+        result = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"),
+            {"nightly": pusher},
+            history=DeliveryHistory.for_work_dir(tmp_path),
+        ).run(plan)["nightly"]
+
+        assert result.predicted_makespan_seconds is None
+        assert result.makespan_seconds is not None
+
+    def test_unseen_projects_use_mirror_size(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test projects without timings are estimated from their cached mirror size."""
+        upstream = str(local_repos / "upstream")
+        cache = MirrorCache(tmp_path / "mirrors")
+        with cache.open_mirror(upstream, "platform/project0001"):
+            pass
+        history = DeliveryHistory.for_work_dir(tmp_path)
+        history.record("platform/project0000", 1.0, 1.0, 1)
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: upstream)
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        fetched: List[str] = []
+
+        def record(event: Event) -> None:
+            if event.state == "fetching":
+                fetched.append(event.project)
+
+        BatchDelivery(
+            cache, {"nightly": pusher}, events=EventStream([record]), history=history
+        ).run(plan)
+
+        # 2s per byte: the cached mirror's size makes project0001 the longest
+        assert fetched[0] == "platform/project0001"
+
+
+class TestBatchWorkspace:
+    """Tests for the workspace budget in batch delivery."""
+
+    def test_mirrors_are_reclaimed(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test pushed mirrors are evicted to fit the budget and the peak usage is reported."""
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        cache = MirrorCache(tmp_path / "mirrors")
+        workspace = Workspace(tmp_path / "mirrors", max_bytes=1)
+
+        delivery = BatchDelivery(cache, {"nightly": pusher}, 2, workspace=workspace)
+        results = delivery.run(plan)
+
+        assert results["nightly"].successful == 3
+        assert cache.entries() == []
+        assert results["nightly"].peak_workspace_bytes == workspace.peak_bytes > 0
+
+    def test_mirrors_within_budget_stay_cached(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test a budget that fits every mirror keeps them for the next run."""
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        cache = MirrorCache(tmp_path / "mirrors", max_bytes=100 * 1024 * 1024)
+        workspace = Workspace(tmp_path / "mirrors", max_bytes=50 * 1024 * 1024)
+
+        results = BatchDelivery(cache, {"nightly": pusher}, 2, workspace=workspace).run(plan)
+
+        assert results["nightly"].successful == 3
+        assert len(cache.entries()) == 3
+        # The lower of the two budgets applies to the cache
+        assert cache.max_bytes == workspace.max_bytes
+
+    def test_reservations_use_history_sizes(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test each mirror reserves the size it had in the previous run."""
+
+        class FrozenHistory(DeliveryHistory):
+            # Pushes finishing early must not move the median of later estimates
+            def record(self, *args: Any, **kwargs: Any) -> None:
+                pass
+
+        recorded = DeliveryHistory.for_work_dir(tmp_path)
+        recorded.record("platform/project0000", 1.0, 1.0, 4096)
+        recorded.record("platform/project0001", 1.0, 1.0, 1024)
+        recorded.save()
+        history = FrozenHistory(recorded.path)
+        plan = FetchPlan()
+        plan.add("nightly", _projects(3), lambda p: str(local_repos / "upstream"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        estimates: Dict[str, int] = {}
+
+        class RecordingWorkspace(Workspace):
+            def reserve(self, name: str, estimate: int = 0) -> Any:
+                estimates[name] = estimate
+                return super().reserve(name, estimate)
+
+        delivery = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"),
+            {"nightly": pusher},
+            workspace=RecordingWorkspace(tmp_path / "mirrors"),
+            history=history,
+        )
+        delivery.run(plan)
+
+        assert estimates == {
+            "platform/project0000": 4096,
+            "platform/project0001": 1024,
+            # Unseen: median of the known sizes
+            "platform/project0002": 2560,
+        }
+
+
+class TestBatchEvents:
+    """Tests for the event stream of batch delivery."""
+
+    def test_project_lifecycle(self, local_repos: Path, tmp_path: Path) -> None:
+        """Test each project goes queued, fetching, pushing, done with size and duration."""
+        plan = FetchPlan()
+        plan.add("nightly", _projects(2), lambda p: str(local_repos / "upstream"))
+        plan.add("broken", _projects(1), lambda p: str(tmp_path / "missing"))
+        pusher = BarePusher(str(local_repos / "gerrit"), BranchTransformer(), RepoTransformer())
+        events: List[Event] = []
+        lock = threading.Lock()
+
+        def record(event: Event) -> None:
+            with lock:
+                events.append(event)
+
+        delivery = BatchDelivery(
+            MirrorCache(tmp_path / "mirrors"),
+            {"nightly": pusher, "broken": pusher},
+            events=EventStream([record]),
+        )
+        results = delivery.run(plan)
+
+        states = [e.state for e in events if e.config == "nightly" and e.index == 1]
+        assert states == ["queued", "fetching", "pushing", "done"]
+        done = [e for e in events if e.state == "done"]
+        assert all(e.bytes and e.duration is not None for e in done)
+        failed = [e for e in events if e.state == "failed"]
+        assert [(e.config, e.error_class) for e in failed] == [("broken", "permanent")]
+        assert results["nightly"].successful == 2
+        assert results["broken"].failed_projects == ["platform/project0000"]
@@ -0,0 +1,337 @@
+"""
+Tests for the command-line interface.
+"""
+import json
+import re
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import pytest
+import yaml
+
+from delivery import main, work_directory
+from util.sharding import PartialResult
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+
+# Modules the light code paths must not import
+HEAVY_MODULES = ("git", "yaml", "config.settings", "lib.delivery.orchestrator")
+
+# Generous wall-clock budget for importing the CLI module in a fresh interpreter
+STARTUP_BUDGET_SECONDS = 1.0
+
+
+def _valid_config() -> dict:
+    return {
+        "manifest": {"repo_url": "https://example.com/manifest", "branch": "main"},
+        "delivery": {
+            "gerrit_url": "https://gerrit.example.com",
+            "auth": {"method": "http", "username": "user"},
+        },
+    }
+
+
+class TestStartup:
+    """Import-time regression tests."""
+
+    def test_import_is_light(self) -> None:
+        """Test importing the CLI loads no heavy dependency and stays within budget."""
+        code = (
+            "import json, sys, time\n"
+            "started = time.perf_counter()\n"
+            "import delivery\n"
+            "elapsed = time.perf_counter() - started\n"
+            f"loaded = [m for m in {HEAVY_MODULES!r} if m in sys.modules]\n"
+            "print(json.dumps({'elapsed': elapsed, 'loaded': loaded}))\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code],
+            cwd=REPO_ROOT,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        report = json.loads(completed.stdout)
+
+        assert report["loaded"] == []
+        assert report["elapsed"] < STARTUP_BUDGET_SECONDS
+
+    def test_help_is_fast(self) -> None:
+        """Test --help returns without loading the delivery machinery."""
+        started = time.perf_counter()
+        completed = subprocess.run(
+            [sys.executable, "delivery.py", "--help"], cwd=REPO_ROOT, capture_output=True
+        )
+        assert completed.returncode == 0
+        assert time.perf_counter() - started < STARTUP_BUDGET_SECONDS * 3
+
+
+class TestLogging:
+    """Tests for setup_logging."""
+
+    def test_line_is_formatted_once(self) -> None:
+        """Test a record reaches the terminal with exactly one timestamp/name/level prefix."""
+        code = (
+            "import logging\n"
+            "import delivery\n"
+            "delivery.setup_logging()\n"
+            "logging.getLogger('x').info('hello %s', 'world')\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True
+        )
+
+        assert completed.returncode == 0, completed.stderr
+        assert re.fullmatch(
+            r"\d{4}-\d\d-\d\d \d\d:\d\d:\d\d - x - INFO - hello world\n", completed.stderr
+        )
+
+
+class TestValidate:
+    """Tests for the validate subcommand."""
+
+    def test_valid_and_invalid(self, tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+        """Test each config is reported and invalid ones fail the run."""
+        good = tmp_path / "good.yaml"
+        good.write_text(yaml.safe_dump(_valid_config()))
+        bad = tmp_path / "bad.yaml"
+        bad.write_text("")
+
+        assert main(["validate", "-c", str(good)]) == 0
+        assert main(["validate", "-c", str(tmp_path)]) == 1
+
+        out = capsys.readouterr().out
+        assert f"OK: {good}" in out
+        assert f"INVALID: {bad}: Configuration file is empty" in out
+
+    def test_does_not_load_git(self, tmp_path: Path) -> None:
+        """Test validation doesn't import GitPython or the orchestrator."""
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(_valid_config()))
+        code = (
+            "import sys\n"
+            "import delivery\n"
+            f"code = delivery.main(['validate', '-c', {str(config)!r}])\n"
+            "assert 'git' not in sys.modules, 'git loaded'\n"
+            "assert 'lib.delivery.orchestrator' not in sys.modules, 'orchestrator loaded'\n"
+            "sys.exit(code)\n"
+        )
+        completed = subprocess.run(
+            [sys.executable, "-c", code], cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        assert completed.returncode == 0, completed.stderr
+
+
+class TestMerge:
+    """Tests for the merge subcommand."""
+
+    def test_merge_shards(self, tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+        """Test shard results are merged into one summary and exit code."""
+        first = tmp_path / "shard1.json"
+        second = tmp_path / "shard2.json"
+        PartialResult(10, 5, 5, 0, 0, shard="1/2").write(first)
+        PartialResult(10, 5, 4, 1, 0, ["platform/art"], shard="2/2").write(second)
+
+        assert main(["merge", str(first), str(second)]) == 1
+
+        out = capsys.readouterr().out
+        assert "Successfully pushed: 9" in out
+        assert "  - platform/art" in out
+
+    def test_merge_reports_revision_exclusions(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test the summary lists projects excluded per revision category."""
+        path = tmp_path / "result.json"
+        PartialResult(10, 6, 6, revision_counts={"branch": 6, "hash": 3, "empty": 1}).write(path)
+
+        assert main(["merge", str(path)]) == 0
+
+        assert "Excluded by revision: 4 (hash: 3, empty: 1)" in capsys.readouterr().out
+
+    def test_makespan_without_prediction(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test a run without history reports its makespan and no prediction."""
+        path = tmp_path / "result.json"
+        PartialResult(2, 2, 2, makespan_seconds=3.0).write(path)
+
+        assert main(["merge", str(path)]) == 0
+
+        out = capsys.readouterr().out
+        assert "Makespan: 3.0s\n" in out
+        assert "predicted" not in out
+
+    def test_merge_missing_shard(self, tmp_path: Path) -> None:
+        """Test an incomplete set of shards is an error."""
+        first = tmp_path / "shard1.json"
+        PartialResult(10, 5, 5, 0, 0, shard="1/2").write(first)
+
+        assert main(["merge", str(first)]) == 1
+
+    def test_sharded_runs_merge(self, tmp_path: Path, capsys: pytest.CaptureFixture) -> None:
+        """Test --shard runs record their shard and merge back to the whole manifest."""
+        from benchmarks.synthetic import create_local_repos
+
+        create_local_repos(tmp_path / "repos", 3, files_per_repo=1)
+        data = _valid_config()
+        data["manifest"]["repo_url"] = f"file://{tmp_path / 'repos' / 'manifest.git'}"
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(data))
+
+        paths = []
+        for k in (1, 2):
+            path = tmp_path / f"shard{k}.json"
+            argv = ["-c", str(config), "--dry-run", "--shard", f"{k}/2"]
+            assert main([*argv, "-w", str(tmp_path / f"work{k}"), "--result-file", str(path)]) == 0
+            assert PartialResult.read(path).shard == f"{k}/2"
+            paths.append(str(path))
+        capsys.readouterr()
+
+        assert main(["merge", *paths]) == 0
+        out = capsys.readouterr().out
+        assert "Total projects in manifest: 3" in out
+        assert "Successfully pushed: 3" in out
+
+
+class TestWorkDirectory:
+    """Tests for work_directory."""
+
+    def test_temporary_directory_is_removed(self) -> None:
+        """Test the temp dir created without -w doesn't outlive the run."""
+        with work_directory(None) as work_dir:
+            (work_dir / "mirrors").mkdir()
+            assert work_dir.is_dir()
+        assert not work_dir.exists()
+
+    def test_given_directory_is_kept(self, tmp_path: Path) -> None:
+        """Test a work dir from -w is used as is and kept."""
+        with work_directory(tmp_path) as work_dir:
+            assert work_dir == tmp_path
+        assert tmp_path.is_dir()
+
+
+class TestConcurrencyOptions:
+    """Tests for the -j/--jobs and --max-per-host values."""
+
+    @pytest.mark.parametrize("command", [[], ["diff"]])
+    @pytest.mark.parametrize("option", ["-j", "--jobs", "--max-per-host"])
+    @pytest.mark.parametrize("value", ["0", "-2", "many"])
+    def test_rejects_non_positive(
+        self,
+        tmp_path: Path,
+        capsys: pytest.CaptureFixture,
+        command: list,
+        option: str,
+        value: str,
+    ) -> None:
+        """Test counts below 1 are rejected by the parser, not at run time."""
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(_valid_config()))
+
+        with pytest.raises(SystemExit) as exc_info:
+            main([*command, "-c", str(config), option, value])
+
+        assert exc_info.value.code == 2
+        assert option.lstrip("-") in capsys.readouterr().err
+
+
+class TestEngineSelection:
+    """Tests for choosing between the orchestrator and the bare push engine."""
+
+    @pytest.mark.parametrize(
+        "options, message",
+        [
+            (["--events", "events.jsonl"], "--events"),
+            (["--workspace-max-bytes", "1G"], "--workspace-max-bytes"),
+            (["-j", "8"], "--jobs"),
+            (["--max-per-host", "2"], "--max-per-host"),
+            (["--resume", "-w", "work"], "--resume"),
+            (["--shard", "1/2"], "--shard"),
+            (["--push-unchanged"], "--push-unchanged"),
+            (["--no-manifest-cache"], "--no-manifest-cache"),
+            (["--mirror-cache-max-bytes", "50G"], "--mirror-cache-max-bytes"),
+            (["--plan-file", "plan.jsonl"], "--plan-file"),
+        ],
+    )
+    def test_bare_only_option_is_rejected(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture, options: list, message: str
+    ) -> None:
+        """Test a bare-engine option is rejected, not ignored, by the orchestrator."""
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(_valid_config()))
+
+        with pytest.raises(SystemExit) as exc_info:
+            main(["-c", str(config), "--orchestrator", *options])
+
+        assert exc_info.value.code == 2
+        err = capsys.readouterr().err
+        assert message in err
+        assert "--orchestrator" in err
+
+    def test_transform_rules_are_rejected(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test explicit transform rules are rejected by the orchestrator."""
+        data = _valid_config()
+        data["delivery"]["transform"] = {"branch": [{"match": "^main$", "replace": "m"}]}
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(data))
+
+        with pytest.raises(SystemExit):
+            main(["-c", str(config), "--orchestrator"])
+
+        assert "delivery.transform rules" in capsys.readouterr().err
+
+    def test_orchestrator_needs_single_config(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test --orchestrator is rejected for a config directory."""
+        (tmp_path / "config.yaml").write_text(yaml.safe_dump(_valid_config()))
+
+        with pytest.raises(SystemExit):
+            main(["-c", str(tmp_path), "--orchestrator"])
+
+        assert "single config" in capsys.readouterr().err
+
+    def test_resume_requires_work_dir(
+        self, tmp_path: Path, capsys: pytest.CaptureFixture
+    ) -> None:
+        """Test --resume without -w is rejected (a temp work dir has no journal)."""
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(_valid_config()))
+
+        with pytest.raises(SystemExit):
+            main(["-c", str(config), "--resume"])
+
+        assert "--work-dir" in capsys.readouterr().err
+
+
+class TestProfile:
+    """Tests for the --profile report of a run."""
+
+    def test_batch_phases_and_projects(self, tmp_path: Path) -> None:
+        """Test a mirror + push run reports every phase once and per-project spans."""
+        from benchmarks.synthetic import create_local_repos
+
+        create_local_repos(tmp_path / "repos", 2, files_per_repo=1)
+        data = _valid_config()
+        data["manifest"]["repo_url"] = f"file://{tmp_path / 'repos' / 'manifest.git'}"
+        config = tmp_path / "config.yaml"
+        config.write_text(yaml.safe_dump(data))
+        profile = tmp_path / "profile.json"
+
+        argv = ["-c", str(config), "--dry-run", "-w", str(tmp_path / "work")]
+        argv += ["--profile", str(profile)]
+        assert main(argv) == 0
+
+        report = json.loads(profile.read_text())
+        phases = report["phases"]
+        for phase in ("config", "manifest", "parse", "filter", "execute"):
+            assert phases[phase]["count"] == 1, phase
+        # A dry run lists upstream refs instead of fetching mirrors
+        assert phases["fetch"]["count"] == phases["push"]["count"] == 2
+        assert not list((tmp_path / "work" / "mirrors").glob("**/*.git"))
+        assert len(report["slowest_projects"]) == 2
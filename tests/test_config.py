@@ -8,7 +8,7 @@ from pathlib import Path
 import pytest
 import yaml
 
-from config.settings import ConfigLoader
+from config.settings import ConfigLoader, discover_config_files
 
 
 @pytest.fixture
@@ -82,3 +82,86 @@ class TestConfigLoader:
             os.environ.pop("GERRIT_USERNAME", None)
             os.environ.pop("GERRIT_PASSWORD", None)
             config_path.unlink()
+
+    def test_load_compiles_transform_rules(self, sample_config: dict, tmp_path: Path) -> None:
+        """Test transform rules are compiled by load()."""
+        sample_config["delivery"]["transform"] = {
+            "branch": [{"match": "^main$", "replace": "vendor-main"}]
+        }
+        sample_config["delivery"]["repo_alias"] = "alias"
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(yaml.dump(sample_config))
+
+        loader = ConfigLoader(config_path)
+        loader.load()
+
+        assert loader.transforms is not None
+        assert loader.transforms.branch.transform("main") == "vendor-main"
+        assert loader.transforms.repo.transform("platform/build") == "platform/alias/build"
+
+    def test_load_concurrency(self, sample_config: dict, tmp_path: Path) -> None:
+        """Test delivery.max_parallel and delivery.max_per_host are loaded and validated."""
+        sample_config["delivery"]["max_parallel"] = 8
+        sample_config["delivery"]["max_per_host"] = 2
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(yaml.dump(sample_config))
+
+        loader = ConfigLoader(config_path)
+        loader.load()
+        assert (loader.max_parallel, loader.max_per_host) == (8, 2)
+
+        sample_config["delivery"]["max_parallel"] = 0
+        config_path.write_text(yaml.dump(sample_config))
+        with pytest.raises(ValueError, match="max_parallel must be a positive integer"):
+            ConfigLoader(config_path).load()
+
+    def test_load_mirror_cache_budget(self, sample_config: dict, tmp_path: Path) -> None:
+        """Test delivery.mirror_cache_max_bytes accepts sizes and rejects garbage."""
+        sample_config["delivery"]["mirror_cache_max_bytes"] = "50G"
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(yaml.dump(sample_config))
+
+        loader = ConfigLoader(config_path)
+        loader.load()
+        assert loader.mirror_cache_max_bytes == 50 * 1024**3
+
+        sample_config["delivery"]["mirror_cache_max_bytes"] = "lots"
+        config_path.write_text(yaml.dump(sample_config))
+        with pytest.raises(ValueError, match="mirror_cache_max_bytes must be a size"):
+            ConfigLoader(config_path).load()
+
+    def test_load_invalid_transform_rule(self, sample_config: dict, tmp_path: Path) -> None:
+        """Test an invalid transform rule fails at load time."""
+        sample_config["delivery"]["transform"] = {"repo": [{"match": "(", "replace": ""}]}
+        config_path = tmp_path / "config.yaml"
+        config_path.write_text(yaml.dump(sample_config))
+
+        with pytest.raises(ValueError, match="Invalid repo rule"):
+            ConfigLoader(config_path).load()
+
+
+class TestDiscoverConfigFiles:
+    """Tests for discover_config_files."""
+
+    def test_expand_directory(self, tmp_path: Path) -> None:
+        """Test directories expand to their YAML files in name order."""
+        config_dir = tmp_path / "configs"
+        config_dir.mkdir()
+        for name in ("b.yaml", "a.yml", "notes.txt"):
+            (config_dir / name).write_text("manifest: {}\n")
+        single = tmp_path / "single.yaml"
+        single.write_text("manifest: {}\n")
+
+        files = discover_config_files([config_dir, single, config_dir / "a.yml"])
+
+        assert [f.name for f in files] == ["a.yml", "b.yaml", "single.yaml"]
+
+    def test_missing_path(self, tmp_path: Path) -> None:
+        """Test a missing config path raises error."""
+        with pytest.raises(FileNotFoundError):
+            discover_config_files([tmp_path / "missing.yaml"])
+
+    def test_empty_directory(self, tmp_path: Path) -> None:
+        """Test a directory without config files raises error."""
+        with pytest.raises(ValueError, match="No configuration files"):
+            discover_config_files([tmp_path])
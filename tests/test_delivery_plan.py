@@ -0,0 +1,61 @@
+"""
+Tests for delivery plan files.
+"""
+import json
+from pathlib import Path
+
+import pytest
+
+from util.delivery_plan import PlanEntry, read_plan, write_plan
+
+
+def _entry(project: str = "platform/build") -> PlanEntry:
+    return PlanEntry(
+        project=project,
+        remote_url="https://android.example.com/",
+        revision="main",
+        source_sha="a" * 40,
+        gerrit_url="https://gerrit.example.com",
+        target_repo=f"alias/{project}",
+        target_branch="main240101",
+    )
+
+
+class TestDeliveryPlan:
+    """Tests for write_plan and read_plan."""
+
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        """Test entries are written as JSON Lines and read back in order."""
+        path = tmp_path / "plan.jsonl"
+        entries = [_entry("platform/build"), _entry("platform/art")]
+
+        assert write_plan(path, entries) == 2
+        assert read_plan(path) == entries
+        assert len(path.read_text().splitlines()) == 3
+
+    def test_urls(self) -> None:
+        """Test source and target URLs are derived from the entry."""
+        entry = _entry()
+        assert entry.source_url == "https://android.example.com/platform/build"
+        assert entry.target_url == "https://gerrit.example.com/alias/platform/build"
+
+    def test_unsupported_version(self, tmp_path: Path) -> None:
+        """Test plans of another format version are rejected."""
+        path = tmp_path / "plan.jsonl"
+        path.write_text(json.dumps({"version": 99}) + "\n")
+        with pytest.raises(ValueError, match="Unsupported delivery plan version"):
+            read_plan(path)
+
+    def test_malformed_entry(self, tmp_path: Path) -> None:
+        """Test entries with unknown fields are rejected."""
+        path = tmp_path / "plan.jsonl"
+        path.write_text(json.dumps({"version": 1}) + "\n" + json.dumps({"repo": "x"}) + "\n")
+        with pytest.raises(ValueError, match="Malformed delivery plan"):
+            read_plan(path)
+
+    def test_empty_plan(self, tmp_path: Path) -> None:
+        """Test an empty file is rejected."""
+        path = tmp_path / "plan.jsonl"
+        path.write_text("")
+        with pytest.raises(ValueError, match="empty"):
+            read_plan(path)
@@ -0,0 +1,112 @@
+"""
+Tests for structured progress events.
+"""
+import json
+import threading
+from pathlib import Path
+from typing import List
+
+from util.events import (
+    EVENT_DONE,
+    EVENT_FAILED,
+    EVENT_PUSHING,
+    EVENT_QUEUED,
+    EVENT_SKIPPED,
+    Event,
+    EventStream,
+    JsonlEventWriter,
+    SummaryCollector,
+    open_event_stream,
+)
+
+
+class TestEvent:
+    """Tests for Event."""
+
+    def test_to_dict_drops_unset_fields(self) -> None:
+        """Test only fields with values are serialized."""
+        event = Event(EVENT_DONE, "platform/build", config="a.yaml", duration=1.5, time=10.0)
+
+        assert event.to_dict() == {
+            "state": "done",
+            "project": "platform/build",
+            "config": "a.yaml",
+            "duration": 1.5,
+            "time": 10.0,
+        }
+
+
+class TestJsonlEventWriter:
+    """Tests for JsonlEventWriter."""
+
+    def test_writes_all_events_from_threads(self, tmp_path: Path) -> None:
+        """Test events emitted concurrently are all written as JSON lines."""
+        path = tmp_path / "events.jsonl"
+        with JsonlEventWriter(path) as writer:
+            stream = EventStream([writer])
+
+            def emit(worker: int) -> None:
+                for i in range(50):
+                    stream.emit(EVENT_PUSHING, f"p{worker}-{i}", index=i)
+
+            threads = [threading.Thread(target=emit, args=(n,)) for n in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        lines = path.read_text().splitlines()
+        assert len(lines) == 200
+        assert {json.loads(line)["project"] for line in lines} == {
+            f"p{w}-{i}" for w in range(4) for i in range(50)
+        }
+
+    def test_close_is_idempotent(self, tmp_path: Path) -> None:
+        """Test closing twice doesn't block."""
+        writer = JsonlEventWriter(tmp_path / "events.jsonl")
+        writer.close()
+        writer.close()
+
+
+class TestSummaryCollector:
+    """Tests for SummaryCollector."""
+
+    def test_result_from_final_events(self) -> None:
+        """Test the summary counts final states in project order."""
+        collector = SummaryCollector()
+        stream = EventStream([collector])
+        stream.emit(EVENT_QUEUED, "a", config="x", index=0)
+        stream.emit(EVENT_FAILED, "c", config="x", index=2, error_class="permanent")
+        stream.emit(EVENT_DONE, "a", config="x", index=0)
+        stream.emit(EVENT_FAILED, "b", config="x", index=1)
+        stream.emit(EVENT_SKIPPED, "d", config="x", index=3)
+        stream.emit(EVENT_DONE, "a", config="y", index=0)
+
+        result = collector.result("x", total_projects=10, filtered_projects=4)
+
+        assert (result.total_projects, result.filtered_projects) == (10, 4)
+        assert (result.successful, result.failed, result.skipped) == (1, 2, 1)
+        assert result.failed_projects == ["b", "c"]
+        assert result.skipped_projects == ["d"]
+        assert collector.result("y", 1, 1).successful == 1
+        assert collector.result("z", 0, 0).successful == 0
+
+
+class TestOpenEventStream:
+    """Tests for open_event_stream."""
+
+    def test_disabled(self) -> None:
+        """Test no stream is created without a path."""
+        with open_event_stream(None) as stream:
+            assert stream is None
+
+    def test_file_is_complete_on_exit(self, tmp_path: Path) -> None:
+        """Test all events are on disk once the block exits."""
+        path = tmp_path / "events.jsonl"
+        with open_event_stream(path) as stream:
+            assert stream is not None
+            for i in range(10):
+                stream.emit(EVENT_QUEUED, f"p{i}")
+
+        states: List[str] = [json.loads(line)["state"] for line in path.read_text().splitlines()]
+        assert states == [EVENT_QUEUED] * 10
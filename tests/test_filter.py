@@ -1,7 +1,18 @@
 """
 Tests for revision filter.
 """
-from util.manifest_filter import filter_projects_by_revision, is_hash_revision
+from util.manifest_filter import (
+    REVISION_BRANCH,
+    REVISION_EMPTY,
+    REVISION_HASH,
+    REVISION_REF,
+    REVISION_TAG,
+    classify_projects,
+    classify_revision,
+    filter_projects_by_revision,
+    is_hash_revision,
+    iter_filter_projects_by_revision,
+)
 from lib.manifest.models import Project
 
 
@@ -84,3 +95,88 @@ class TestFilterProjectsByRevision:
         """Test filtering empty list."""
         filtered = filter_projects_by_revision([])
         assert len(filtered) == 0
+
+
+class TestIterFilterProjectsByRevision:
+    """Tests for streaming project filtering."""
+
+    def test_filter_generator_input(self) -> None:
+        """Test filtering consumes a generator lazily."""
+        consumed = []
+
+        def stream():
+            for name, revision in [("repo1", "main"), ("repo2", "a1b2c3d"), ("repo3", "v1.0")]:
+                consumed.append(name)
+                yield Project(name=name, path=name, revision=revision)
+
+        filtered = iter_filter_projects_by_revision(stream())
+        assert consumed == []
+
+        first = next(filtered)
+        assert first.name == "repo1"
+        assert consumed == ["repo1"]
+
+        assert [p.name for p in filtered] == ["repo3"]
+
+    def test_counts_while_streaming(self) -> None:
+        """Test per-category counts cover excluded projects as they are consumed."""
+        projects = (
+            Project(name=n, path=n, revision=r)
+            for n, r in [("a", "main"), ("b", "a1b2c3d"), ("c", None), ("d", "v1.0")]
+        )
+        counts = {}
+
+        kept = list(iter_filter_projects_by_revision(projects, counts))
+
+        assert [p.name for p in kept] == ["a", "d"]
+        assert counts == {REVISION_BRANCH: 1, REVISION_HASH: 1, REVISION_EMPTY: 1, REVISION_TAG: 1}
+
+    def test_list_wrapper_accepts_iterable(self) -> None:
+        """Test filter_projects_by_revision accepts any iterable."""
+        projects = (Project(name=n, path=n, revision=r) for n, r in [("a", "main"), ("b", None)])
+        assert [p.name for p in filter_projects_by_revision(projects)] == ["a"]
+
+
+class TestClassifyRevision:
+    """Tests for revision classification."""
+
+    def test_categories(self) -> None:
+        """Test each revision category is detected."""
+        assert classify_revision("a1b2c3d4e5f6789012345678901234567890abcd") == REVISION_HASH
+        assert classify_revision("main") == REVISION_BRANCH
+        assert classify_revision("feature/new-feature") == REVISION_BRANCH
+        assert classify_revision("v1.0.0") == REVISION_TAG
+        assert classify_revision("android-14.0.0_r1") == REVISION_TAG
+        assert classify_revision("refs/heads/main") == REVISION_REF
+        assert classify_revision("refs/tags/v1.0") == REVISION_REF
+        assert classify_revision("") == REVISION_EMPTY
+        assert classify_revision(None) == REVISION_EMPTY
+        assert classify_revision("   ") == REVISION_EMPTY
+
+
+class TestClassifyProjects:
+    """Tests for batch project classification."""
+
+    def test_counts_and_kept(self) -> None:
+        """Test kept projects and per-category counts from one pass."""
+        projects = [
+            Project(name="repo1", path="repo1", revision="main"),
+            Project(name="repo2", path="repo2", revision="a1b2c3d4e5f6"),
+            Project(name="repo3", path="repo3", revision="v1.0.0"),
+            Project(name="repo4", path="repo4", revision="refs/heads/dev"),
+            Project(name="repo5", path="repo5", revision=None),
+            Project(name="repo6", path="repo6", revision="main"),
+        ]
+
+        result = classify_projects(projects)
+
+        assert [p.name for p in result.kept] == ["repo1", "repo3", "repo4", "repo6"]
+        assert result.counts == {
+            REVISION_BRANCH: 2,
+            REVISION_TAG: 1,
+            REVISION_REF: 1,
+            REVISION_HASH: 1,
+            REVISION_EMPTY: 1,
+        }
+        assert result.total == 6
+        assert result.excluded == 2
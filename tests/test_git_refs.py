@@ -0,0 +1,67 @@
+"""
+Tests for remote ref query utilities.
+"""
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from util.git_refs import ls_remote, resolve_revision
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def remote_repo(tmp_path: Path) -> Path:
+    """Create a repository with a branch and an annotated tag."""
+    repo = tmp_path / "upstream"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    (repo / "README").write_text("hello\n")
+    _git(repo, "add", "README")
+    _git(repo, "commit", "-q", "-m", "initial")
+    _git(repo, "tag", "-a", "v1.0", "-m", "release")
+    return repo
+
+
+class TestLsRemote:
+    """Tests for ls_remote."""
+
+    def test_lists_heads_and_peeled_tags(self, remote_repo: Path) -> None:
+        """Test heads are listed and annotated tags resolve to commits."""
+        head = _git(remote_repo, "rev-parse", "HEAD")
+        refs = ls_remote(str(remote_repo))
+
+        assert refs["refs/heads/main"] == head
+        assert refs["refs/tags/v1.0"] == head
+
+    def test_patterns(self, remote_repo: Path) -> None:
+        """Test patterns limit the listing."""
+        refs = ls_remote(str(remote_repo), ["refs/heads/*"])
+        assert list(refs) == ["refs/heads/main"]
+
+    def test_missing_remote(self, tmp_path: Path) -> None:
+        """Test failure raises RuntimeError."""
+        with pytest.raises(RuntimeError, match="ls-remote failed"):
+            ls_remote(str(tmp_path / "missing"))
+
+
+class TestResolveRevision:
+    """Tests for resolve_revision."""
+
+    def test_resolve(self) -> None:
+        """Test branch, tag and full ref resolution."""
+        refs = {"refs/heads/main": "a" * 40, "refs/tags/v1.0": "b" * 40}
+        assert resolve_revision(refs, "main") == "a" * 40
+        assert resolve_revision(refs, "v1.0") == "b" * 40
+        assert resolve_revision(refs, "refs/tags/v1.0") == "b" * 40
+        assert resolve_revision(refs, "develop") is None
+        assert resolve_revision(refs, "") is None
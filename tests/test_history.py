@@ -0,0 +1,112 @@
+"""
+Tests for delivery history scheduling.
+"""
+from pathlib import Path
+
+import pytest
+
+from lib.delivery.history import (
+    DEFAULT_EXPECTED_SECONDS,
+    HISTORY_FILE_NAME,
+    DeliveryHistory,
+    simulate_makespan,
+)
+from lib.manifest.models import Project
+
+
+class TestSimulateMakespan:
+    """Tests for simulate_makespan."""
+
+    def test_longest_first_is_shorter(self) -> None:
+        """Test scheduling a large task last stretches the tail."""
+        assert simulate_makespan([1, 1, 1, 1, 4], workers=2) == 6
+        assert simulate_makespan([4, 1, 1, 1, 1], workers=2) == 4
+
+    def test_invalid_workers(self) -> None:
+        """Test non-positive worker count raises error."""
+        with pytest.raises(ValueError, match="workers"):
+            simulate_makespan([1], workers=0)
+
+
+class TestDeliveryHistory:
+    """Tests for DeliveryHistory."""
+
+    def test_record_save_and_reload(self, tmp_path: Path) -> None:
+        """Test timings persist with a moving average."""
+        history = DeliveryHistory.for_work_dir(tmp_path)
+        history.record("platform/build", 10.0, 2.0, 1000)
+        history.record("platform/build", 20.0, 4.0)
+        history.save()
+
+        reloaded = DeliveryHistory(tmp_path / HISTORY_FILE_NAME)
+        timing = reloaded.timings["platform/build"]
+        assert timing.fetch_seconds == 15.0
+        assert timing.push_seconds == 3.0
+        assert timing.bytes == 1000
+        assert timing.runs == 2
+
+    def test_expected_seconds_fallbacks(self, tmp_path: Path) -> None:
+        """Test estimates for known, sized and unknown projects."""
+        history = DeliveryHistory(tmp_path / HISTORY_FILE_NAME)
+        assert history.expected_seconds("new") == DEFAULT_EXPECTED_SECONDS
+
+        history.record("a", 8.0, 2.0, 1000)
+        history.record("b", 1.0, 1.0, 1000)
+        history.record("c", 3.0, 1.0)
+
+        assert history.expected_seconds("a") == 10.0
+        # 12 seconds for 2000 bytes observed
+        assert history.expected_seconds("new", size_hint=500) == 3.0
+        # Median of 10, 2 and 4
+        assert history.expected_seconds("new") == 4.0
+
+    def test_expected_bytes(self, tmp_path: Path) -> None:
+        """Test size estimates use the last run, then the median of known sizes."""
+        history = DeliveryHistory(tmp_path / HISTORY_FILE_NAME)
+        assert history.expected_bytes("new") == 0
+
+        history.record("a", 1.0, 1.0, 1000)
+        history.record("b", 1.0, 1.0, 3000)
+        history.record("c", 1.0, 1.0)
+
+        assert history.expected_bytes("a") == 1000
+        assert history.expected_bytes("c") == 2000
+        assert history.expected_bytes("new") == 2000
+
+    def test_schedule_longest_first(self, tmp_path: Path) -> None:
+        """Test projects are ordered by expected duration, ties in manifest order."""
+        history = DeliveryHistory(tmp_path / HISTORY_FILE_NAME)
+        history.record("small", 1.0, 0.0)
+        history.record("kernel", 50.0, 10.0)
+        projects = [
+            Project(name="small", path="small", revision="main"),
+            Project(name="x", path="x", revision="main"),
+            Project(name="kernel", path="kernel", revision="main"),
+            Project(name="y", path="y", revision="main"),
+        ]
+
+        ordered = history.schedule(projects)
+
+        assert [p.name for p in ordered] == ["kernel", "x", "y", "small"]
+        # Unseen projects are estimated at the median (30.5s)
+        assert history.predict_makespan(ordered, workers=2) == 61.0
+
+    @pytest.mark.parametrize("content", ["{not json", '{"projects": {"a": {"bogus": 1}}}', "[]"])
+    def test_unreadable_file_starts_empty(
+        self, tmp_path: Path, caplog: pytest.LogCaptureFixture, content: str
+    ) -> None:
+        """Test a corrupt history file is ignored with a warning and replaced on save."""
+        path = tmp_path / "history.json"
+        path.write_text(content)
+
+        history = DeliveryHistory(path)
+        history.record("a", 1.0, 1.0)
+        history.save()
+
+        assert "Ignoring unreadable delivery history" in caplog.text
+        assert DeliveryHistory(path).timings["a"].runs == 1
+
+    def test_invalid_smoothing(self, tmp_path: Path) -> None:
+        """Test out-of-range smoothing raises error."""
+        with pytest.raises(ValueError, match="smoothing"):
+            DeliveryHistory(tmp_path / HISTORY_FILE_NAME, smoothing=0)
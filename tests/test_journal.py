@@ -0,0 +1,115 @@
+"""
+Tests for the delivery journal.
+"""
+from pathlib import Path
+
+import pytest
+
+from lib.delivery.journal import (
+    OUTCOME_FAILED,
+    OUTCOME_SKIPPED,
+    OUTCOME_SUCCESS,
+    DeliveryJournal,
+)
+from lib.manifest.models import Project
+
+
+class TestDeliveryJournal:
+    """Tests for DeliveryJournal."""
+
+    def test_record_and_replay(self, tmp_path: Path) -> None:
+        """Test recorded outcomes are replayed, the latest one winning."""
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            journal.record("repo1", OUTCOME_SUCCESS)
+            journal.record("repo2", OUTCOME_FAILED, "push rejected")
+            journal.record("repo2", OUTCOME_SUCCESS)
+
+        state = DeliveryJournal.replay(journal.path)
+
+        assert state.run_key == "run-1"
+        assert state.outcomes == {"repo1": OUTCOME_SUCCESS, "repo2": OUTCOME_SUCCESS}
+
+    def test_torn_last_line_is_ignored(self, tmp_path: Path) -> None:
+        """Test a partially written record doesn't break replay."""
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            journal.record("repo1", OUTCOME_SUCCESS)
+        with journal.path.open("a", encoding="utf-8") as f:
+            f.write('{"project":"repo2","outc')
+
+        state = DeliveryJournal.replay(journal.path)
+        assert state.outcomes == {"repo1": OUTCOME_SUCCESS}
+
+    def test_resume_after_torn_line_appends_cleanly(self, tmp_path: Path) -> None:
+        """Test the first record after resuming doesn't land on a torn line."""
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            journal.record("repo1", OUTCOME_SUCCESS)
+        with journal.path.open("a", encoding="utf-8") as f:
+            f.write('{"project":"repo2","outc')
+
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1", resume=True)
+            journal.record("repo2", OUTCOME_SUCCESS)
+
+        state = DeliveryJournal.replay(journal.path)
+        assert state.outcomes == {"repo1": OUTCOME_SUCCESS, "repo2": OUTCOME_SUCCESS}
+
+    def test_resume_skips_done_and_retries_failed(self, tmp_path: Path) -> None:
+        """Test resuming delivers only failed and pending projects."""
+        projects = [Project(name=f"repo{i}", path=f"repo{i}", revision="main") for i in range(4)]
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            journal.record("repo0", OUTCOME_SUCCESS)
+            journal.record("repo1", OUTCOME_FAILED)
+            journal.record("repo2", OUTCOME_SKIPPED)
+
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            state = journal.start("run-1", resume=True)
+            done, todo = state.partition(projects)
+            assert [p.name for p in done] == ["repo0", "repo2"]
+            assert [p.name for p in todo] == ["repo1", "repo3"]
+
+            journal.record("repo1", OUTCOME_SUCCESS)
+            journal.record("repo3", OUTCOME_FAILED)
+
+        summary = DeliveryJournal.replay(journal.path).summarize([p.name for p in projects])
+        assert summary.successful == ["repo0", "repo1"]
+        assert summary.failed == ["repo3"]
+        assert summary.skipped == ["repo2"]
+        assert summary.pending == []
+
+    def test_resume_with_different_run_key_starts_fresh(self, tmp_path: Path) -> None:
+        """Test a journal of another run is discarded."""
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            journal.record("repo0", OUTCOME_SUCCESS)
+
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            state = journal.start("run-2", resume=True)
+
+        assert state.outcomes == {}
+        assert DeliveryJournal.replay(journal.path).run_key == "run-2"
+
+    def test_start_without_resume_truncates(self, tmp_path: Path) -> None:
+        """Test a fresh start drops previous outcomes."""
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            journal.record("repo0", OUTCOME_SUCCESS)
+            journal.start("run-1")
+
+        assert DeliveryJournal.replay(journal.path).outcomes == {}
+
+    def test_record_requires_start(self, tmp_path: Path) -> None:
+        """Test recording before start is an error."""
+        journal = DeliveryJournal.for_work_dir(tmp_path)
+        with pytest.raises(RuntimeError, match="not started"):
+            journal.record("repo0", OUTCOME_SUCCESS)
+
+    def test_unknown_outcome(self, tmp_path: Path) -> None:
+        """Test unknown outcomes are rejected."""
+        with DeliveryJournal.for_work_dir(tmp_path) as journal:
+            journal.start("run-1")
+            with pytest.raises(ValueError, match="Unknown outcome"):
+                journal.record("repo0", "done")
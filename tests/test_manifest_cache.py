@@ -0,0 +1,127 @@
+"""
+Tests for parsed-manifest cache.
+"""
+import os
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from lib.manifest.manifest_cache import ManifestCache
+from lib.manifest.models import ManifestConfig, Project
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def manifest_repo(tmp_path: Path) -> Path:
+    """Create a manifest repository with a branch and a tag."""
+    repo = tmp_path / "manifest"
+    repo.mkdir()
+    _git(repo, "init", "-q", "-b", "main")
+    (repo / "default.xml").write_text("<manifest />\n")
+    _git(repo, "add", "default.xml")
+    _git(repo, "commit", "-q", "-m", "manifest")
+    _git(repo, "tag", "-a", "release-1", "-m", "release")
+    return repo
+
+
+@pytest.fixture
+def projects() -> list:
+    """Parsed projects to cache."""
+    return [
+        Project(name="platform/build", path="build", revision="main"),
+        Project(name="platform/core", path="system/core", revision=None),
+    ]
+
+
+class TestManifestCache:
+    """Tests for ManifestCache."""
+
+    def test_resolve_sha(self, manifest_repo: Path) -> None:
+        """Test branch and tag are resolved to the manifest commit."""
+        head = _git(manifest_repo, "rev-parse", "HEAD")
+
+        branch_config = ManifestConfig(repo_url=str(manifest_repo), branch="main")
+        tag_config = ManifestConfig(repo_url=str(manifest_repo), tag="release-1")
+        missing_config = ManifestConfig(repo_url=str(manifest_repo), branch="develop")
+
+        assert ManifestCache.resolve_sha(branch_config) == head
+        assert ManifestCache.resolve_sha(tag_config) == head
+        assert ManifestCache.resolve_sha(missing_config) is None
+
+    def test_key_includes_settings(self) -> None:
+        """Test settings that change parsing are part of the key."""
+        config = ManifestConfig(repo_url="https://example.com/manifest", branch="main")
+        other = ManifestConfig(
+            repo_url="https://example.com/manifest", branch="main", default_revision="dev"
+        )
+        assert ManifestCache.key(config, "a" * 40) != ManifestCache.key(other, "a" * 40)
+        assert ManifestCache.key(config, "a" * 40).startswith("a" * 40)
+
+    def test_store_and_load(self, tmp_path: Path, projects: list) -> None:
+        """Test a stored project list loads back equal."""
+        cache = ManifestCache(tmp_path)
+        assert cache.load("key") is None
+
+        cache.store("key", projects)
+        loaded = cache.load("key")
+
+        assert loaded is not None
+        assert [(p.name, p.path, p.revision) for p in loaded] == [
+            (p.name, p.path, p.revision) for p in projects
+        ]
+
+    def test_remote_urls_and_manifest_copy(self, tmp_path: Path, projects: list) -> None:
+        """Test an entry keeps remote URLs and a copy of the manifest file."""
+        manifest = tmp_path / "resolved.xml"
+        manifest.write_text("<manifest />\n")
+        cache = ManifestCache(tmp_path / "cache")
+        cache.store("key", projects, {"build": "https://upstream"}, manifest)
+        manifest.unlink()
+
+        entry = cache.load_manifest("key")
+
+        assert entry is not None
+        assert entry.remote_urls == {"build": "https://upstream"}
+        assert entry.manifest_path is not None
+        assert entry.manifest_path.read_text() == "<manifest />\n"
+        cache.invalidate("key")
+        assert not entry.manifest_path.exists()
+
+    def test_invalidate(self, tmp_path: Path, projects: list) -> None:
+        """Test invalidate forces a miss."""
+        cache = ManifestCache(tmp_path)
+        cache.store("key", projects)
+        cache.invalidate("key")
+        assert cache.load("key") is None
+
+    def test_corrupt_entry(self, tmp_path: Path) -> None:
+        """Test an unreadable entry is discarded as a miss."""
+        cache = ManifestCache(tmp_path)
+        (tmp_path / "key.json").write_text("{not json")
+        assert cache.load("key") is None
+        assert not (tmp_path / "key.json").exists()
+
+    def test_lru_eviction(self, tmp_path: Path, projects: list) -> None:
+        """Test least recently used entries are evicted over budget."""
+        cache = ManifestCache(tmp_path)
+        cache.store("old", projects)
+        cache.store("recent", projects)
+        os.utime(tmp_path / "old.json", (1, 1))
+        entry_size = (tmp_path / "recent.json").stat().st_size
+
+        cache.max_bytes = entry_size * 2
+        cache.store("new", projects)
+
+        assert not (tmp_path / "old.json").exists()
+        assert cache.load("recent") is not None
+        assert cache.load("new") is not None
@@ -0,0 +1,68 @@
+"""
+Tests for manifest diff.
+"""
+from lib.manifest.models import Project
+from util.manifest_diff import diff_projects
+
+
+def _project(name: str, revision: str, path: str = "") -> Project:
+    return Project(name=name, path=path or name, revision=revision)
+
+
+class TestDiffProjects:
+    """Tests for diff_projects."""
+
+    def test_added_changed_removed(self) -> None:
+        """Test each kind of difference is detected."""
+        baseline = [
+            _project("platform/build", "main"),
+            _project("platform/art", "android-13.0.0_r1"),
+            _project("platform/old", "main"),
+        ]
+        target = [
+            _project("platform/new", "main"),
+            _project("platform/build", "main"),
+            _project("platform/art", "android-14.0.0_r1"),
+        ]
+
+        diff = diff_projects(baseline, target)
+
+        assert [p.name for p in diff.added] == ["platform/new"]
+        assert [(old.revision, new.revision) for old, new in diff.changed] == [
+            ("android-13.0.0_r1", "android-14.0.0_r1")
+        ]
+        assert [p.name for p in diff.removed] == ["platform/old"]
+        assert diff.unchanged == 1
+        assert [p.name for p in diff.to_deliver] == ["platform/new", "platform/art"]
+
+    def test_path_is_part_of_key(self) -> None:
+        """Test a project checked out at a new path counts as added and removed."""
+        diff = diff_projects(
+            [_project("platform/build", "main", "build")],
+            [_project("platform/build", "main", "build/make")],
+        )
+
+        assert [p.path for p in diff.added] == ["build/make"]
+        assert [p.path for p in diff.removed] == ["build"]
+
+    def test_identical_manifests(self) -> None:
+        """Test identical manifests have nothing to deliver."""
+        projects = [_project("platform/build", "main")]
+        diff = diff_projects(projects, projects)
+
+        assert not diff.has_changes
+        assert diff.to_deliver == []
+
+    def test_format(self) -> None:
+        """Test the human-readable rendering."""
+        diff = diff_projects(
+            [_project("platform/art", "v1.0"), _project("platform/old", "main")],
+            [_project("platform/art", "v1.1"), _project("platform/new", "main")],
+        )
+
+        assert diff.format().splitlines() == [
+            "+ platform/new (platform/new) main",
+            "~ platform/art (platform/art) v1.0 -> v1.1",
+            "- platform/old (platform/old)",
+            "1 added, 1 changed, 1 removed, 0 unchanged",
+        ]
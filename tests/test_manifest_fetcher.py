@@ -0,0 +1,159 @@
+"""
+Tests for lightweight manifest fetch.
+"""
+import subprocess
+from pathlib import Path
+
+import pytest
+
+from lib.manifest.fetcher import (
+    ManifestFetchError,
+    ManifestFetcher,
+    RepoInitFetcher,
+    fetch_manifest,
+)
+from lib.manifest.models import ManifestConfig
+from lib.manifest.parser import ManifestParser
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+@pytest.fixture
+def manifest_remote(tmp_path: Path) -> str:
+    """Create a bare manifest repository with an include, a branch and a tag."""
+    work = tmp_path / "manifest-work"
+    (work / "sub").mkdir(parents=True)
+    _git(work, "init", "-q", "-b", "main")
+    (work / "default.xml").write_text(
+        """<?xml version="1.0" encoding="UTF-8"?>
+<manifest>
+    <remote name="default" fetch="https://example.com/" />
+    <default revision="main" remote="default" />
+    <project name="platform/build" path="build" revision="main" />
+    <include name="sub/extra.xml" />
+</manifest>
+"""
+    )
+    (work / "sub" / "extra.xml").write_text(
+        """<?xml version="1.0" encoding="UTF-8"?>
+<manifest>
+    <project name="vendor/tools" path="vendor/tools" revision="release-1" />
+</manifest>
+"""
+    )
+    _git(work, "add", "-A")
+    _git(work, "commit", "-q", "-m", "v1")
+    _git(work, "tag", "v1")
+
+    (work / "default.xml").write_text('<manifest><project name="new" path="new" /></manifest>')
+    _git(work, "commit", "-q", "-am", "v2")
+
+    bare = tmp_path / "manifest.git"
+    _git(tmp_path, "clone", "-q", "--bare", str(work), str(bare))
+    return f"file://{bare}"
+
+
+def _fake_repo(tmp_path: Path, manifest: Path) -> Path:
+    """Create a stand-in repo launcher logging its arguments and exporting manifest."""
+    log = tmp_path / "repo.log"
+    script = tmp_path / "bin" / "repo"
+    script.parent.mkdir(parents=True, exist_ok=True)
+    script.write_text(
+        "#!/bin/sh\n"
+        f'echo "$@" >> "{log}"\n'
+        f'if [ "$1" = manifest ]; then cp "{manifest}" "$3"; fi\n'
+    )
+    script.chmod(0o755)
+    return script
+
+
+class TestManifestFetcher:
+    """Tests for ManifestFetcher."""
+
+    def test_fetch_tag_with_includes(self, manifest_remote: str, tmp_path: Path) -> None:
+        """Test a tag is fetched and includes are inlined for the parser."""
+        config = ManifestConfig(repo_url=manifest_remote, tag="v1")
+        resolved = ManifestFetcher(config, tmp_path / "work").fetch()
+
+        projects = ManifestParser(resolved).parse()
+        assert [p.name for p in projects] == ["platform/build", "vendor/tools"]
+
+    def test_fetch_branch_is_shallow(self, manifest_remote: str, tmp_path: Path) -> None:
+        """Test a branch fetch gets only the tip commit."""
+        config = ManifestConfig(repo_url=manifest_remote, branch="main")
+        fetcher = ManifestFetcher(config, tmp_path / "work")
+        resolved = fetcher.fetch()
+
+        assert [p.name for p in ManifestParser(resolved).parse()] == ["new"]
+        assert _git(fetcher.checkout_dir, "rev-list", "--count", "HEAD") == "1"
+
+    def test_missing_ref(self, manifest_remote: str, tmp_path: Path) -> None:
+        """Test an unknown branch raises ManifestFetchError."""
+        config = ManifestConfig(repo_url=manifest_remote, branch="develop")
+        with pytest.raises(ManifestFetchError, match="git fetch failed"):
+            ManifestFetcher(config, tmp_path / "work").fetch()
+
+    def test_recursive_include(self, tmp_path: Path) -> None:
+        """Test recursive includes are rejected."""
+        config = ManifestConfig(repo_url="unused", branch="main")
+        fetcher = ManifestFetcher(config, tmp_path)
+        fetcher.checkout_dir.mkdir()
+        (fetcher.checkout_dir / "default.xml").write_text(
+            '<manifest><include name="default.xml" /></manifest>'
+        )
+
+        with pytest.raises(ValueError, match="Recursive"):
+            fetcher.resolve_includes(fetcher.checkout_dir / "default.xml")
+
+
+class TestFetchManifest:
+    """Tests for fetch_manifest."""
+
+    def test_fallback(self, tmp_path: Path) -> None:
+        """Test fallback is used when the native fetch fails."""
+        config = ManifestConfig(repo_url=str(tmp_path / "missing"), branch="main")
+        fallback_path = tmp_path / "repo-init.xml"
+
+        assert fetch_manifest(config, tmp_path / "work", fallback=lambda: fallback_path) == (
+            fallback_path
+        )
+
+    def test_no_fallback(self, tmp_path: Path) -> None:
+        """Test failure propagates without fallback."""
+        config = ManifestConfig(repo_url=str(tmp_path / "missing"), branch="main")
+        with pytest.raises(ManifestFetchError):
+            fetch_manifest(config, tmp_path / "work")
+
+
+class TestRepoInitFetcher:
+    """Tests for RepoInitFetcher."""
+
+    def test_fetch_tag(self, tmp_path: Path) -> None:
+        """Test repo init gets the tag ref and the merged manifest is exported."""
+        manifest = tmp_path / "merged.xml"
+        manifest.write_text('<manifest><project name="a" path="a" /></manifest>')
+        repo = _fake_repo(tmp_path, manifest)
+        config = ManifestConfig(repo_url="https://example.com/manifest", tag="v1")
+
+        resolved = RepoInitFetcher(config, tmp_path / "work", repo_command=str(repo)).fetch()
+
+        assert [p.name for p in ManifestParser(resolved).parse()] == ["a"]
+        init, export = (tmp_path / "repo.log").read_text().splitlines()
+        assert init == "init -q -u https://example.com/manifest -m default.xml -b refs/tags/v1"
+        assert export.startswith("manifest -o ")
+
+    def test_missing_launcher(self, tmp_path: Path) -> None:
+        """Test a missing repo launcher raises ManifestFetchError."""
+        config = ManifestConfig(repo_url="https://example.com/manifest", branch="main")
+        fetcher = RepoInitFetcher(config, tmp_path, repo_command=str(tmp_path / "no-repo"))
+
+        with pytest.raises(ManifestFetchError, match="Cannot run"):
+            fetcher.fetch()
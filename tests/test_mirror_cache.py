@@ -0,0 +1,123 @@
+"""
+Tests for bare-mirror cache.
+"""
+import subprocess
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from lib.delivery.mirror_cache import MirrorCache
+
+
+def _git(cwd: Path, *args: str) -> str:
+    return subprocess.run(
+        ["git", "-c", "user.name=test", "-c", "user.email=test@example.com", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+
+
+def _commit(repo: Path, content: str) -> str:
+    (repo / "file.txt").write_text(content)
+    _git(repo, "add", "file.txt")
+    _git(repo, "commit", "-q", "-m", content)
+    return _git(repo, "rev-parse", "HEAD")
+
+
+@pytest.fixture
+def upstream(tmp_path: Path) -> Path:
+    """Create an upstream remote with two projects."""
+    remote = tmp_path / "remote"
+    for name in ("platform/build", "platform/core"):
+        repo = remote / name
+        repo.mkdir(parents=True)
+        _git(repo, "init", "-q", "-b", "main")
+        _commit(repo, f"{name} v1\n" + "x" * 4096)
+    return remote
+
+
+class TestMirrorCache:
+    """Tests for MirrorCache."""
+
+    def test_path_is_stable_per_remote(self, tmp_path: Path) -> None:
+        """Test path is keyed by remote URL and project name."""
+        cache = MirrorCache(tmp_path / "cache")
+        path = cache.path_for("https://a.example.com", "platform/build")
+
+        assert path == cache.path_for("https://a.example.com", "platform/build")
+        assert path != cache.path_for("https://b.example.com", "platform/build")
+        assert path.name.startswith("platform_build-")
+
+    def test_clone_then_incremental_fetch(self, tmp_path: Path, upstream: Path) -> None:
+        """Test first use clones and later use fetches new commits."""
+        cache = MirrorCache(tmp_path / "cache")
+
+        with cache.open_mirror(str(upstream), "platform/build") as mirror:
+            first = _git(mirror, "rev-parse", "refs/heads/main")
+            assert _git(mirror, "rev-parse", "--is-bare-repository") == "true"
+
+        head = _commit(upstream / "platform/build", "v2")
+        with cache.open_mirror(str(upstream), "platform/build") as mirror:
+            assert _git(mirror, "rev-parse", "refs/heads/main") == head
+
+        assert head != first
+        assert len(cache.entries()) == 1
+
+    def test_lru_eviction(self, tmp_path: Path, upstream: Path) -> None:
+        """Test least recently used mirror is evicted over budget."""
+        cache = MirrorCache(tmp_path / "cache")
+        with cache.open_mirror(str(upstream), "platform/build") as build:
+            pass
+        size = cache.entries()[0].size
+
+        cache.max_bytes = size + size // 2
+        with cache.open_mirror(str(upstream), "platform/core") as core:
+            assert core.exists()
+
+        assert not build.exists()
+        assert [entry.path for entry in cache.entries()] == [core]
+
+    def test_in_use_mirror_is_not_evicted(self, tmp_path: Path, upstream: Path) -> None:
+        """Test a mirror held by another user survives eviction."""
+        cache = MirrorCache(tmp_path / "cache")
+        other = MirrorCache(tmp_path / "cache", max_bytes=0)
+
+        with cache.open_mirror(str(upstream), "platform/build") as build:
+            assert other.evict() == []
+            assert build.exists()
+
+        assert other.evict() == [build]
+
+    def test_eviction_uses_recorded_sizes(
+        self, tmp_path: Path, upstream: Path, monkeypatch: pytest.MonkeyPatch
+    ) -> None:
+        """Test sizes are recorded on update so eviction doesn't walk the mirrors."""
+        import lib.delivery.mirror_cache as mirror_cache_module
+
+        cache = MirrorCache(tmp_path / "cache")
+        with cache.open_mirror(str(upstream), "platform/build") as build:
+            size = cache.size_of(build)
+        assert 0 < size <= mirror_cache_module.directory_size(build)
+
+        walked: List[Path] = []
+        directory_size = mirror_cache_module.directory_size
+
+        def tracked(path: Path) -> int:
+            walked.append(path)
+            return directory_size(path)
+
+        monkeypatch.setattr(mirror_cache_module, "directory_size", tracked)
+        cache.max_bytes = size + size // 2
+        with cache.open_mirror(str(upstream), "platform/core") as core:
+            pass
+
+        assert walked == [core]
+        assert not build.exists()
+
+    def test_negative_budget(self, tmp_path: Path) -> None:
+        """Test negative budget raises error."""
+        with pytest.raises(ValueError, match="max_bytes"):
+            MirrorCache(tmp_path, max_bytes=-1)
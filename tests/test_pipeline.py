@@ -0,0 +1,114 @@
+"""
+Tests for staged delivery pipeline.
+"""
+import logging
+import threading
+import time
+from typing import Iterator, List
+
+import pytest
+
+from lib.delivery.pipeline import Pipeline, Stage
+
+
+class TestPipeline:
+    """Tests for Pipeline."""
+
+    def test_outputs_in_input_order(self) -> None:
+        """Test items pass through every stage and keep input order."""
+        pipeline = Pipeline(
+            [
+                Stage("resolve", lambda n: n + 1, workers=2),
+                Stage("fetch", lambda n: (time.sleep((n % 3) / 100), n * 10)[1], workers=3),
+                Stage("push", str, workers=2),
+            ],
+            log_interval=0,
+        )
+
+        result = pipeline.run(range(10))
+
+        assert result.outputs == [(n, str((n + 1) * 10)) for n in range(10)]
+        assert result.failures == []
+        assert result.stats["push"].processed == 10
+
+    def test_failures_are_reported_per_stage(self) -> None:
+        """Test a failing item stops at its stage and others continue."""
+
+        def fetch(n: int) -> int:
+            if n == 2:
+                raise RuntimeError("fetch failed")
+            return n
+
+        pipeline = Pipeline([Stage("fetch", fetch, workers=2), Stage("push", int)], log_interval=0)
+        result = pipeline.run([1, 2, 3])
+
+        assert [item for item, _ in result.outputs] == [1, 3]
+        assert len(result.failures) == 1
+        assert result.failures[0].item == 2
+        assert result.failures[0].stage == "fetch"
+        assert result.stats["fetch"].failed == 1
+
+    def test_queue_bounds_items_between_stages(self) -> None:
+        """Test a slow stage limits how many items wait in front of it."""
+        in_flight = 0
+        peak = 0
+        lock = threading.Lock()
+
+        def fetch(n: int) -> int:
+            nonlocal in_flight, peak
+            with lock:
+                in_flight += 1
+                peak = max(peak, in_flight)
+            return n
+
+        def push(n: int) -> int:
+            nonlocal in_flight
+            time.sleep(0.01)
+            with lock:
+                in_flight -= 1
+            return n
+
+        pipeline = Pipeline(
+            [Stage("fetch", fetch, workers=4), Stage("push", push, workers=1)],
+            queue_size=2,
+            log_interval=0,
+        )
+        pipeline.run(range(20))
+
+        # Queue capacity + push workers + fetch workers blocked on a full queue
+        assert peak <= 2 + 1 + 4
+
+    def test_stats_logged(self, caplog: pytest.LogCaptureFixture) -> None:
+        """Test per-stage queue depth and throughput are logged at debug level."""
+        pipeline = Pipeline([Stage("fetch", int)], log_interval=0)
+
+        with caplog.at_level(logging.DEBUG, logger="lib.delivery.pipeline"):
+            pipeline.run([1, 2])
+
+        assert "Stage fetch: queue=0/4" in caplog.text
+        assert "throughput=" in caplog.text
+
+    def test_failing_input_stops_stages(self) -> None:
+        """Test an exception from the input iterator ends the worker threads."""
+        processed: List[int] = []
+
+        def items() -> Iterator[int]:
+            yield 1
+            raise RuntimeError("manifest truncated")
+
+        pipeline = Pipeline([Stage("fetch", processed.append, workers=2)], log_interval=0)
+
+        with pytest.raises(RuntimeError, match="manifest truncated"):
+            pipeline.run(items())
+
+        assert processed == [1]
+        assert not [t for t in threading.enumerate() if t.name.startswith("pipeline-")]
+
+    def test_invalid_configuration(self) -> None:
+        """Test invalid stage or queue settings raise errors."""
+        with pytest.raises(ValueError, match="at least one stage"):
+            Pipeline([])
+        with pytest.raises(ValueError, match="queue_size"):
+            Pipeline([Stage("fetch", int)], queue_size=0)
+        with pytest.raises(ValueError, match="workers"):
+            Stage("fetch", int, workers=0)
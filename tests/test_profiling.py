@@ -0,0 +1,79 @@
+"""
+Tests for timing instrumentation.
+"""
+import json
+from pathlib import Path
+
+from util.profiling import Profiler, percentile
+
+
+class TestPercentile:
+    """Tests for percentile."""
+
+    def test_nearest_rank(self) -> None:
+        """Test nearest-rank percentile values."""
+        values = [float(v) for v in range(1, 101)]
+        assert percentile(values, 0.50) == 50.0
+        assert percentile(values, 0.95) == 95.0
+        assert percentile([3.0], 0.95) == 3.0
+
+    def test_empty(self) -> None:
+        """Test no samples yields zero."""
+        assert percentile([], 0.5) == 0.0
+
+
+class TestProfiler:
+    """Tests for Profiler."""
+
+    def test_span_records_duration_and_bytes(self) -> None:
+        """Test span context manager records a span."""
+        profiler = Profiler()
+        with profiler.span("fetch", project="platform/build") as span:
+            span.bytes = 1024
+
+        assert len(profiler.spans) == 1
+        assert profiler.spans[0].seconds >= 0
+        assert profiler.spans[0].bytes == 1024
+
+    def test_report(self) -> None:
+        """Test report aggregates phases and ranks slowest projects."""
+        profiler = Profiler()
+        profiler.record("parse", 2.0)
+        profiler.record("fetch", 1.0, project="a", bytes=100)
+        profiler.record("fetch", 5.0, project="b", bytes=200)
+        profiler.record("push", 1.0, project="a")
+        profiler.record("push", 0.5, project="c")
+
+        report = profiler.report(slowest=2)
+
+        assert report["phases"]["fetch"]["count"] == 2
+        assert report["phases"]["fetch"]["total"] == 6.0
+        assert report["phases"]["fetch"]["max"] == 5.0
+        assert report["phases"]["fetch"]["bytes"] == 300
+        assert report["phases"]["parse"]["p50"] == 2.0
+        assert [p["project"] for p in report["slowest_projects"]] == ["b", "a"]
+        assert report["slowest_projects"][1]["phases"] == {"fetch": 1.0, "push": 1.0}
+
+    def test_write_json(self, tmp_path: Path) -> None:
+        """Test JSON report is written."""
+        profiler = Profiler()
+        profiler.record("push", 1.5, project="a")
+        path = tmp_path / "profile.json"
+
+        profiler.write_json(path)
+
+        data = json.loads(path.read_text())
+        assert data["phases"]["push"]["total"] == 1.5
+
+    def test_write_prometheus(self, tmp_path: Path) -> None:
+        """Test Prometheus textfile output."""
+        profiler = Profiler()
+        profiler.record("push", 1.5, project="a")
+        path = tmp_path / "delivery.prom"
+
+        profiler.write_prometheus(path)
+
+        text = path.read_text()
+        assert 'cicd_delivery_phase_seconds_total{phase="push"} 1.5' in text
+        assert "# TYPE cicd_delivery_run_seconds gauge" in text
+        assert not (tmp_path / "delivery.prom.tmp").exists()
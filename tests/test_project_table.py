@@ -0,0 +1,77 @@
+"""
+Tests for columnar project table.
+"""
+import pytest
+
+from lib.manifest.models import Project
+from lib.manifest.project_table import ProjectRecord, ProjectTable
+from util.manifest_filter import REVISION_BRANCH, REVISION_HASH, REVISION_TAG, classify_projects
+
+
+@pytest.fixture
+def table() -> ProjectTable:
+    """Table with shared revisions and a name checked out twice."""
+    return ProjectTable.from_projects(
+        [
+            Project(name="platform/build", path="build", revision="main"),
+            Project(name="platform/core", path="system/core", revision="a1b2c3d"),
+            Project(name="platform/tools", path="tools", revision="v1.0.0"),
+            Project(name="platform/build", path="build/soong", revision="main"),
+            Project(name="platform/empty", path="empty", revision=None),
+        ]
+    )
+
+
+class TestProjectTable:
+    """Tests for ProjectTable."""
+
+    def test_lookup_indexes(self, table: ProjectTable) -> None:
+        """Test lookups by path, name and revision."""
+        assert len(table) == 5
+        assert table.get_by_path("tools") == ProjectRecord(
+            "platform/tools", "tools", "v1.0.0", None
+        )
+        assert table.get_by_path("missing") is None
+        assert [r.path for r in table.find_by_name("platform/build")] == ["build", "build/soong"]
+        assert table.rows_with_revision("main") == [0, 3]
+
+    def test_revisions_are_interned(self, table: ProjectTable) -> None:
+        """Test equal revision strings share one object."""
+        first, fourth = table.record(0), table.record(3)
+        assert first.revision is fourth.revision
+
+    def test_duplicate_names(self, table: ProjectTable) -> None:
+        """Test names checked out at several paths are reported."""
+        assert table.duplicate_names() == {"platform/build": ["build", "build/soong"]}
+
+    def test_duplicate_path(self, table: ProjectTable) -> None:
+        """Test a duplicate path raises error."""
+        with pytest.raises(ValueError, match="Duplicate project path"):
+            table.append("other", "build")
+
+    def test_empty_name(self) -> None:
+        """Test empty name raises error."""
+        with pytest.raises(ValueError, match="name cannot be empty"):
+            ProjectTable().append("", "path")
+
+    def test_filter_by_revision_matches_list_filter(self, table: ProjectTable) -> None:
+        """Test table filtering agrees with classify_projects."""
+        view, counts = table.filter_by_revision()
+        expected = classify_projects(table.view().to_projects())
+
+        assert [r.path for r in view] == [p.path for p in expected.kept]
+        assert counts == expected.counts
+        assert counts[REVISION_BRANCH] == 2
+        assert counts[REVISION_TAG] == 1
+        assert counts[REVISION_HASH] == 1
+
+    def test_views_share_storage(self, table: ProjectTable) -> None:
+        """Test views narrow without copying and materialize on demand."""
+        view, _ = table.filter_by_revision()
+        narrowed = view.filter(lambda record: record.name == "platform/build")
+
+        assert view.table is table
+        assert list(narrowed.rows) == [0, 3]
+        projects = narrowed.to_projects()
+        assert isinstance(projects[0], Project)
+        assert projects[1].path == "build/soong"
@@ -0,0 +1,108 @@
+"""
+Tests for Gerrit remote ref snapshot.
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict, Iterator, List
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from lib.delivery.remote_snapshot import (
+    STATUS_MISSING_REPO,
+    STATUS_PUSH,
+    STATUS_UP_TO_DATE,
+    RemoteRefSnapshot,
+)
+
+GERRIT_PROJECTS: Dict[str, Dict[str, str]] = {
+    "platform/build": {"main": "a" * 40, "develop": "b" * 40},
+    "platform/core": {"main": "c" * 40},
+    "All-Projects": {},
+}
+
+
+class _GerritHandler(BaseHTTPRequestHandler):
+    """Minimal stand-in for Gerrit's project listing endpoint."""
+
+    requests: List[str] = []
+
+    def do_GET(self) -> None:  # noqa: N802
+        parsed = urlparse(self.path)
+        self.requests.append(self.path)
+        if parsed.path.startswith("/a/") and "Authorization" not in self.headers:
+            self.send_response(401)
+            self.end_headers()
+            return
+
+        wanted = parse_qs(parsed.query).get("b", [])
+        listing = {}
+        for name, branches in GERRIT_PROJECTS.items():
+            info: dict = {"id": name}
+            if wanted:
+                found = {b: sha for b, sha in branches.items() if b in wanted}
+                if not found:
+                    continue
+                info["branches"] = found
+            listing[name] = info
+
+        body = (")]}'\n" + json.dumps(listing)).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format: str, *args: object) -> None:
+        pass
+
+
+@pytest.fixture
+def gerrit_server() -> Iterator[str]:
+    """Run a local HTTP server standing in for Gerrit."""
+    _GerritHandler.requests = []
+    server = HTTPServer(("127.0.0.1", 0), _GerritHandler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{server.server_port}"
+    server.shutdown()
+    server.server_close()
+
+
+class TestRemoteRefSnapshot:
+    """Tests for RemoteRefSnapshot."""
+
+    def test_from_gerrit_rest(self, gerrit_server: str) -> None:
+        """Test snapshot is built from project and branch listings."""
+        snapshot = RemoteRefSnapshot.from_gerrit_rest(gerrit_server, ["main", "develop", "main"])
+
+        assert snapshot.has_repo("All-Projects")
+        assert snapshot.branch_sha("platform/build", "develop") == "b" * 40
+        assert snapshot.branch_sha("platform/core", "main") == "c" * 40
+        assert snapshot.branch_sha("platform/core", "develop") is None
+        # One project listing plus one batched branch query
+        assert len(_GerritHandler.requests) == 2
+
+    def test_authenticated_endpoint(self, gerrit_server: str) -> None:
+        """Test credentials switch to the /a/ endpoints."""
+        snapshot = RemoteRefSnapshot.from_gerrit_rest(
+            gerrit_server, ["main"], username="user", password="secret"
+        )
+
+        assert snapshot.branch_sha("platform/build", "main") == "a" * 40
+        assert all(path.startswith("/a/projects/") for path in _GerritHandler.requests)
+
+    def test_classify(self) -> None:
+        """Test targets are classified against the snapshot."""
+        snapshot = RemoteRefSnapshot({"platform/build": {"main": "a" * 40}})
+
+        assert snapshot.classify("platform/build", "main", "a" * 40) == STATUS_UP_TO_DATE
+        assert snapshot.classify("platform/build", "main", "b" * 40) == STATUS_PUSH
+        assert snapshot.classify("platform/build", "develop", "a" * 40) == STATUS_PUSH
+        assert snapshot.classify("platform/core", "main", "a" * 40) == STATUS_MISSING_REPO
+
+    def test_missing_repos(self) -> None:
+        """Test missing repositories are reported once, sorted."""
+        snapshot = RemoteRefSnapshot({"platform/build": {}})
+        repos = ["platform/x", "platform/build", "platform/a", "platform/x"]
+        assert snapshot.missing_repos(repos) == ["platform/a", "platform/x"]
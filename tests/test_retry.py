@@ -0,0 +1,183 @@
+"""
+Tests for push retry and adaptive concurrency.
+"""
+import random
+import threading
+import time
+from typing import List
+
+import pytest
+
+from lib.delivery.retry import (
+    ERROR_PERMANENT,
+    ERROR_TRANSIENT,
+    AdaptiveLimiter,
+    BackoffPolicy,
+    RetryScheduler,
+    classify_error,
+)
+
+
+class TestClassifyError:
+    """Tests for classify_error."""
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "git push failed: fatal: the remote end hung up unexpectedly",
+            "git push failed: error: RPC failed; HTTP 503 curl 22",
+            "git push failed: remote: Too many concurrent connections",
+            "The requested URL returned error: 429",
+            "ssh: connect to host gerrit port 29418: Connection timed out",
+            "kex_exchange_identification: read: Connection reset by peer",
+        ],
+    )
+    def test_transient(self, message: str) -> None:
+        """Test overload and connection errors are transient."""
+        assert classify_error(RuntimeError(message)) == ERROR_TRANSIENT
+
+    @pytest.mark.parametrize(
+        "message",
+        [
+            "git push failed: ! [remote rejected] main -> main (prohibited by Gerrit)",
+            "git push failed: Permission denied (publickey).",
+            "Revision v1.0 not found in /cache/build.git",
+            "git push failed: git@gerrit: Permission denied (publickey).\n"
+            "fatal: Could not read from remote repository.",
+            "git push failed: ERROR: Git repository not found\n"
+            "fatal: Could not read from remote repository.",
+            "git push failed: error: RPC failed; HTTP 403 curl 22 "
+            "The requested URL returned error: 403",
+            "git push failed: fatal: Authentication failed for 'https://gerrit/build/'",
+        ],
+    )
+    def test_permanent(self, message: str) -> None:
+        """Test rejections, auth errors and missing repos are permanent."""
+        assert classify_error(RuntimeError(message)) == ERROR_PERMANENT
+
+    def test_network_exceptions(self) -> None:
+        """Test network exception types are transient."""
+        assert classify_error(ConnectionResetError()) == ERROR_TRANSIENT
+        assert classify_error(TimeoutError()) == ERROR_TRANSIENT
+
+
+class TestBackoffPolicy:
+    """Tests for BackoffPolicy."""
+
+    def test_delay_is_jittered_and_capped(self) -> None:
+        """Test delays stay below the exponential ceiling and the cap."""
+        policy = BackoffPolicy(base_seconds=1.0, max_seconds=8.0)
+        rng = random.Random(1)
+
+        for attempt, ceiling in ((1, 1.0), (2, 2.0), (3, 4.0), (6, 8.0)):
+            delays = [policy.delay(attempt, rng) for _ in range(50)]
+            assert all(0.0 <= d <= ceiling for d in delays)
+            assert max(delays) > ceiling / 2
+
+    def test_invalid(self) -> None:
+        """Test invalid settings are rejected."""
+        with pytest.raises(ValueError):
+            BackoffPolicy(max_attempts=0)
+
+
+class TestAdaptiveLimiter:
+    """Tests for AdaptiveLimiter."""
+
+    def test_multiplicative_decrease_additive_increase(self) -> None:
+        """Test the limit halves on back-pressure and grows after a window of successes."""
+        limiter = AdaptiveLimiter(maximum=8)
+        limiter.on_backpressure()
+        assert limiter.limit == 4
+        limiter.on_backpressure()
+        limiter.on_backpressure()
+        limiter.on_backpressure()
+        assert limiter.limit == 1
+
+        limiter.on_success()
+        assert limiter.limit == 2
+        limiter.on_success()
+        assert limiter.limit == 2
+        limiter.on_success()
+        assert limiter.limit == 3
+
+    def test_slots_respect_limit(self) -> None:
+        """Test no more than limit operations run at once."""
+        limiter = AdaptiveLimiter(maximum=2)
+        peak: List[int] = [0]
+        lock = threading.Lock()
+
+        def work() -> None:
+            with limiter.slot():
+                with lock:
+                    peak[0] = max(peak[0], limiter.in_flight)
+                time.sleep(0.01)
+
+        threads = [threading.Thread(target=work) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert peak[0] == 2
+        assert limiter.in_flight == 0
+
+
+class TestRetryScheduler:
+    """Tests for RetryScheduler."""
+
+    def _scheduler(self, max_attempts: int = 3) -> RetryScheduler:
+        self.sleeps: List[float] = []
+        return RetryScheduler(
+            4,
+            BackoffPolicy(max_attempts=max_attempts),
+            sleep=self.sleeps.append,
+            rng=random.Random(0),
+        )
+
+    def test_transient_then_success(self) -> None:
+        """Test transient failures are retried and shrink the host's concurrency."""
+        scheduler = self._scheduler()
+        calls: List[int] = []
+
+        def push() -> str:
+            calls.append(1)
+            if len(calls) < 3:
+                raise RuntimeError("git push failed: HTTP 503")
+            return "pushed"
+
+        assert scheduler.call("https://gerrit.example.com/a", push) == "pushed"
+        assert len(calls) == 3
+        assert len(self.sleeps) == 2
+        assert scheduler.retries == 2
+        # 4 -> 2 -> 1 after two failures, then widened by the success
+        assert scheduler.limiter("https://gerrit.example.com/b").limit == 2
+
+    def test_permanent_is_not_retried(self) -> None:
+        """Test permanent failures are raised immediately."""
+        scheduler = self._scheduler()
+
+        def push() -> None:
+            raise RuntimeError("[remote rejected] (prohibited by Gerrit)")
+
+        with pytest.raises(RuntimeError, match="remote rejected"):
+            scheduler.call("https://gerrit.example.com/a", push)
+        assert self.sleeps == []
+
+    def test_retries_exhausted(self) -> None:
+        """Test the last error is raised once attempts run out."""
+        scheduler = self._scheduler(max_attempts=2)
+
+        def push() -> None:
+            raise RuntimeError("Too many concurrent connections")
+
+        with pytest.raises(RuntimeError, match="Too many concurrent"):
+            scheduler.call("ssh://gerrit.example.com:29418/a", push)
+        assert len(self.sleeps) == 1
+
+    def test_hosts_are_independent(self) -> None:
+        """Test back-pressure on one host doesn't limit another."""
+        scheduler = self._scheduler()
+        scheduler.limiter("https://busy.example.com").on_backpressure()
+
+        assert scheduler.limiter("https://busy.example.com/x").limit == 2
+        assert scheduler.limiter("https://idle.example.com/x").limit == 4
@@ -0,0 +1,140 @@
+"""
+Tests for rule-based name transformation.
+"""
+from datetime import datetime
+
+import pytest
+
+from lib.transformer.rules import (
+    NameTransformer,
+    NameTransforms,
+    alias_rules,
+    compile_rules,
+    run_date,
+)
+
+NOW = datetime(2024, 1, 2, 23, 59, 59)
+
+
+class TestCompileRules:
+    """Tests for compile_rules."""
+
+    def test_rules_apply_in_order(self) -> None:
+        """Test rules are chained and {date} is the pinned stamp."""
+        rules = compile_rules(
+            [
+                {"match": r"^release/(.+)$", "replace": r"vendor/\1"},
+                {"match": r"$", "replace": "_{date}"},
+            ],
+            "240102",
+        )
+        transformer = NameTransformer(rules)
+
+        assert transformer.transform("release/14") == "vendor/14_240102"
+        assert transformer.transform("main") == "main_240102"
+
+    def test_group_followed_by_date(self) -> None:
+        """Test a numeric group reference directly before {date} stays group 1."""
+        rules = compile_rules([{"match": r"^(.+)$", "replace": r"\1{date}"}], "240102")
+        assert NameTransformer(rules).transform("main") == "main240102"
+
+    def test_stop(self) -> None:
+        """Test a matching rule with stop ends the rule list."""
+        rules = compile_rules(
+            [
+                {"match": r"^dev$", "replace": "develop", "stop": True},
+                {"match": r"^(.+)$", "replace": r"\1-x"},
+            ],
+            "",
+        )
+        assert NameTransformer(rules).transform_many(["dev", "main"]) == ["develop", "main-x"]
+
+    @pytest.mark.parametrize(
+        "spec, message",
+        [
+            ({"match": "a"}, "needs 'match' and 'replace'"),
+            ({"match": "(", "replace": "b"}, "invalid pattern"),
+            ({"match": "(a)", "replace": r"\2"}, "missing group 2"),
+            ({"match": "(?P<x>a)", "replace": r"\g<y>"}, "unknown group 'y'"),
+            ({"match": "a", "replace": "b", "when": "c"}, "unknown keys"),
+        ],
+    )
+    def test_invalid(self, spec: dict, message: str) -> None:
+        """Test malformed rules are rejected when compiled."""
+        with pytest.raises(ValueError, match=message):
+            compile_rules([spec], "")
+
+
+class TestNameTransformer:
+    """Tests for NameTransformer."""
+
+    def test_no_rules_and_empty_names(self) -> None:
+        """Test names pass through without rules, and empty names always."""
+        transformer = NameTransformer(compile_rules(alias_rules("alias"), ""))
+        assert NameTransformer().transform("main") == "main"
+        assert transformer.transform("") == ""
+        assert transformer.transform_revision(None) is None
+
+    def test_memoized(self) -> None:
+        """Test each distinct name is transformed once."""
+        transformer = NameTransformer(compile_rules([{"match": "a", "replace": "b"}], ""))
+        assert transformer.transform_many(["a", "a", "ca"]) == ["b", "b", "cb"]
+        assert transformer._cache == {"a": "b", "ca": "cb"}
+
+
+class TestNameTransforms:
+    """Tests for NameTransforms.from_config."""
+
+    def test_presets_match_legacy_transformers(self) -> None:
+        """Test branch_transform and repo_alias behave as before."""
+        transforms = NameTransforms.from_config(branch_transform=True, repo_alias="alias", now=NOW)
+
+        assert transforms.branch.transform("main") == "main240102"
+        assert transforms.branch.transform_revision(None) is None
+        assert transforms.repo.transform_many(["platform/build", "a/b/c", "repo"]) == [
+            "platform/alias/build",
+            "a/b/alias/c",
+            "alias/repo",
+        ]
+        assert not transforms.custom
+
+    def test_default_is_identity(self) -> None:
+        """Test no options leave names unchanged."""
+        transforms = NameTransforms.from_config()
+        assert transforms.branch.transform("main") == "main"
+        assert transforms.repo.transform("platform/build") == "platform/build"
+
+    def test_custom_rules_and_date_format(self) -> None:
+        """Test explicit rule lists with a custom date format."""
+        transforms = NameTransforms.from_config(
+            {
+                "date_format": "%Y-%m-%d",
+                "branch": [{"match": r"^(.+)$", "replace": r"\1-{date}"}],
+                "repo": [{"match": r"^platform/", "replace": "vendor/"}],
+            },
+            repo_alias=None,
+            now=NOW,
+        )
+
+        assert transforms.branch.transform("main") == "main-2024-01-02"
+        assert transforms.repo.transform("platform/build") == "vendor/build"
+        assert transforms.custom
+
+    @pytest.mark.parametrize(
+        "data, kwargs, message",
+        [
+            ({"branch": []}, {"branch_transform": True}, "either 'branch_transform'"),
+            ({"repo": []}, {"repo_alias": "a"}, "either 'repo_alias'"),
+            ({"branches": []}, {}, "Unknown keys"),
+            ({"branch": {"match": "a"}}, {}, "must be a list"),
+            ({"repo": [{"match": "("}]}, {}, "Invalid repo rule"),
+        ],
+    )
+    def test_invalid(self, data: dict, kwargs: dict, message: str) -> None:
+        """Test malformed sections are rejected."""
+        with pytest.raises(ValueError, match=message):
+            NameTransforms.from_config(data, **kwargs)
+
+    def test_run_date_is_pinned(self) -> None:
+        """Test every configuration of a run uses the same date."""
+        assert run_date() is run_date()
@@ -0,0 +1,151 @@
+"""
+Tests for delivery sharding.
+"""
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from lib.manifest.models import Project
+from util.sharding import (
+    PartialResult,
+    assign_shards,
+    merge_partial_results,
+    parse_shard,
+    select_shard,
+)
+
+
+class TestParseShard:
+    """Tests for parse_shard."""
+
+    def test_valid(self) -> None:
+        """Test K/N parsing."""
+        assert parse_shard("1/4") == (1, 4)
+        assert parse_shard("4/4") == (4, 4)
+
+    @pytest.mark.parametrize("value", ["0/4", "5/4", "1/0", "a/b", "3"])
+    def test_invalid(self, value: str) -> None:
+        """Test malformed or out-of-range specs raise error."""
+        with pytest.raises(ValueError, match="Invalid shard"):
+            parse_shard(value)
+
+
+class TestAssignShards:
+    """Tests for assign_shards."""
+
+    def test_partition_is_complete_and_order_independent(self) -> None:
+        """Test every name lands in exactly one shard regardless of input order."""
+        names = [f"platform/project{i}" for i in range(100)]
+        forward = assign_shards(names, 4)
+        backward = assign_shards(reversed(names), 4)
+
+        assert forward == backward
+        assert set(forward) == set(names)
+        assert set(forward.values()) == {1, 2, 3, 4}
+
+    def test_unweighted_is_stable_when_projects_are_added(self) -> None:
+        """Test adding projects doesn't move existing ones without weights."""
+        names = [f"platform/project{i}" for i in range(50)]
+        before = assign_shards(names, 3)
+        after = assign_shards(names + ["platform/new"], 3)
+        assert all(after[name] == shard for name, shard in before.items())
+
+    def test_weighted_balances_load(self) -> None:
+        """Test weights spread heavy repositories across shards."""
+        weights = {"kernel": 100.0, "prebuilts": 90.0, "a": 10.0, "b": 10.0, "c": 5.0}
+        assignment = assign_shards(weights, 2, weight_of=weights.__getitem__)
+
+        loads = {1: 0.0, 2: 0.0}
+        for name, shard in assignment.items():
+            loads[shard] += weights[name]
+        assert assignment["kernel"] != assignment["prebuilts"]
+        assert abs(loads[1] - loads[2]) <= 15.0
+
+
+class TestSelectShard:
+    """Tests for select_shard."""
+
+    def test_shards_cover_projects_in_order(self) -> None:
+        """Test shards are disjoint, complete and keep manifest order."""
+        projects = [Project(name=f"repo{i}", path=f"repo{i}", revision="main") for i in range(20)]
+        shards = [select_shard(projects, k, 3) for k in (1, 2, 3)]
+
+        assert sorted(p.name for shard in shards for p in shard) == sorted(
+            p.name for p in projects
+        )
+        for shard in shards:
+            assert shard == [p for p in projects if p in shard]
+
+
+class TestPartialResult:
+    """Tests for partial result files and merging."""
+
+    def test_roundtrip(self, tmp_path: Path) -> None:
+        """Test a DeliveryResult-like object is written and read back."""
+        result = SimpleNamespace(
+            total_projects=10,
+            filtered_projects=6,
+            successful=5,
+            failed=1,
+            skipped=0,
+            failed_projects=["repo3"],
+            skipped_projects=[],
+        )
+        path = tmp_path / "shard1.json"
+        PartialResult.from_result(result, shard="1/2").write(path)
+
+        loaded = PartialResult.read(path)
+        assert loaded.failed_projects == ["repo3"]
+        assert loaded.shard == "1/2"
+
+    def test_merge_shards(self) -> None:
+        """Test shard results are combined in shard order."""
+        second = PartialResult(10, 3, 2, 1, 0, ["repo9"], [], shard="2/2")
+        first = PartialResult(10, 3, 3, 0, 1, [], ["repo1"], shard="1/2")
+
+        merged = merge_partial_results([second, first])
+
+        assert merged.total_projects == 10
+        assert merged.filtered_projects == 6
+        assert merged.successful == 5
+        assert merged.failed == 1
+        assert merged.failed_projects == ["repo9"]
+        assert merged.skipped_projects == ["repo1"]
+
+    def test_merge_unchanged_and_makespan(self) -> None:
+        """Test unchanged counts add up and runners' makespans take the longest."""
+        first = PartialResult(unchanged=2, predicted_makespan_seconds=9.0, makespan_seconds=7.5)
+        second = PartialResult(unchanged=1, predicted_makespan_seconds=8.0, makespan_seconds=8.5)
+
+        merged = merge_partial_results([first, second])
+
+        assert merged.unchanged == 3
+        assert (merged.predicted_makespan_seconds, merged.makespan_seconds) == (9.0, 8.5)
+
+    def test_merge_revision_counts(self) -> None:
+        """Test revision counts are summed across configurations but taken once for shards."""
+        counts = {"branch": 3, "hash": 2}
+
+        configs = merge_partial_results(
+            [PartialResult(revision_counts=counts), PartialResult(revision_counts={"hash": 1})]
+        )
+        shards = merge_partial_results(
+            [
+                PartialResult(shard="1/2", revision_counts=counts),
+                PartialResult(shard="2/2", revision_counts=counts),
+            ]
+        )
+
+        assert configs.revision_counts == {"branch": 3, "hash": 3}
+        assert shards.revision_counts == counts
+
+    def test_merge_missing_shard(self) -> None:
+        """Test a missing shard is an error."""
+        with pytest.raises(ValueError, match="Missing shards: \\[2\\]"):
+            merge_partial_results([PartialResult(shard="1/3"), PartialResult(shard="3/3")])
+
+    def test_merge_duplicate_shard(self) -> None:
+        """Test a duplicated shard is an error."""
+        with pytest.raises(ValueError, match="Duplicate shards"):
+            merge_partial_results([PartialResult(shard="1/2"), PartialResult(shard="1/2")])
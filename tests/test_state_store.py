@@ -0,0 +1,68 @@
+"""
+Tests for delivery state store.
+"""
+from pathlib import Path
+
+from lib.delivery.state_store import STATE_DB_NAME, DeliveryStateStore, StateKey, make_state_key
+from lib.manifest.models import Project
+from lib.transformer.branch_transformer import BranchTransformer
+from lib.transformer.repo_transformer import RepoTransformer
+
+GERRIT_URL = "https://gerrit.example.com"
+
+
+class TestDeliveryStateStore:
+    """Tests for DeliveryStateStore."""
+
+    def test_record_and_get(self, tmp_path: Path) -> None:
+        """Test recorded SHA is returned for the same key."""
+        key = StateKey(GERRIT_URL, "platform/build", "main")
+        with DeliveryStateStore(tmp_path) as store:
+            assert store.get(key) is None
+            store.record(key, "a" * 40)
+            assert store.get(key) == "a" * 40
+
+        assert (tmp_path / STATE_DB_NAME).exists()
+
+    def test_persists_across_instances(self, tmp_path: Path) -> None:
+        """Test state survives reopening the store."""
+        key = StateKey(GERRIT_URL, "platform/build", "main")
+        with DeliveryStateStore(tmp_path) as store:
+            store.record(key, "a" * 40)
+            store.record(key, "b" * 40)
+
+        with DeliveryStateStore(tmp_path) as store:
+            assert store.get(key) == "b" * 40
+
+    def test_keys_are_per_gerrit(self, tmp_path: Path) -> None:
+        """Test the same repo on another Gerrit is a different key."""
+        with DeliveryStateStore(tmp_path) as store:
+            store.record(StateKey(GERRIT_URL, "repo", "main"), "a" * 40)
+            assert store.get(StateKey("https://other.example.com", "repo", "main")) is None
+
+    def test_split_unchanged(self, tmp_path: Path) -> None:
+        """Test candidates are split by whether the upstream SHA moved."""
+        same = StateKey(GERRIT_URL, "repo1", "main")
+        moved = StateKey(GERRIT_URL, "repo2", "main")
+        new = StateKey(GERRIT_URL, "repo3", "main")
+
+        with DeliveryStateStore(tmp_path) as store:
+            store.record_many([(same, "a" * 40), (moved, "b" * 40)])
+            changed, unchanged = store.split_unchanged(
+                [(same, "a" * 40), (moved, "c" * 40), (new, "d" * 40)]
+            )
+
+        assert changed == [moved, new]
+        assert unchanged == [same]
+
+
+class TestMakeStateKey:
+    """Tests for make_state_key."""
+
+    def test_uses_transformed_names(self) -> None:
+        """Test key is built from transformed repo and branch names."""
+        project = Project(name="platform/build", path="build", revision="main")
+        key = make_state_key(
+            GERRIT_URL, project, RepoTransformer(alias="alias"), BranchTransformer()
+        )
+        assert key == StateKey(GERRIT_URL, "platform/alias/build", "main")
@@ -0,0 +1,95 @@
+"""
+Tests for streaming manifest parser.
+"""
+from pathlib import Path
+
+import pytest
+
+from lib.manifest.stream_parser import StreamingManifestParser
+
+
+@pytest.fixture
+def manifest_dir(tmp_path: Path) -> Path:
+    """Create a manifest with an include file."""
+    (tmp_path / "default.xml").write_text(
+        """<?xml version="1.0" encoding="UTF-8"?>
+<manifest>
+    <remote name="default" fetch="https://example.com/" />
+    <default revision="main" remote="default" />
+
+    <project name="platform/build" path="build" revision="main">
+        <copyfile src="core/root.mk" dest="Makefile" />
+    </project>
+    <project name="platform/system/core" path="system/core" revision="a1b2c3d" />
+    <include name="extra.xml" />
+    <project name="platform/packages/apps/Settings" />
+</manifest>
+"""
+    )
+    (tmp_path / "extra.xml").write_text(
+        """<?xml version="1.0" encoding="UTF-8"?>
+<manifest>
+    <project name="vendor/tools" path="vendor/tools" revision="release-1" />
+</manifest>
+"""
+    )
+    return tmp_path
+
+
+class TestStreamingManifestParser:
+    """Tests for StreamingManifestParser."""
+
+    def test_iter_projects(self, manifest_dir: Path) -> None:
+        """Test projects are yielded in order with includes resolved."""
+        parser = StreamingManifestParser(manifest_dir / "default.xml")
+        projects = list(parser.iter_projects())
+
+        assert [p.name for p in projects] == [
+            "platform/build",
+            "platform/system/core",
+            "vendor/tools",
+            "platform/packages/apps/Settings",
+        ]
+        assert projects[2].revision == "release-1"
+
+    def test_default_revision_and_path(self, manifest_dir: Path) -> None:
+        """Test default revision and path fallback are applied."""
+        parser = StreamingManifestParser(manifest_dir / "default.xml")
+        settings = list(parser.iter_projects())[-1]
+
+        assert settings.path == "platform/packages/apps/Settings"
+        assert settings.revision == "main"
+        assert parser.default_remote == "default"
+
+    def test_is_lazy(self, manifest_dir: Path) -> None:
+        """Test the first project is available before the rest is consumed."""
+        parser = StreamingManifestParser(manifest_dir / "default.xml")
+        iterator = parser.iter_projects()
+        assert next(iterator).name == "platform/build"
+
+    def test_defaults_reset_between_iterations(self, tmp_path: Path) -> None:
+        """Test a second pass doesn't apply the defaults seen by the first one early."""
+        manifest = tmp_path / "default.xml"
+        manifest.write_text(
+            '<manifest><project name="early" /><default revision="main" />'
+            '<project name="late" /></manifest>'
+        )
+        parser = StreamingManifestParser(manifest)
+
+        first = list(parser.iter_projects())
+        second = list(parser.iter_projects())
+
+        assert [p.revision for p in first] == [p.revision for p in second] == [None, "main"]
+
+    def test_missing_include(self, tmp_path: Path) -> None:
+        """Test a missing include raises error."""
+        manifest = tmp_path / "default.xml"
+        manifest.write_text('<manifest><include name="missing.xml" /></manifest>')
+
+        with pytest.raises(FileNotFoundError, match="Included manifest"):
+            list(StreamingManifestParser(manifest).iter_projects())
+
+    def test_parse_nonexistent_file(self) -> None:
+        """Test parsing non-existent file raises error."""
+        with pytest.raises(FileNotFoundError):
+            StreamingManifestParser(Path("/nonexistent/file.xml"))
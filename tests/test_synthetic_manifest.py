@@ -0,0 +1,43 @@
+"""
+Tests for synthetic benchmark manifests.
+"""
+from pathlib import Path
+
+import pytest
+
+from benchmarks.synthetic import synthetic_projects, write_manifest
+from lib.manifest.stream_parser import StreamingManifestParser
+from util.manifest_filter import is_hash_revision
+
+
+class TestSyntheticProjects:
+    """Tests for synthetic_projects."""
+
+    def test_deterministic(self) -> None:
+        """Test the same seed yields the same projects."""
+        assert list(synthetic_projects(50, seed=1)) == list(synthetic_projects(50, seed=1))
+        assert list(synthetic_projects(50, seed=1)) != list(synthetic_projects(50, seed=2))
+
+    def test_hash_ratio(self) -> None:
+        """Test hash ratio controls the share of hash revisions."""
+        revisions = [r for _, _, r in synthetic_projects(2000, hash_ratio=0.25)]
+        hashes = sum(1 for r in revisions if is_hash_revision(r))
+        assert 400 < hashes < 600
+
+        assert not any(is_hash_revision(r) for _, _, r in synthetic_projects(100, hash_ratio=0))
+
+    def test_invalid_ratio(self) -> None:
+        """Test out-of-range ratio raises error."""
+        with pytest.raises(ValueError, match="hash_ratio"):
+            list(synthetic_projects(1, hash_ratio=1.5))
+
+
+class TestWriteManifest:
+    """Tests for write_manifest."""
+
+    def test_manifest_is_parseable(self, tmp_path: Path) -> None:
+        """Test generated manifest parses to the requested project count."""
+        manifest = write_manifest(tmp_path / "default.xml", 120)
+        projects = list(StreamingManifestParser(manifest).iter_projects())
+        assert len(projects) == 120
+        assert len({p.name for p in projects}) == 120
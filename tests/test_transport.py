@@ -0,0 +1,167 @@
+"""
+Tests for shared Gerrit transport sessions.
+"""
+import os
+import subprocess
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from lib.delivery import transport as transport_module
+from lib.delivery.transport import (
+    HttpAuthSession,
+    SshMultiplexer,
+    create_transport,
+    session_key,
+    ssh_push_url,
+)
+from lib.manifest.models import DeliveryConfig
+
+
+@pytest.fixture
+def ssh_calls(monkeypatch: pytest.MonkeyPatch) -> List[List[str]]:
+    """Record ssh commands instead of running them."""
+    calls: List[List[str]] = []
+
+    def fake_run(command: List[str], **kwargs: object) -> subprocess.CompletedProcess:
+        calls.append(command)
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    monkeypatch.setattr(transport_module.subprocess, "run", fake_run)
+    return calls
+
+
+class TestSshMultiplexer:
+    """Tests for SshMultiplexer."""
+
+    def test_one_master_per_host(self, ssh_calls: List[List[str]]) -> None:
+        """Test the master is started once per host and port."""
+        with SshMultiplexer(ssh_key_path="/keys/id_rsa", username="bot") as mux:
+            mux.start("ssh://gerrit.example.com:29418")
+            mux.start("ssh://gerrit.example.com:29418/")
+            mux.start("other.example.com")
+
+        masters = [c for c in ssh_calls if "-M" in c]
+        assert len(masters) == 2
+        assert masters[0][-1] == "bot@gerrit.example.com"
+        assert "-i" in masters[0] and "/keys/id_rsa" in masters[0]
+
+    def test_close_tears_down_masters(self, ssh_calls: List[List[str]]) -> None:
+        """Test close exits every master and removes the control dir."""
+        mux = SshMultiplexer()
+        mux.start("ssh://gerrit.example.com:29418")
+        control_dir = mux.control_dir
+
+        mux.close()
+        mux.close()
+
+        exits = [c for c in ssh_calls if "-O" in c]
+        assert len(exits) == 1
+        assert exits[0][-1] == "gerrit.example.com"
+        assert not os.path.exists(control_dir)
+
+    def test_git_env_reuses_control_path(self, ssh_calls: List[List[str]]) -> None:
+        """Test git ssh command points at the shared control path."""
+        with SshMultiplexer(ssh_key_path="/keys/id_rsa") as mux:
+            env = mux.git_env()
+            assert f"ControlPath={mux.control_dir}/%C" in env["GIT_SSH_COMMAND"]
+            assert "ControlMaster=auto" in env["GIT_SSH_COMMAND"]
+
+    def test_git_env_logs_in_as_configured_user(self, ssh_calls: List[List[str]]) -> None:
+        """Test pushes use the master's user, so they share its control socket."""
+        with SshMultiplexer(username="bot") as mux:
+            mux.start("ssh://gerrit.example.com:29418")
+            assert "-l bot" in mux.git_env()["GIT_SSH_COMMAND"]
+        master = next(c for c in ssh_calls if "-M" in c)
+        assert master[master.index("-l") + 1] == "bot"
+
+        with SshMultiplexer() as mux:
+            assert "-l" not in mux.git_env()["GIT_SSH_COMMAND"].split()
+
+    def test_master_failure(self, monkeypatch: pytest.MonkeyPatch) -> None:
+        """Test failed master connection raises error."""
+
+        def fake_run(command: List[str], **kwargs: object) -> subprocess.CompletedProcess:
+            return subprocess.CompletedProcess(command, 255, "", "Permission denied")
+
+        monkeypatch.setattr(transport_module.subprocess, "run", fake_run)
+        with SshMultiplexer() as mux:
+            with pytest.raises(RuntimeError, match="Permission denied"):
+                mux.start("gerrit.example.com")
+
+
+class TestSshPushUrl:
+    """Tests for ssh_push_url and session_key."""
+
+    @pytest.mark.parametrize(
+        "url, expected",
+        [
+            ("ssh://gerrit.example.com", "ssh://gerrit.example.com:29418"),
+            ("gerrit.example.com", "ssh://gerrit.example.com:29418"),
+            ("ssh://bot@gerrit.example.com/base", "ssh://bot@gerrit.example.com:29418/base"),
+            ("ssh://gerrit.example.com:2222", "ssh://gerrit.example.com:2222"),
+            ("https://gerrit.example.com", "https://gerrit.example.com"),
+            ("/srv/gerrit", "/srv/gerrit"),
+        ],
+    )
+    def test_port_matches_master(self, url: str, expected: str) -> None:
+        """Test pushes go to the port the master connection uses."""
+        assert ssh_push_url(url) == expected
+
+    def test_session_key_per_host(self) -> None:
+        """Test configurations on one SSH host and login share a session key."""
+
+        def ssh_config(url: str, username: str = "bot") -> DeliveryConfig:
+            return DeliveryConfig(
+                gerrit_url=url, auth_method="ssh", ssh_key_path="/keys/id_rsa", username=username
+            )
+
+        key = session_key(ssh_config("ssh://gerrit.example.com"))
+        assert session_key(ssh_config("ssh://gerrit.example.com:29418/")) == key
+        assert session_key(ssh_config("ssh://gerrit.example.com", "other")) != key
+        assert session_key(ssh_config("ssh://gerrit.example.com:2222")) != key
+
+
+class TestHttpAuthSession:
+    """Tests for HttpAuthSession."""
+
+    def test_git_sees_auth_header(self, tmp_path: Path) -> None:
+        """Test git picks up the Authorization header from the environment."""
+        session = HttpAuthSession("user", "secret")
+        env = dict(os.environ, **session.git_env())
+
+        header = subprocess.run(
+            ["git", "config", "--get", "http.extraHeader"],
+            cwd=tmp_path,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+
+        assert header == "Authorization: Basic dXNlcjpzZWNyZXQ="
+
+
+class TestCreateTransport:
+    """Tests for create_transport."""
+
+    def test_http(self) -> None:
+        """Test HTTP config creates an auth session."""
+        config = DeliveryConfig(
+            gerrit_url="https://gerrit.example.com", auth_method="http", username="user"
+        )
+        with create_transport(config) as session:
+            assert isinstance(session, HttpAuthSession)
+
+    def test_ssh(self, ssh_calls: List[List[str]]) -> None:
+        """Test SSH config starts the master for the Gerrit host."""
+        config = DeliveryConfig(
+            gerrit_url="ssh://gerrit.example.com:29418",
+            auth_method="ssh",
+            ssh_key_path="/keys/id_rsa",
+        )
+        with create_transport(config) as session:
+            assert isinstance(session, SshMultiplexer)
+        assert any("-M" in c for c in ssh_calls)
+        assert any("-O" in c for c in ssh_calls)
@@ -0,0 +1,87 @@
+"""
+Tests for delivery worker pool.
+"""
+import threading
+import time
+
+import pytest
+
+from lib.delivery.worker_pool import HostLimiter, WorkerPool, gerrit_host
+
+
+class TestGerritHost:
+    """Tests for host extraction."""
+
+    def test_url_forms(self) -> None:
+        """Test host extraction from supported URL forms."""
+        assert gerrit_host("ssh://user@Gerrit.example.com:29418/platform") == "gerrit.example.com"
+        assert gerrit_host("https://gerrit.example.com/a/platform") == "gerrit.example.com"
+        assert gerrit_host("user@gerrit.example.com:platform/build") == "gerrit.example.com"
+        assert gerrit_host("gerrit.example.com") == "gerrit.example.com"
+
+    def test_empty_url(self) -> None:
+        """Test empty URL yields empty host."""
+        assert gerrit_host("") == ""
+
+
+class TestHostLimiter:
+    """Tests for HostLimiter."""
+
+    def test_invalid_limit(self) -> None:
+        """Test non-positive limit raises error."""
+        with pytest.raises(ValueError, match="per_host_limit"):
+            HostLimiter(0)
+
+
+class TestWorkerPool:
+    """Tests for WorkerPool."""
+
+    def test_invalid_max_workers(self) -> None:
+        """Test non-positive worker count raises error."""
+        with pytest.raises(ValueError, match="max_workers"):
+            WorkerPool(max_workers=0)
+
+    def test_outcomes_keep_input_order(self) -> None:
+        """Test outcomes are ordered like the input regardless of finish order."""
+        pool = WorkerPool(max_workers=4)
+        items = [5, 1, 4, 2, 3]
+
+        def work(n: int) -> int:
+            time.sleep(n / 200)
+            return n * 10
+
+        outcomes = pool.map(work, items)
+        assert [o.item for o in outcomes] == items
+        assert [o.result for o in outcomes] == [50, 10, 40, 20, 30]
+
+    def test_errors_are_captured(self) -> None:
+        """Test a failing item does not abort the others."""
+        pool = WorkerPool(max_workers=3)
+
+        def work(n: int) -> int:
+            if n == 2:
+                raise RuntimeError("push rejected")
+            return n
+
+        outcomes = pool.map(work, [1, 2, 3])
+        assert [o.ok for o in outcomes] == [True, False, True]
+        assert str(outcomes[1].error) == "push rejected"
+
+    def test_per_host_limit(self) -> None:
+        """Test per-host cap bounds concurrency for each host separately."""
+        pool = WorkerPool(max_workers=8, per_host_limit=2)
+        active = {"a": 0, "b": 0}
+        peak = {"a": 0, "b": 0}
+        lock = threading.Lock()
+
+        def work(host: str) -> None:
+            with lock:
+                active[host] += 1
+                peak[host] = max(peak[host], active[host])
+            time.sleep(0.02)
+            with lock:
+                active[host] -= 1
+
+        pool.map(work, ["a", "b"] * 6, host_of=lambda host: host)
+        assert peak["a"] <= 2
+        assert peak["b"] <= 2
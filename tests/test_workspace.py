@@ -0,0 +1,94 @@
+"""
+Tests for the disk-budgeted workspace.
+"""
+import threading
+import time
+from pathlib import Path
+from typing import List
+
+import pytest
+
+from lib.delivery.workspace import Workspace, format_size, parse_size
+
+
+class TestSizes:
+    """Tests for parse_size and format_size."""
+
+    @pytest.mark.parametrize(
+        "value,expected",
+        [
+            ("1024", 1024),
+            ("512M", 512 * 1024**2),
+            ("20G", 20 * 1024**3),
+            ("1.5GiB", 1536 * 1024**2),
+        ],
+    )
+    def test_parse(self, value: str, expected: int) -> None:
+        """Test sizes with binary unit suffixes."""
+        assert parse_size(value) == expected
+
+    def test_parse_invalid(self) -> None:
+        """Test malformed sizes raise error."""
+        with pytest.raises(ValueError, match="Invalid size"):
+            parse_size("twenty gigs")
+
+    def test_format(self) -> None:
+        """Test human-readable rendering."""
+        assert format_size(512) == "512 B"
+        assert format_size(1536 * 1024**2) == "1.5 GiB"
+
+
+class TestWorkspace:
+    """Tests for Workspace."""
+
+    def test_scratch_is_removed_and_peak_kept(self, tmp_path: Path) -> None:
+        """Test a scratch directory is deleted on exit and its size counted in the peak."""
+        workspace = Workspace(tmp_path / "ws")
+        with workspace.scratch("platform/build") as reservation:
+            assert reservation.path is not None
+            (reservation.path / "pack").write_bytes(b"x" * 4096)
+            assert reservation.measure() == 4096
+            scratch_path = reservation.path
+
+        assert not scratch_path.exists()
+        assert workspace.used_bytes == 0
+        assert workspace.peak_bytes == 4096
+
+    def test_reservation_blocks_until_space_frees(self) -> None:
+        """Test a fetch waits while the budget is used up."""
+        workspace = Workspace(Path("/unused"), max_bytes=100)
+        order: List[str] = []
+        first_holding = threading.Event()
+
+        def first() -> None:
+            with workspace.reserve("first") as reservation:
+                reservation.resize(100)
+                first_holding.set()
+                time.sleep(0.05)
+                order.append("first done")
+
+        def second() -> None:
+            first_holding.wait()
+            with workspace.reserve("second"):
+                order.append("second started")
+
+        threads = [threading.Thread(target=first), threading.Thread(target=second)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert order == ["first done", "second started"]
+        assert workspace.peak_bytes == 100
+
+    def test_oversized_project_runs_alone(self) -> None:
+        """Test a project larger than the budget is admitted when nothing else runs."""
+        workspace = Workspace(Path("/unused"), max_bytes=10)
+        with workspace.reserve("huge", estimate=1000):
+            assert workspace.used_bytes == 1000
+        assert workspace.used_bytes == 0
+
+    def test_negative_budget(self) -> None:
+        """Test a negative budget is rejected."""
+        with pytest.raises(ValueError):
+            Workspace(Path("/unused"), max_bytes=-1)
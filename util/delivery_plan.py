@@ -0,0 +1,85 @@
+"""
+Serializable delivery plans: resolved pushes written once, applied later.
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, List, NamedTuple
+
+PLAN_FORMAT_VERSION = 1
+
+
+class PlanEntry(NamedTuple):
+    """One resolved push of a delivery plan."""
+
+    project: str
+    remote_url: str
+    revision: str
+    source_sha: str
+    gerrit_url: str
+    target_repo: str
+    target_branch: str
+
+    @property
+    def source_url(self) -> str:
+        """Upstream repository URL of the project."""
+        return f"{self.remote_url.rstrip('/')}/{self.project}"
+
+    @property
+    def target_url(self) -> str:
+        """Gerrit repository URL pushed to."""
+        return f"{self.gerrit_url.rstrip('/')}/{self.target_repo}"
+
+
+def write_plan(path: Path, entries: Iterable[PlanEntry]) -> int:
+    """
+    Write a delivery plan as JSON Lines.
+
+    The first line is a header with the format version; each following
+    line is one PlanEntry.
+
+    Args:
+        path: Plan file path
+        entries: Resolved pushes
+
+    Returns:
+        Number of entries written
+    """
+    count = 0
+    tmp_path = path.with_name(path.name + ".tmp")
+    with tmp_path.open("w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": PLAN_FORMAT_VERSION, "created_at": time.time()}) + "\n")
+        for entry in entries:
+            f.write(json.dumps(entry._asdict(), separators=(",", ":")) + "\n")
+            count += 1
+    os.replace(tmp_path, path)
+    return count
+
+
+def read_plan(path: Path) -> List[PlanEntry]:
+    """
+    Read a delivery plan written by write_plan().
+
+    Args:
+        path: Plan file path
+
+    Returns:
+        Plan entries in file order
+
+    Raises:
+        FileNotFoundError: If the plan doesn't exist
+        ValueError: If the plan is malformed or has an unsupported version
+    """
+    with path.open("r", encoding="utf-8") as f:
+        lines = [line for line in f if line.strip()]
+    if not lines:
+        raise ValueError(f"Delivery plan is empty: {path}")
+
+    try:
+        header = json.loads(lines[0])
+        if header.get("version") != PLAN_FORMAT_VERSION:
+            raise ValueError(f"Unsupported delivery plan version: {header.get('version')}")
+        return [PlanEntry(**json.loads(line)) for line in lines[1:]]
+    except (TypeError, AttributeError, json.JSONDecodeError) as e:
+        raise ValueError(f"Malformed delivery plan {path}: {e}") from None
@@ -0,0 +1,189 @@
+"""
+Structured per-project progress events with a non-blocking JSONL writer.
+"""
+import json
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import IO, Any, Callable, Dict, Iterator, List, Optional
+
+from util.sharding import PartialResult
+
+EVENT_QUEUED = "queued"
+EVENT_FETCHING = "fetching"
+EVENT_PUSHING = "pushing"
+EVENT_DONE = "done"
+EVENT_FAILED = "failed"
+EVENT_SKIPPED = "skipped"
+# Upstream SHA matches the last delivery, nothing fetched or pushed
+EVENT_UNCHANGED = "unchanged"
+
+# Events ending a project's delivery
+FINAL_EVENTS = frozenset({EVENT_DONE, EVENT_FAILED, EVENT_SKIPPED, EVENT_UNCHANGED})
+
+
+@dataclass
+class Event:
+    """State change of one project."""
+
+    state: str
+    project: str
+    config: Optional[str] = None
+    index: Optional[int] = None
+    duration: Optional[float] = None
+    bytes: Optional[int] = None
+    error_class: Optional[str] = None
+    error: Optional[str] = None
+    time: float = field(default_factory=time.time)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """JSON-ready form without unset fields."""
+        return {key: value for key, value in asdict(self).items() if value is not None}
+
+
+Listener = Callable[[Event], None]
+
+
+class EventStream:
+    """Fans events out to listeners (writers, collectors)."""
+
+    def __init__(self, listeners: Optional[List[Listener]] = None) -> None:
+        """
+        Initialize stream.
+
+        Args:
+            listeners: Functions called with every event; they must be thread-safe
+        """
+        self.listeners: List[Listener] = list(listeners or [])
+
+    def subscribe(self, listener: Listener) -> None:
+        """Add a listener."""
+        self.listeners.append(listener)
+
+    def emit(self, state: str, project: str, **fields: Any) -> None:
+        """
+        Publish an event.
+
+        Args:
+            state: One of the EVENT_* states
+            project: Project name
+            **fields: Other Event fields
+        """
+        event = Event(state=state, project=project, **fields)
+        for listener in self.listeners:
+            listener(event)
+
+
+class JsonlEventWriter:
+    """
+    Writes events as JSON Lines from a background thread.
+
+    Workers only enqueue, so they never wait on file I/O; close() drains
+    the queue.
+    """
+
+    _STOP = object()
+
+    def __init__(self, path: Path) -> None:
+        """
+        Open the output file and start the writer thread.
+
+        Args:
+            path: Output file path
+        """
+        self.path = path
+        self._queue: "queue.SimpleQueue[Any]" = queue.SimpleQueue()
+        self._file: IO[str] = path.open("w", encoding="utf-8")
+        self._thread = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._thread.start()
+
+    def __call__(self, event: Event) -> None:
+        self._queue.put(event)
+
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            if event is self._STOP:
+                break
+            self._file.write(json.dumps(event.to_dict(), separators=(",", ":")) + "\n")
+            if self._queue.empty():
+                self._file.flush()
+        self._file.close()
+
+    def close(self) -> None:
+        """Write the remaining events and close the file."""
+        if self._thread.is_alive():
+            self._queue.put(self._STOP)
+            self._thread.join()
+
+    def __enter__(self) -> "JsonlEventWriter":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.close()
+
+
+class SummaryCollector:
+    """Builds delivery summaries from the final event of each project."""
+
+    def __init__(self) -> None:
+        """Initialize collector."""
+        self._final: Dict[Optional[str], Dict[int, Event]] = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, event: Event) -> None:
+        if event.state not in FINAL_EVENTS:
+            return
+        with self._lock:
+            events = self._final.setdefault(event.config, {})
+            events[event.index if event.index is not None else len(events)] = event
+
+    def result(
+        self, config: Optional[str], total_projects: int, filtered_projects: int
+    ) -> PartialResult:
+        """
+        Summarize one configuration.
+
+        Args:
+            config: Configuration name used in the events
+            total_projects: Projects in the manifest
+            filtered_projects: Projects selected for delivery
+
+        Returns:
+            Result with projects in manifest order
+        """
+        with self._lock:
+            events = [e for _, e in sorted(self._final.get(config, {}).items())]
+        failed = [e.project for e in events if e.state == EVENT_FAILED]
+        skipped = [e.project for e in events if e.state == EVENT_SKIPPED]
+        return PartialResult(
+            total_projects=total_projects,
+            filtered_projects=filtered_projects,
+            successful=sum(1 for e in events if e.state == EVENT_DONE),
+            failed=len(failed),
+            skipped=len(skipped),
+            failed_projects=failed,
+            skipped_projects=skipped,
+            unchanged=sum(1 for e in events if e.state == EVENT_UNCHANGED),
+        )
+
+
+@contextmanager
+def open_event_stream(path: Optional[Path]) -> Iterator[Optional[EventStream]]:
+    """
+    Stream writing events to a JSONL file, closed (drained) on exit.
+
+    Args:
+        path: Output file path (None to disable events)
+
+    Yields:
+        Event stream, or None if path is None
+    """
+    if path is None:
+        yield None
+        return
+    with JsonlEventWriter(path) as writer:
+        yield EventStream([writer])
@@ -0,0 +1,71 @@
+"""
+Remote ref query utilities.
+"""
+import subprocess
+from typing import Dict, Iterable, Optional
+
+
+def ls_remote(
+    url: str, patterns: Optional[Iterable[str]] = None, timeout: float = 60
+) -> Dict[str, str]:
+    """
+    List refs of a remote repository with a single `git ls-remote` call.
+
+    Annotated tags are reported with the SHA of the commit they point to.
+
+    Args:
+        url: Remote repository URL
+        patterns: Optional ref patterns to limit the query
+        timeout: Timeout in seconds
+
+    Returns:
+        Mapping of full ref name to SHA
+
+    Raises:
+        RuntimeError: If git ls-remote fails
+    """
+    command = ["git", "ls-remote", url]
+    if patterns:
+        command.append("--")
+        for pattern in patterns:
+            # Peeled tag lines only match patterns that include the suffix
+            command.extend([pattern, f"{pattern}^{{}}"])
+
+    completed = subprocess.run(
+        command, capture_output=True, text=True, timeout=timeout, check=False
+    )
+    if completed.returncode != 0:
+        raise RuntimeError(f"git ls-remote failed for {url}: {completed.stderr.strip()}")
+
+    refs: Dict[str, str] = {}
+    for line in completed.stdout.splitlines():
+        if "\t" not in line:
+            continue
+        sha, ref = line.split("\t", 1)
+        if ref.endswith("^{}"):
+            # Peeled annotated tag overrides the tag object SHA
+            refs[ref[:-3]] = sha
+        else:
+            refs.setdefault(ref, sha)
+
+    return refs
+
+
+def resolve_revision(refs: Dict[str, str], revision: str) -> Optional[str]:
+    """
+    Resolve a manifest revision against an ls-remote ref listing.
+
+    Args:
+        refs: Mapping of full ref name to SHA (from ls_remote)
+        revision: Branch, tag or full ref name
+
+    Returns:
+        SHA the revision points to, or None if not found
+    """
+    if not revision:
+        return None
+
+    if revision.startswith("refs/"):
+        return refs.get(revision)
+
+    return refs.get(f"refs/heads/{revision}") or refs.get(f"refs/tags/{revision}")
@@ -0,0 +1,80 @@
+"""
+Keyed diff between two manifest versions.
+"""
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Tuple
+
+from lib.manifest.models import Project
+
+ProjectKey = Tuple[str, str]
+
+
+def project_key(project: Project) -> ProjectKey:
+    """Identity of a project across manifest versions (name and checkout path)."""
+    return project.name, project.path
+
+
+@dataclass
+class ManifestDiff:
+    """Projects added, removed and changed between a baseline and a target manifest."""
+
+    added: List[Project] = field(default_factory=list)
+    removed: List[Project] = field(default_factory=list)
+    changed: List[Tuple[Project, Project]] = field(default_factory=list)
+    unchanged: int = 0
+    to_deliver: List[Project] = field(default_factory=list)
+
+    @property
+    def has_changes(self) -> bool:
+        """Whether the manifests differ."""
+        return bool(self.added or self.removed or self.changed)
+
+    def format(self) -> str:
+        """
+        Render the diff for humans.
+
+        Returns:
+            One line per difference ("+" added, "-" removed, "~" revision
+            changed) followed by a count line
+        """
+        lines = [f"+ {p.name} ({p.path}) {p.revision or '-'}" for p in self.added]
+        lines.extend(
+            f"~ {new.name} ({new.path}) {old.revision or '-'} -> {new.revision or '-'}"
+            for old, new in self.changed
+        )
+        lines.extend(f"- {p.name} ({p.path})" for p in self.removed)
+        lines.append(
+            f"{len(self.added)} added, {len(self.changed)} changed, "
+            f"{len(self.removed)} removed, {self.unchanged} unchanged"
+        )
+        return "\n".join(lines)
+
+
+def diff_projects(baseline: Iterable[Project], target: Iterable[Project]) -> ManifestDiff:
+    """
+    Compare two project lists keyed by name and path.
+
+    Args:
+        baseline: Projects of the previous manifest
+        target: Projects of the new manifest
+
+    Returns:
+        Diff; to_deliver holds added and revision-changed projects in
+        target manifest order
+    """
+    previous: Dict[ProjectKey, Project] = {project_key(p): p for p in baseline}
+    diff = ManifestDiff()
+
+    for project in target:
+        old = previous.pop(project_key(project), None)
+        if old is None:
+            diff.added.append(project)
+            diff.to_deliver.append(project)
+        elif old.revision != project.revision:
+            diff.changed.append((old, project))
+            diff.to_deliver.append(project)
+        else:
+            diff.unchanged += 1
+
+    diff.removed = list(previous.values())
+    return diff
@@ -2,10 +2,62 @@
 Revision filter utilities for manifest projects.
 """
 import re
-from typing import List
+from dataclasses import dataclass, field
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional
 
 from lib.manifest.models import Project
 
+# Revision categories
+REVISION_HASH = "hash"
+REVISION_BRANCH = "branch"
+REVISION_TAG = "tag"
+REVISION_REF = "ref"
+REVISION_EMPTY = "empty"
+
+REVISION_CATEGORIES = (REVISION_BRANCH, REVISION_TAG, REVISION_REF, REVISION_HASH, REVISION_EMPTY)
+
+# Categories delivered to Gerrit; hash and empty revisions are excluded
+KEPT_CATEGORIES = frozenset({REVISION_BRANCH, REVISION_TAG, REVISION_REF})
+
+# Hash patterns:
+# - 40 character hex string (full SHA-1)
+# - 7+ character hex string (short hash)
+# - Must be all hexadecimal characters
+_HASH_PATTERN = re.compile(r"^[0-9a-f]{7,40}$", re.IGNORECASE)
+
+# Release-style names: "v1.0.0", "1.2", "android-14.0.0_r1"
+_TAG_PATTERN = re.compile(r"^(?:v?\d+(?:\.\d+)+\S*|android-[\w.-]*_r\d+)$", re.IGNORECASE)
+
+
+@lru_cache(maxsize=4096)
+def classify_revision(revision: Optional[str]) -> str:
+    """
+    Classify a revision string.
+
+    Results are memoized, since many projects in a manifest share the same
+    revision. Telling tags from branches by name is a heuristic: only
+    release-style names count as tags, anything else that is not a hash or
+    a full ref is treated as a branch.
+
+    Args:
+        revision: Revision string to classify
+
+    Returns:
+        One of REVISION_HASH, REVISION_BRANCH, REVISION_TAG, REVISION_REF, REVISION_EMPTY
+    """
+    if not revision or not revision.strip():
+        return REVISION_EMPTY
+
+    revision = revision.strip()
+    if revision.startswith("refs/"):
+        return REVISION_REF
+    if _HASH_PATTERN.match(revision):
+        return REVISION_HASH
+    if _TAG_PATTERN.match(revision):
+        return REVISION_TAG
+    return REVISION_BRANCH
+
 
 def is_hash_revision(revision: str) -> bool:
     """
@@ -17,40 +69,84 @@ def is_hash_revision(revision: str) -> bool:
     Returns:
         True if revision is a hash, False otherwise
     """
-    if not revision:
-        return False
+    return classify_revision(revision) == REVISION_HASH
 
-    # Hash patterns:
-    # - 40 character hex string (full SHA-1)
-    # - 7+ character hex string (short hash)
-    # - Must be all hexadecimal characters
-    hash_pattern = re.compile(r"^[0-9a-f]{7,40}$", re.IGNORECASE)
 
-    return bool(hash_pattern.match(revision.strip()))
+@dataclass
+class RevisionFilterResult:
+    """Kept projects plus per-category revision counts."""
 
+    kept: List[Project] = field(default_factory=list)
+    counts: Dict[str, int] = field(
+        default_factory=lambda: {category: 0 for category in REVISION_CATEGORIES}
+    )
 
-def filter_projects_by_revision(projects: List[Project]) -> List[Project]:
+    @property
+    def total(self) -> int:
+        """Number of classified projects."""
+        return sum(self.counts.values())
+
+    @property
+    def excluded(self) -> int:
+        """Number of projects excluded (hash or empty revision)."""
+        return self.counts[REVISION_HASH] + self.counts[REVISION_EMPTY]
+
+
+def classify_projects(projects: Iterable[Project]) -> RevisionFilterResult:
     """
-    Filter projects to include only those with branch/tag revisions (exclude hash).
+    Classify and filter a batch of projects in one pass.
 
     Args:
-        projects: List of projects to filter
+        projects: Projects to classify
 
     Returns:
-        Filtered list of projects with non-hash revisions
+        Result with kept projects (input order) and counts per category
     """
-    filtered: List[Project] = []
+    result = RevisionFilterResult()
+    counts = result.counts
+    kept = result.kept
+
+    for project in projects:
+        category = classify_revision(project.revision)
+        counts[category] += 1
+        if category in KEPT_CATEGORIES:
+            kept.append(project)
+
+    return result
+
+
+def iter_filter_projects_by_revision(
+    projects: Iterable[Project], counts: Optional[Dict[str, int]] = None
+) -> Iterator[Project]:
+    """
+    Lazily filter projects to those with branch/tag revisions (exclude hash).
+
+    Consumes projects one at a time, so it can be chained onto a streaming
+    manifest parser and downstream work can start before parsing finishes.
+
+    Args:
+        projects: Iterable (or generator) of projects to filter
+        counts: Projects per revision category, updated as projects are consumed
 
+    Yields:
+        Projects with non-hash revisions, in input order
+    """
     for project in projects:
-        # Skip if no revision
-        if not project.revision:
-            continue
+        category = classify_revision(project.revision)
+        if counts is not None:
+            counts[category] = counts.get(category, 0) + 1
+        if category in KEPT_CATEGORIES:
+            yield project
 
-        # Skip if revision is a hash
-        if is_hash_revision(project.revision):
-            continue
 
-        # Include projects with branch/tag names
-        filtered.append(project)
+def filter_projects_by_revision(projects: Iterable[Project]) -> List[Project]:
+    """
+    Filter projects to include only those with branch/tag revisions (exclude hash).
 
-    return filtered
+    Args:
+        projects: Projects to filter (list or any iterable)
+
+    Returns:
+        Filtered list of projects with non-hash revisions
+    """
+    return classify_projects(projects).kept
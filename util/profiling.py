@@ -0,0 +1,193 @@
+"""
+Timing instrumentation for delivery phases.
+"""
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+DEFAULT_SLOWEST = 10
+
+
+@dataclass
+class Span:
+    """One timed phase, optionally tied to a project."""
+
+    phase: str
+    seconds: float
+    project: Optional[str] = None
+    bytes: Optional[int] = None
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    """
+    Nearest-rank percentile.
+
+    Args:
+        values: Sample values
+        fraction: Percentile as a fraction (e.g. 0.95)
+
+    Returns:
+        Percentile value (0.0 for no samples)
+    """
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(1, math.ceil(fraction * len(ordered)))
+    return ordered[rank - 1]
+
+
+class Profiler:
+    """Thread-safe collector of timing spans."""
+
+    def __init__(self) -> None:
+        """Initialize profiler."""
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._started = time.monotonic()
+
+    def record(
+        self,
+        phase: str,
+        seconds: float,
+        project: Optional[str] = None,
+        bytes: Optional[int] = None,
+    ) -> Span:
+        """
+        Record a finished span.
+
+        Args:
+            phase: Phase name (e.g. "manifest", "parse", "fetch", "push")
+            seconds: Duration in seconds
+            project: Project name for per-project spans
+            bytes: Bytes transferred, if known
+
+        Returns:
+            Recorded span
+        """
+        span = Span(phase=phase, seconds=seconds, project=project, bytes=bytes)
+        with self._lock:
+            self.spans.append(span)
+        return span
+
+    @contextmanager
+    def span(self, phase: str, project: Optional[str] = None) -> Iterator[Span]:
+        """
+        Time the enclosed block.
+
+        The yielded span can be updated with a byte count inside the block.
+
+        Args:
+            phase: Phase name
+            project: Project name for per-project spans
+
+        Yields:
+            Span being measured
+        """
+        span = Span(phase=phase, seconds=0.0, project=project)
+        started = time.monotonic()
+        try:
+            yield span
+        finally:
+            span.seconds = time.monotonic() - started
+            with self._lock:
+                self.spans.append(span)
+
+    def report(self, slowest: int = DEFAULT_SLOWEST) -> Dict[str, Any]:
+        """
+        Build the profile report.
+
+        Args:
+            slowest: Number of slowest projects to include
+
+        Returns:
+            Report with totals, per-phase p50/p95/max and slowest projects
+        """
+        with self._lock:
+            spans = list(self.spans)
+
+        phases: Dict[str, Dict[str, Any]] = {}
+        per_project: Dict[str, Dict[str, float]] = {}
+        for span in spans:
+            phase = phases.setdefault(span.phase, {"durations": [], "bytes": 0})
+            phase["durations"].append(span.seconds)
+            if span.bytes:
+                phase["bytes"] += span.bytes
+            if span.project:
+                times = per_project.setdefault(span.project, {})
+                times[span.phase] = times.get(span.phase, 0.0) + span.seconds
+
+        phase_report = {}
+        for name, data in phases.items():
+            durations = data["durations"]
+            phase_report[name] = {
+                "count": len(durations),
+                "total": round(sum(durations), 6),
+                "p50": round(percentile(durations, 0.50), 6),
+                "p95": round(percentile(durations, 0.95), 6),
+                "max": round(max(durations), 6),
+                "bytes": data["bytes"],
+            }
+
+        ranked = sorted(per_project.items(), key=lambda item: (-sum(item[1].values()), item[0]))
+        return {
+            "total_seconds": round(time.monotonic() - self._started, 6),
+            "phases": phase_report,
+            "slowest_projects": [
+                {
+                    "project": name,
+                    "total": round(sum(times.values()), 6),
+                    "phases": {k: round(v, 6) for k, v in times.items()},
+                }
+                for name, times in ranked[:slowest]
+            ],
+        }
+
+    def write_json(self, path: Path, slowest: int = DEFAULT_SLOWEST) -> None:
+        """
+        Write the profile report as JSON.
+
+        Args:
+            path: Output file path
+            slowest: Number of slowest projects to include
+        """
+        path.write_text(json.dumps(self.report(slowest), indent=2) + "\n", encoding="utf-8")
+
+    def write_prometheus(self, path: Path) -> None:
+        """
+        Write phase metrics in the node_exporter textfile format.
+
+        The file is written to a temporary name and renamed, so the
+        collector never reads a partial file.
+
+        Args:
+            path: Output .prom file path
+        """
+        report = self.report(slowest=0)
+        lines = [
+            "# HELP cicd_delivery_run_seconds Wall time of the delivery run.",
+            "# TYPE cicd_delivery_run_seconds gauge",
+            f"cicd_delivery_run_seconds {report['total_seconds']}",
+        ]
+        metrics = [
+            ("phase_seconds_total", "total", "Total time spent in phase."),
+            ("phase_seconds_p50", "p50", "Median span duration of phase."),
+            ("phase_seconds_p95", "p95", "95th percentile span duration of phase."),
+            ("phase_seconds_max", "max", "Longest span duration of phase."),
+            ("phase_spans", "count", "Number of spans recorded for phase."),
+            ("phase_bytes_total", "bytes", "Bytes transferred in phase."),
+        ]
+        for metric, key, help_text in metrics:
+            lines.append(f"# HELP cicd_delivery_{metric} {help_text}")
+            lines.append(f"# TYPE cicd_delivery_{metric} gauge")
+            for phase, values in sorted(report["phases"].items()):
+                lines.append(f'cicd_delivery_{metric}{{phase="{phase}"}} {values[key]}')
+
+        tmp_path = path.with_name(path.name + ".tmp")
+        tmp_path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+        os.replace(tmp_path, path)
@@ -0,0 +1,226 @@
+"""
+Deterministic sharding of deliveries and merging of partial results.
+"""
+import hashlib
+import heapq
+import json
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+def parse_shard(value: str) -> Tuple[int, int]:
+    """
+    Parse a "K/N" shard spec (1 <= K <= N).
+
+    Args:
+        value: Shard spec
+
+    Returns:
+        Tuple of (K, N)
+
+    Raises:
+        ValueError: If the spec is malformed or out of range
+    """
+    try:
+        k_text, n_text = value.split("/", 1)
+        k, n = int(k_text), int(n_text)
+    except ValueError:
+        raise ValueError(f"Invalid shard '{value}', expected K/N (e.g. 1/4)") from None
+
+    if n < 1 or not 1 <= k <= n:
+        raise ValueError(f"Invalid shard '{value}', K must be between 1 and N")
+    return k, n
+
+
+def _stable_hash(name: str) -> int:
+    return int.from_bytes(hashlib.sha1(name.encode("utf-8")).digest()[:8], "big")
+
+
+def assign_shards(
+    names: Iterable[str], count: int, weight_of: Optional[Callable[[str], float]] = None
+) -> Dict[str, int]:
+    """
+    Assign project names to shards deterministically.
+
+    Without weights, each name goes to a shard chosen by a stable hash of
+    the name, so assignments don't move when other projects are added.
+    With weights (e.g. historical repo size), names are placed heaviest
+    first on the lightest shard so shards finish close together; every
+    runner must then use the same weights.
+
+    Args:
+        names: Project names
+        count: Number of shards
+        weight_of: Function returning the weight of a name
+
+    Returns:
+        Mapping of name to shard number (1-based)
+    """
+    if count < 1:
+        raise ValueError("count must be at least 1")
+
+    unique = sorted(set(names))
+    if weight_of is None:
+        return {name: _stable_hash(name) % count + 1 for name in unique}
+
+    ordered = sorted(unique, key=lambda name: (-weight_of(name), name))
+    loads = [(0.0, shard) for shard in range(1, count + 1)]
+    assignment: Dict[str, int] = {}
+    for name in ordered:
+        load, shard = heapq.heappop(loads)
+        assignment[name] = shard
+        heapq.heappush(loads, (load + weight_of(name), shard))
+    return assignment
+
+
+def select_shard(
+    items: Sequence[T],
+    shard: int,
+    count: int,
+    name_of: Callable[[T], str] = lambda item: getattr(item, "name"),
+    weight_of: Optional[Callable[[str], float]] = None,
+) -> List[T]:
+    """
+    Select the items belonging to one shard, keeping their order.
+
+    Args:
+        items: Items to partition (e.g. filtered projects)
+        shard: Shard number (1-based)
+        count: Number of shards
+        name_of: Function returning the project name of an item
+        weight_of: Function returning the weight of a name
+
+    Returns:
+        Items of the shard
+    """
+    assignment = assign_shards((name_of(item) for item in items), count, weight_of)
+    return [item for item in items if assignment[name_of(item)] == shard]
+
+
+@dataclass
+class PartialResult:
+    """Delivery result of one runner, serializable to a file."""
+
+    total_projects: int = 0
+    filtered_projects: int = 0
+    successful: int = 0
+    failed: int = 0
+    skipped: int = 0
+    failed_projects: List[str] = field(default_factory=list)
+    skipped_projects: List[str] = field(default_factory=list)
+    shard: Optional[str] = None
+    peak_workspace_bytes: Optional[int] = None
+    # Projects whose upstream SHA matched the last delivery (not pushed again)
+    unchanged: int = 0
+    # Run time predicted from the delivery history, and the measured one
+    predicted_makespan_seconds: Optional[float] = None
+    makespan_seconds: Optional[float] = None
+    # Manifest projects per revision category (branch, tag, ref, hash, empty)
+    revision_counts: Dict[str, int] = field(default_factory=dict)
+
+    @classmethod
+    def from_result(cls, result: Any, shard: Optional[str] = None) -> "PartialResult":
+        """
+        Build from a DeliveryResult.
+
+        Args:
+            result: Delivery result
+            shard: Shard spec of the run ("K/N"), if sharded
+
+        Returns:
+            Partial result
+        """
+        return cls(
+            total_projects=result.total_projects,
+            filtered_projects=result.filtered_projects,
+            successful=result.successful,
+            failed=result.failed,
+            skipped=result.skipped,
+            failed_projects=[str(p) for p in result.failed_projects],
+            skipped_projects=[str(p) for p in result.skipped_projects],
+            shard=shard,
+            peak_workspace_bytes=getattr(result, "peak_workspace_bytes", None),
+            unchanged=getattr(result, "unchanged", 0),
+            predicted_makespan_seconds=getattr(result, "predicted_makespan_seconds", None),
+            makespan_seconds=getattr(result, "makespan_seconds", None),
+            revision_counts=dict(getattr(result, "revision_counts", None) or {}),
+        )
+
+    def write(self, path: Path) -> None:
+        """Write the partial result as JSON."""
+        path.write_text(json.dumps(asdict(self), indent=2) + "\n", encoding="utf-8")
+
+    @classmethod
+    def read(cls, path: Path) -> "PartialResult":
+        """Read a partial result written by write()."""
+        return cls(**json.loads(path.read_text(encoding="utf-8")))
+
+
+def merge_partial_results(results: Sequence[PartialResult]) -> PartialResult:
+    """
+    Combine partial results of shards into one result.
+
+    Every shard sees the whole manifest, so for sharded results
+    total_projects and the revision counts are taken once; otherwise they
+    are summed like the other counters. Project lists are concatenated in shard order, and the peak
+    workspace usage and makespans are the largest of the parts.
+
+    Args:
+        results: Partial results
+
+    Returns:
+        Merged result
+
+    Raises:
+        ValueError: If shards are missing, duplicated or disagree on N
+    """
+    if not results:
+        raise ValueError("No partial results to merge")
+
+    shards = [parse_shard(r.shard) for r in results if r.shard]
+    if shards:
+        if len(shards) != len(results):
+            raise ValueError("Cannot merge sharded and unsharded results")
+        counts = {n for _, n in shards}
+        if len(counts) != 1:
+            raise ValueError(f"Partial results disagree on shard count: {sorted(counts)}")
+        count = counts.pop()
+        seen = [k for k, _ in shards]
+        duplicates = sorted({k for k in seen if seen.count(k) > 1})
+        if duplicates:
+            raise ValueError(f"Duplicate shards: {duplicates}")
+        missing = sorted(set(range(1, count + 1)) - set(seen))
+        if missing:
+            raise ValueError(f"Missing shards: {missing}")
+
+    ordered = sorted(results, key=lambda r: parse_shard(r.shard)[0] if r.shard else 0)
+    merged = PartialResult()
+    if shards:
+        merged.total_projects = max(r.total_projects for r in ordered)
+        merged.revision_counts = dict(max(ordered, key=lambda r: r.total_projects).revision_counts)
+    else:
+        merged.total_projects = sum(r.total_projects for r in ordered)
+        for r in ordered:
+            for category, count in r.revision_counts.items():
+                merged.revision_counts[category] = merged.revision_counts.get(category, 0) + count
+    for r in ordered:
+        merged.filtered_projects += r.filtered_projects
+        merged.successful += r.successful
+        merged.failed += r.failed
+        merged.skipped += r.skipped
+        merged.unchanged += r.unchanged
+        merged.failed_projects.extend(r.failed_projects)
+        merged.skipped_projects.extend(r.skipped_projects)
+        if r.peak_workspace_bytes is not None:
+            merged.peak_workspace_bytes = max(
+                merged.peak_workspace_bytes or 0, r.peak_workspace_bytes
+            )
+        # Runners (and configurations of a batch) run side by side
+        for name in ("predicted_makespan_seconds", "makespan_seconds"):
+            value = getattr(r, name)
+            if value is not None:
+                setattr(merged, name, max(getattr(merged, name) or 0.0, value))
+    return merged